@@ -0,0 +1,146 @@
+"""
+Benchmark de serialização das respostas: JSONResponse (json da stdlib) x ORJSONResponse.
+
+Usa payloads sintéticos no formato dos endpoints mais pesados:
+- /api/orders/details (vw_detalhes_pedidos_faturas)
+- /cpi/ZBAPI_AR_ACC_GETOPENITEMS_V2 (pass-through do SAP)
+
+Uma rota que retorna dict passa pelo jsonable_encoder do FastAPI antes do render, mesmo com
+ORJSONResponse como response class padrão; só devolver ORJSONResponse(...) direto evita esse passo.
+A segunda tabela mede a requisição completa (TestClient) nos três casos.
+
+Uso:
+    python -m benchmarks.bench_json_response --rows 20000 --repeat 5
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from json_response import ORJSONResponse
+
+
+def order_details_payload(n_rows: int, rng: random.Random):
+    base_date = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n_rows):
+        issued = base_date + timedelta(days=rng.randint(0, 365))
+        rows.append(
+            {
+                "pedido_id": i,
+                "pedido_uuid": str(uuid4()),
+                "pedido_data": issued.isoformat(),
+                "cliente_nome": f"Cliente {rng.randint(1, 5000)}",
+                "company_id": rng.randint(1, 20),
+                "valor_total": round(rng.uniform(100, 250000), 2),
+                "fatura_numero": str(rng.randint(10**8, 10**9)),
+                "dt_vencimento": (issued + timedelta(days=rng.choice([30, 60, 90]))).date().isoformat(),
+                "valor_parcela": round(rng.uniform(10, 50000), 2),
+                "status": rng.choice(["PAGO", "ABERTO", "VENCIDO"]),
+            }
+        )
+    return {"success": True, "data": rows}
+
+
+def open_items_payload(n_rows: int, rng: random.Random):
+    items = [
+        {
+            "DOC_NO": str(rng.randint(10**9, 10**10 - 1)),
+            "DOC_DATE": (date(2024, 1, 1) + timedelta(days=rng.randint(0, 365))).strftime("%Y%m%d"),
+            "FKDATE": (date(2024, 3, 1) + timedelta(days=rng.randint(0, 365))).strftime("%Y%m%d"),
+            "AMOUNT": "%.2f" % rng.uniform(10, 100000),
+            "CURRENCY": "BRL",
+            "ITEM_TEXT": "X" * rng.randint(10, 50),
+        }
+        for _ in range(n_rows)
+    ]
+    return {"ZBAPI_AR_ACC_GETOPENITEMS_V2.Response": {"T_ITEMS": {"item": items}}}
+
+
+def typed_payload(n_rows: int, rng: random.Random):
+    """Linhas com datetime, UUID e Decimal, que exigem jsonable_encoder no caminho da stdlib"""
+    return [
+        {
+            "id": uuid4(),
+            "created_at": datetime.utcnow(),
+            "amount": Decimal("%.2f" % rng.uniform(10, 100000)),
+        }
+        for _ in range(n_rows)
+    ]
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def route_clients(payload):
+    """Clientes de apps mínimos: padrão da stdlib, ORJSONResponse padrão com dict e ORJSONResponse direto"""
+    stdlib_app = FastAPI(default_response_class=JSONResponse)
+    stdlib_app.get("/payload")(lambda: payload)
+
+    orjson_app = FastAPI(default_response_class=ORJSONResponse)
+    orjson_app.get("/payload")(lambda: payload)
+
+    direct_app = FastAPI(default_response_class=ORJSONResponse)
+    direct_app.get("/payload")(lambda: ORJSONResponse(payload))
+
+    return {
+        "stdlib (dict)": TestClient(stdlib_app),
+        "orjson (dict)": TestClient(orjson_app),
+        "orjson (direct)": TestClient(direct_app),
+    }
+
+
+def run(n_rows: int, repeat: int):
+    rng = random.Random(42)
+    payloads = {
+        "order-details": order_details_payload(n_rows, rng),
+        "open-items": open_items_payload(n_rows, rng),
+        "typed-rows": typed_payload(n_rows, rng),
+    }
+
+    print("render")
+    print(f"{'payload':<16}{'serializer':<22}{'time (ms)':>11}{'MB/s':>10}")
+
+    for name, payload in payloads.items():
+        body_size = len(ORJSONResponse(content=payload).body)
+        serializers = {
+            "stdlib+jsonable": lambda: JSONResponse(content=jsonable_encoder(payload)),
+            "orjson+jsonable": lambda: ORJSONResponse(content=jsonable_encoder(payload)),
+            "orjson": lambda: ORJSONResponse(content=payload),
+        }
+
+        for serializer, render in serializers.items():
+            elapsed = _best_of(render, repeat)
+            print(f"{name:<16}{serializer:<22}{elapsed * 1000:>11.1f}{body_size / elapsed / 1e6:>10.1f}")
+
+    print("\nroute (GET pelo TestClient)")
+    print(f"{'payload':<16}{'route':<22}{'time (ms)':>11}{'MB/s':>10}")
+
+    for name, payload in payloads.items():
+        for route, client in route_clients(payload).items():
+            response = client.get("/payload")
+            body_size = len(response.content)
+            elapsed = _best_of(lambda: client.get("/payload"), repeat)
+            print(f"{name:<16}{route:<22}{elapsed * 1000:>11.1f}{body_size / elapsed / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.rows, args.repeat)
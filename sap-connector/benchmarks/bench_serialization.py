@@ -0,0 +1,127 @@
+"""
+Benchmark de formatação e serialização das listagens do DataService.
+
+Compara o formato completo (com raw_data) contra o formato projetado
+(sap_data reduzido às chaves usadas pelos formatadores) em páginas de 10k linhas.
+
+Uso:
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+from src.services.data_service import (
+    CREDIT_LIMIT_SAP_KEYS,
+    CUSTOMER_SAP_KEYS,
+    SALES_ORDER_SAP_KEYS,
+    DataService,
+)
+
+# Campos do SAP que não são usados pelos formatadores, mas chegam em raw_data
+EXTRA_SAP_KEYS = ["ZZFIELD_%02d" % i for i in range(30)]
+
+
+def _sap_payload(keys, rng):
+    payload = {key: "%08d" % rng.randint(0, 99999999) for key in keys}
+    payload.update({key: "X" * rng.randint(5, 40) for key in EXTRA_SAP_KEYS})
+    return payload
+
+
+def _row(rng, keys, **columns):
+    now = datetime.utcnow()
+    return SimpleNamespace(
+        id=uuid4(),
+        created_at=now,
+        updated_at=now,
+        sap_data=_sap_payload(keys, rng),
+        **columns,
+    )
+
+
+def _project(rows, keys):
+    return [SimpleNamespace(**{**vars(r), "sap_data": {k: r.sap_data.get(k) for k in keys}}) for r in rows]
+
+
+def build_rows(entity: str, n_rows: int, seed: int = 42):
+    rng = random.Random(seed)
+
+    if entity == "customer":
+        return [_row(rng, CUSTOMER_SAP_KEYS.values(), customer_code=str(i).zfill(10)) for i in range(n_rows)]
+    if entity == "sales_order":
+        return [
+            _row(
+                rng,
+                SALES_ORDER_SAP_KEYS.values(),
+                order_number=str(i).zfill(10),
+                customer_code=str(i % 500).zfill(10),
+                document_date=datetime.utcnow(),
+            )
+            for i in range(n_rows)
+        ]
+    if entity == "credit_limit":
+        return [
+            _row(rng, CREDIT_LIMIT_SAP_KEYS.values(), customer_code=str(i).zfill(10), segment="0001")
+            for i in range(n_rows)
+        ]
+    raise ValueError(f"Unknown entity: {entity}")
+
+
+def build_datasets(n_rows: int, seed: int = 42):
+    return {
+        "customer": (build_rows("customer", n_rows, seed), CUSTOMER_SAP_KEYS),
+        "sales_order": (build_rows("sales_order", n_rows, seed), SALES_ORDER_SAP_KEYS),
+        "credit_limit": (build_rows("credit_limit", n_rows, seed), CREDIT_LIMIT_SAP_KEYS),
+    }
+
+
+def _measure(func, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(n_rows: int, repeat: int):
+    service = DataService(db=None)
+    formatters = {
+        "customer": service._format_customer,
+        "sales_order": service._format_sales_order,
+        "credit_limit": service._format_credit_limit,
+    }
+
+    print(f"{'entity':<14}{'mode':<11}{'format (ms)':>13}{'json (ms)':>12}{'size (KB)':>12}")
+
+    for entity, (rows, keys) in build_datasets(n_rows).items():
+        formatter = formatters[entity]
+        projected_rows = _project(rows, set(keys.values()))
+
+        modes = {
+            "raw": lambda: [formatter(r, include_raw=True) for r in rows],
+            "projected": lambda: [formatter(r, include_raw=False) for r in projected_rows],
+        }
+
+        for mode, format_page in modes.items():
+            format_time, page = _measure(format_page, repeat)
+            json_time, body = _measure(lambda: json.dumps(page, default=str), repeat)
+            print(
+                f"{entity:<14}{mode:<11}{format_time * 1000:>13.1f}{json_time * 1000:>12.1f}"
+                f"{len(body) / 1024:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.rows, args.repeat)
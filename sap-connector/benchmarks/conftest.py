@@ -0,0 +1,47 @@
+"""
+Configuração da suíte de micro-benchmarks (pytest-benchmark).
+
+Os tamanhos dos datasets vêm de BENCH_SIZES (padrão 1000,10000,100000) e os baselines
+ficam em benchmarks/baselines, independentemente do diretório de onde o pytest é chamado.
+
+Uso (a partir de sap-connector/):
+    pytest benchmarks --benchmark-save=baseline      # grava um novo baseline
+    pytest benchmarks --benchmark-compare            # compara com o último baseline da máquina
+
+Com --benchmark-compare, qualquer benchmark com mediana 20% acima do baseline falha
+(REGRESSION_THRESHOLD; sobrescreva com --benchmark-compare-fail).
+"""
+
+import logging
+import os
+
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+REGRESSION_THRESHOLD = "median:20%"
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "1000,10000,100000").split(",") if size.strip()]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Roda antes do plugin criar o storage: troca o ./.benchmarks padrão pelo diretório versionado
+    if config.getoption("benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{BASELINES_DIR}"
+
+    if config.getoption("benchmark_compare", None) and not config.getoption("benchmark_compare_fail", None):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
+
+    config.addinivalue_line("markers", "max_size(n): maior tamanho de dataset usado pelo benchmark")
+
+    # Os cálculos de risco logam em INFO a cada chamada; o custo do logging não é o alvo aqui
+    logging.disable(logging.INFO)
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        # @pytest.mark.max_size(n) limita o dataset de funções com custo quadrático
+        marker = metafunc.definition.get_closest_marker("max_size")
+        sizes = [size for size in SIZES if marker is None or size <= marker.args[0]]
+        metafunc.parametrize("size", sizes, ids=[f"n={size}" for size in sizes])
+
@@ -0,0 +1,137 @@
+"""
+Datasets sintéticos para os micro-benchmarks.
+
+Todos os geradores são determinísticos (seed fixa) e geram datas relativas a hoje,
+para que as janelas de 3/12/13 meses dos cálculos sempre tenham dados.
+"""
+
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from src.schemas.credit import CreditMetrics, CreditScoreResponse, StandardizedMetrics
+
+DATE_FORMAT = "%Y%m%d"
+
+
+def open_items_response(n_items: int, seed: int = 42) -> Dict:
+    """Resposta do ZBAPI_AR_ACC_GETOPENITEMS_V2 com n_items partidas"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    items = []
+
+    for i in range(n_items):
+        doc_date = now - timedelta(days=rng.randint(0, 395))
+        due_date = doc_date + timedelta(days=rng.choice([28, 30, 45, 60, 90]))
+        amount = "%.2f" % rng.uniform(100, 150000)
+        item = {
+            "DOC_NO": str(1400000000 + i),
+            "DOC_DATE": doc_date.strftime(DATE_FORMAT),
+            "FKDATE": due_date.strftime(DATE_FORMAT),
+            "AMOUNT": amount,
+            "AMOUNT_SGM": amount,
+            "CURRENCY": "BRL",
+        }
+        if rng.random() < 0.7:
+            payment_date = due_date + timedelta(days=max(0, int(rng.gauss(0, 10))))
+            if payment_date <= now:
+                item["PAYMENT_DATE"] = payment_date.strftime(DATE_FORMAT)
+        items.append(item)
+
+    return {"ZBAPI_AR_ACC_GETOPENITEMS_V2.Response": {"T_ITEMS": {"item": items}}}
+
+
+def credit_metrics(n_customers: int, seed: int = 42) -> List[CreditMetrics]:
+    rng = random.Random(seed)
+    return [
+        CreditMetrics(
+            hc=rng.randint(0, 40),
+            vc=rng.uniform(100, 20000),
+            pp=rng.uniform(0, 90),
+            in_=rng.uniform(0, 60),
+            va=rng.uniform(0, 10000),
+            se_count=rng.randint(0, 5),
+            se_value=rng.uniform(0, 20000),
+        )
+        for _ in range(n_customers)
+    ]
+
+
+def ks_clients(n_customers: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    clients = []
+    for i in range(n_customers):
+        score = rng.gauss(0, 1)
+        # Quanto menor o score, maior a chance de inadimplência
+        is_defaulted = rng.random() < 1 / (1 + math.exp(2 * score))
+        clients.append({"customer": str(i), "score": score, "is_defaulted": is_defaulted})
+    return clients
+
+
+def credit_score_response(customer: str = "0000100003") -> CreditScoreResponse:
+    metrics = CreditMetrics(hc=12, vc=4800.0, pp=32.0, in_=3.0, va=250.0, se_count=0, se_value=0)
+    return CreditScoreResponse(
+        customer=customer,
+        score=0.42,
+        probability_default=0.39,
+        confidence=0.61,
+        multiplier=2.83,
+        average_purchase_value=metrics.vc,
+        suggested_credit_limit=13584.0,
+        risk_level="MEDIUM",
+        calculation_date=datetime.now().isoformat(),
+        metrics=metrics,
+        standardized_metrics=StandardizedMetrics(
+            z_hc=-0.4, z_vc=-0.07, z_pp=0.13, z_in=-0.2, z_va=-0.17, z_se_count=-0.25, z_se_value=-0.2
+        ),
+    )
+
+
+def invoices_data(n_installments: int, installments_per_invoice: int = 4, seed: int = 42) -> Dict:
+    """Faturas e parcelas no formato retornado por risk_routes.get_invoices_data"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    faturas = []
+    parcelas = []
+
+    for i in range(max(1, n_installments // installments_per_invoice)):
+        issued = now - timedelta(days=rng.randint(0, 365))
+        faturas.append({"id": i, "dt_emissao": issued.date().isoformat(), "valor_orig": rng.uniform(1000, 50000)})
+
+        for n in range(installments_per_invoice):
+            due = issued + timedelta(days=30 * (n + 1))
+            value = round(rng.uniform(100, 12500), 2)
+            paid = rng.random() < 0.7 and due < now
+            parcelas.append(
+                {
+                    "id": i * installments_per_invoice + n,
+                    "fat_id": i,
+                    "dt_vencimento": due.date().isoformat(),
+                    "valor_parc": value,
+                    "dt_pagamento": (due + timedelta(days=rng.randint(0, 20))).date().isoformat() if paid else None,
+                    "valor_pago": value if paid else 0,
+                }
+            )
+
+    return {"faturas": faturas, "parcelas": parcelas[:n_installments]}
+
+
+def sale_orders(n_orders: int, seed: int = 42) -> List[Dict]:
+    """Pedidos no formato da tabela sale_orders usado por score_routes.process_payment_term_data"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    orders = []
+
+    for i in range(n_orders):
+        created = now - timedelta(days=rng.randint(0, 395), seconds=rng.randint(0, 86400))
+        orders.append(
+            {
+                "id": i,
+                "created_at": created.isoformat() + "Z",
+                "due_date": (created + timedelta(days=rng.choice([28, 30, 45, 60]))).isoformat() + "Z",
+                "total_amt": "%.2f" % rng.uniform(100, 50000),
+            }
+        )
+
+    return orders
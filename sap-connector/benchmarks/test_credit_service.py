@@ -0,0 +1,59 @@
+import pytest
+from benchmarks import datasets
+from src.schemas.credit import GlobalStatistics, ModelWeights
+from src.services.credit_service import (
+    build_dashboard_response,
+    calculate_ks_statistics,
+    calculate_score,
+    parse_sap_data,
+    parse_sap_data_with_historical,
+)
+
+
+def test_parse_sap_data(benchmark, size):
+    response = datasets.open_items_response(size)
+
+    result = benchmark(parse_sap_data, response)
+
+    assert result["hc"] > 0
+
+
+def test_parse_sap_data_with_historical(benchmark, size):
+    response = datasets.open_items_response(size)
+
+    result = benchmark(parse_sap_data_with_historical, response)
+
+    assert result["monthly_data"]
+
+
+def test_calculate_score(benchmark, size):
+    metrics = datasets.credit_metrics(size)
+    stats = GlobalStatistics()
+    weights = ModelWeights()
+
+    def score_all():
+        return [calculate_score(m, stats, weights) for m in metrics]
+
+    results = benchmark(score_all)
+
+    assert len(results) == size
+
+
+def test_calculate_ks_statistics(benchmark, size):
+    clients = datasets.ks_clients(size)
+
+    result = benchmark(calculate_ks_statistics, clients)
+
+    assert result.total_clients == size
+    assert result.ks_value > 0
+
+
+@pytest.mark.parametrize("with_history", [True, False], ids=["historical", "flat"])
+def test_build_dashboard_response(benchmark, with_history):
+    # Custo independe do volume de partidas: os dados já chegam agregados por mês
+    historical = parse_sap_data_with_historical(datasets.open_items_response(1000)) if with_history else None
+    credit_result = datasets.credit_score_response()
+
+    result = benchmark(build_dashboard_response, credit_result.customer, credit_result, historical)
+
+    assert len(result.payment_term_series) == 13
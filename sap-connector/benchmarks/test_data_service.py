@@ -0,0 +1,24 @@
+import pytest
+from benchmarks.bench_serialization import build_rows
+from src.services.data_service import DataService
+
+FORMATTERS = {
+    "customer": "_format_customer",
+    "sales_order": "_format_sales_order",
+    "credit_limit": "_format_credit_limit",
+}
+
+
+@pytest.mark.parametrize("include_raw", [True, False], ids=["raw", "projected"])
+@pytest.mark.parametrize("entity", list(FORMATTERS))
+def test_format(benchmark, size, entity, include_raw):
+    rows = build_rows(entity, size)
+    formatter = getattr(DataService(db=None), FORMATTERS[entity])
+
+    def format_page():
+        return [formatter(row, include_raw=include_raw) for row in rows]
+
+    page = benchmark(format_page)
+
+    assert len(page) == size
+    assert ("raw_data" in page[0]) is include_raw
@@ -0,0 +1,23 @@
+import pytest
+from benchmarks import datasets
+from src.routes.risk_routes import calculate_risk_indicators
+from src.routes.score_routes import process_payment_term_data
+
+
+# calculate_avg_payment_term cruza cada fatura com todas as parcelas (O(faturas x parcelas))
+@pytest.mark.max_size(10000)
+def test_calculate_risk_indicators(benchmark, size):
+    invoices = datasets.invoices_data(size)
+    credit_limit = {"creditLimit": 500000.0, "creditLimitUsed": 125000.0}
+
+    result = benchmark(calculate_risk_indicators, credit_limit, invoices)
+
+    assert result["avgPaymentTerm"] > 0
+
+
+def test_process_payment_term_data(benchmark, size):
+    orders = datasets.sale_orders(size)
+
+    result = benchmark(process_payment_term_data, orders)
+
+    assert len(result) == 13
@@ -0,0 +1,157 @@
+"""
+Deadline das requisições HTTP, propagado para SAP, Supabase e banco.
+
+O DeadlineMiddleware define o prazo de cada requisição a partir do header X-Request-Timeout
+(segundos) ou do padrão da rota (REQUEST_TIMEOUT / REQUEST_TIMEOUT_ROUTES) e o guarda numa
+contextvar. Cada chamada externa usa budget() para pegar só o tempo que resta, em vez do seu
+próprio timeout fixo. Se o prazo acaba antes da resposta começar, a requisição é cancelada e
+responde 504; se o cliente desconecta, o trabalho é cancelado na hora.
+
+Fora de uma requisição (workers) não há deadline e budget() devolve o timeout informado.
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_TIMEOUT_HEADER = b"x-request-timeout"
+
+# Instante (time.monotonic) em que a requisição atual expira
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(HTTPException):
+    """O prazo da requisição acabou antes de a chamada externa começar"""
+
+
+def remaining() -> Optional[float]:
+    """Segundos que restam até o deadline da requisição, ou None fora de uma requisição"""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """True se a requisição atual tem deadline e ele já passou"""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def budget(timeout: float) -> float:
+    """Timeout de uma chamada externa limitado ao que resta do deadline; 504 se já expirou"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(status_code=504, detail="Request deadline exceeded")
+    return min(timeout, left)
+
+
+def parse_route_timeouts(value: str) -> Dict[str, float]:
+    """Converte "/credit/batch:600,/sap/:120" em {prefixo: segundos}"""
+    timeouts = {}
+    for item in value.split(","):
+        prefix, _, seconds = item.strip().rpartition(":")
+        if prefix and seconds:
+            timeouts[prefix] = float(seconds)
+    return timeouts
+
+
+class DeadlineMiddleware:
+    """
+    Middleware ASGI que aplica o deadline da requisição e cancela o processamento quando o
+    cliente desconecta antes da resposta.
+
+    Depois que a resposta começou (ex.: pass-through em streaming) o deadline deixa de ser
+    imposto aqui; o StreamingResponse já interrompe o envio quando o cliente desconecta.
+    """
+
+    def __init__(self, app: ASGIApp, default_timeout: float, max_timeout: float, route_timeouts: Dict[str, float]):
+        self.app = app
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        # Prefixos mais longos primeiro, para a regra mais específica vencer
+        self.route_timeouts = sorted(route_timeouts.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _timeout_for(self, scope: Scope) -> float:
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_TIMEOUT_HEADER:
+                try:
+                    return min(max(float(value), 0.0), self.max_timeout)
+                except ValueError:
+                    break
+
+        path = scope.get("path", "")
+        for prefix, timeout in self.route_timeouts:
+            if path.startswith(prefix):
+                return timeout
+        return self.default_timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self._timeout_for(scope)
+        token = request_deadline.set(time.monotonic() + timeout)
+        response_started = False
+        disconnected = False
+        messages: "asyncio.Queue[Message]" = asyncio.Queue()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        # A app criada depois do set herda o deadline na cópia do contexto
+        app_task = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+
+        async def listen_for_disconnect() -> None:
+            # Único leitor do receive original: repassa as mensagens para a app e percebe a desconexão
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_started and not app_task.done():
+                        disconnected = True
+                        app_task.cancel()
+                    return
+
+        listener = asyncio.create_task(listen_for_disconnect())
+        try:
+            done, _ = await asyncio.wait({app_task}, timeout=timeout)
+            if not done and not response_started:
+                app_task.cancel()
+                await asyncio.gather(app_task, return_exceptions=True)
+                await self._send_timeout(send)
+                return
+
+            await asyncio.wait({app_task})
+            if app_task.cancelled() and disconnected:
+                # Cliente foi embora: não há para quem responder
+                return
+            app_task.result()
+        finally:
+            listener.cancel()
+            if not app_task.done():
+                app_task.cancel()
+            request_deadline.reset(token)
+
+    @staticmethod
+    async def _send_timeout(send: Send) -> None:
+        body = b'{"detail":"Request deadline exceeded"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 504,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+from typing import Iterable, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele apenas gzip é oferecido
+    brotli = None
+
+
+def _accepted_encodings(accept_encoding: str) -> List[str]:
+    accepted = []
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q=") and quality[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if token:
+            accepted.append(token.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match: Optional[str], etag_hash: str) -> bool:
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # Ignora o prefixo W/ e o sufixo da codificação: o conteúdo é o mesmo em gzip, br ou identity
+        candidate = candidate.removeprefix("W/").strip('"')
+        if candidate.split("-", 1)[0] == etag_hash:
+            return True
+
+    return False
+
+
+class CompressionETagMiddleware:
+    """
+    Middleware ASGI para os endpoints de leitura pesados.
+
+    Para requisições GET nos caminhos configurados, calcula um ETag forte a partir do hash
+    do corpo da resposta, responde 304 quando o If-None-Match coincide (sem enviar o corpo)
+    e comprime com brotli ou gzip as respostas acima de minimum_size.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.paths = tuple(paths)
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        start_message: Optional[Message] = None
+        body_parts: List[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await self._send_response(start_message, b"".join(body_parts), request_headers, send)
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_response(self, start_message: Message, body: bytes, request_headers: Headers, send: Send):
+        headers = MutableHeaders(raw=start_message["headers"])
+
+        if start_message["status"] != 200 or "content-encoding" in headers:
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+        encoding = self._choose_encoding(request_headers) if len(body) >= self.minimum_size else None
+        etag = f'"{etag_hash}-{encoding}"' if encoding else f'"{etag_hash}"'
+
+        headers["ETag"] = etag
+        headers.add_vary_header("Accept-Encoding")
+        if "cache-control" not in headers:
+            # Dados por usuário: o navegador pode guardar, mas sempre revalida com o If-None-Match
+            headers["Cache-Control"] = "private, no-cache"
+
+        if _etag_matches(request_headers.get("if-none-match"), etag_hash):
+            not_modified = MutableHeaders()
+            for name in ("etag", "cache-control", "vary"):
+                not_modified[name] = headers[name]
+            await send({"type": "http.response.start", "status": 304, "headers": not_modified.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding == "br":
+            body = brotli.compress(body, quality=self.brotli_quality)
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=self.gzip_level)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(body))
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
+
+    def _choose_encoding(self, request_headers: Headers) -> Optional[str]:
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
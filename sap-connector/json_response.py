@@ -0,0 +1,38 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def orjson_default(obj: Any) -> Any:
+    """Serializa os tipos que o orjson não trata nativamente (datetime, UUID e dataclass já são nativos)"""
+    if isinstance(obj, Decimal):
+        # NaN e Infinity não existem em JSON: viram null, como o orjson faz com float('nan')
+        if not obj.is_finite():
+            return None
+        # Mesmo comportamento do jsonable_encoder: inteiro quando não há casas decimais
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serializado com orjson, usado como response class padrão da aplicação"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
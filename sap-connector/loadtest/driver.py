@@ -0,0 +1,195 @@
+"""
+Driver de carga assíncrono que simula analistas de crédito usando o dashboard.
+
+Cada analista virtual faz login, escolhe clientes do seu grupo corporativo e abre o
+dashboard do cliente, que dispara em paralelo (como o frontend) risk-summary,
+payment-term-score, dashboard de crédito, histórico de workflow e notificações.
+Entre uma abertura e outra há um tempo de leitura (exponencial, média --think-time).
+
+Ao final, imprime por cenário: requisições, erros, throughput e percentis de latência.
+
+Uso (stack local com SAP e PostgREST simulados, ver loadtest/docker-compose.loadtest.yml):
+    python -m loadtest.driver --base-url http://localhost:8000 --users 25 --duration 120 --ramp-up 30
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from loadtest.fixtures import CORPORATE_GROUP_ID
+
+# Usuários de auth_routes.MOCK_USERS
+CREDENTIALS = [
+    ("admin@example.com", "admin123"),
+    ("user@example.com", "user123"),
+    ("teste@teste.com", "teste123"),
+]
+
+# Uma linha de log por requisição do httpx distorceria o próprio driver
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    def record(self, scenario: str, elapsed: float, error: Optional[str] = None):
+        self.latencies[scenario].append(elapsed)
+        if error:
+            self.errors[scenario][error] += 1
+
+    def report(self) -> Dict[str, dict]:
+        duration = (self.finished_at or time.perf_counter()) - self.started_at
+        report = {}
+        for scenario, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            errors = sum(self.errors[scenario].values())
+            report[scenario] = {
+                "requests": len(ordered),
+                "errors": errors,
+                "error_rate": errors / len(ordered),
+                "throughput_rps": len(ordered) / duration,
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p90_ms": _percentile(ordered, 90) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "p99_ms": _percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "error_breakdown": dict(self.errors[scenario]),
+            }
+        return report
+
+
+def _percentile(ordered: List[float], percentile: float) -> float:
+    # Nearest-rank: sem interpolação, o p99 de poucas amostras é a própria amostra
+    rank = max(1, -(-len(ordered) * percentile // 100))
+    return ordered[int(rank) - 1]
+
+
+async def timed_request(
+    client: httpx.AsyncClient, stats: Stats, scenario: str, method: str, url: str, **kwargs
+) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        # O corpo é lido por completo para medir a resposta inteira, não só os headers
+        await response.aread()
+    except httpx.HTTPError as e:
+        stats.record(scenario, time.perf_counter() - start, type(e).__name__)
+        return None
+
+    error = f"HTTP {response.status_code}" if response.status_code >= 400 else None
+    stats.record(scenario, time.perf_counter() - start, error)
+    return response if error is None else None
+
+
+async def analyst(user_number: int, args, stats: Stats, deadline: float):
+    rng = random.Random(args.seed + user_number)
+    email, password = CREDENTIALS[user_number % len(CREDENTIALS)]
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        response = await timed_request(
+            client, stats, "login", "POST", "/auth/login", json={"email": email, "password": password}
+        )
+        if response is None:
+            return
+
+        session = response.json()
+        user_id = session["user"]["id"]
+        client.headers["Authorization"] = f"Bearer {session['access_token']}"
+
+        response = await timed_request(
+            client, stats, "user_company", "GET", f"/api/business-analysis/user-company/{user_id}"
+        )
+        company_id = (response.json().get("data") if response is not None else None) or 1
+
+        response = await timed_request(
+            client, stats, "customer_pick", "GET", f"/api/customer/by-company-group/{company_id}"
+        )
+        customers = response.json().get("data", []) if response is not None else []
+        if not customers:
+            return
+
+        while time.perf_counter() < deadline:
+            customer = rng.choice(customers)
+            requests = {
+                "risk_summary": (
+                    "/risk/risk-summary",
+                    {"customer_id": customer["id"], "corporate_group_id": CORPORATE_GROUP_ID},
+                ),
+                "payment_term_score": ("/score/payment-term-score", {"customer_id": customer["id"]}),
+                "credit_dashboard": (f"/credit/dashboard/{customer['company_code']}", {}),
+                "workflow_history": (f"/api/workflow/history/{customer['id']}", {}),
+                "notifications": (f"/api/notifications/{user_id}", {}),
+            }
+
+            # O frontend dispara as chamadas do dashboard em paralelo
+            page_start = time.perf_counter()
+            results = await asyncio.gather(
+                *[
+                    timed_request(client, stats, scenario, "GET", path, params=params)
+                    for scenario, (path, params) in requests.items()
+                ]
+            )
+            failed = sum(result is None for result in results)
+            stats.record("dashboard_page", time.perf_counter() - page_start, f"{failed} failed" if failed else None)
+
+            await asyncio.sleep(rng.expovariate(1 / args.think_time) if args.think_time > 0 else 0)
+
+
+async def run(args) -> Stats:
+    stats = Stats()
+    deadline = time.perf_counter() + args.ramp_up + args.duration
+    tasks = []
+
+    for user_number in range(args.users):
+        tasks.append(asyncio.create_task(analyst(user_number, args, stats, deadline)))
+        if args.ramp_up:
+            await asyncio.sleep(args.ramp_up / args.users)
+
+    await asyncio.gather(*tasks)
+    stats.finished_at = time.perf_counter()
+    return stats
+
+
+def print_report(report: Dict[str, dict]):
+    print(
+        f"{'scenario':<20}{'requests':>9}{'errors':>8}{'err %':>7}{'req/s':>8}"
+        f"{'p50 ms':>9}{'p90 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    )
+    for scenario, row in report.items():
+        print(
+            f"{scenario:<20}{row['requests']:>9}{row['errors']:>8}{row['error_rate'] * 100:>7.1f}"
+            f"{row['throughput_rps']:>8.1f}{row['p50_ms']:>9.0f}{row['p90_ms']:>9.0f}"
+            f"{row['p95_ms']:>9.0f}{row['p99_ms']:>9.0f}{row['max_ms']:>9.0f}"
+        )
+        for error, count in row["error_breakdown"].items():
+            print(f"  {error}: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10, help="analistas simultâneos")
+    parser.add_argument("--duration", type=float, default=60, help="segundos de carga após o ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10, help="segundos para iniciar todos os analistas")
+    parser.add_argument("--think-time", type=float, default=5, help="média do tempo entre dashboards (s)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report-json", help="grava o relatório em JSON neste arquivo")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args)).report()
+    print_report(report)
+
+    if args.report_json:
+        with open(args.report_json, "w") as f:
+            json.dump({"config": vars(args), "scenarios": report}, f, indent=2)
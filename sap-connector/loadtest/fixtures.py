@@ -0,0 +1,145 @@
+"""
+Dados sintéticos das tabelas do Supabase usados pelo stub do PostgREST.
+
+Os códigos SAP dos clientes (customer.company_code) seguem a mesma numeração do
+sap_mock_server, para que o dashboard de crédito encontre as partidas do cliente.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sap_mock_server import customer_code
+
+CORPORATE_GROUP_ID = 1
+COMPANY_IDS = [1, 2, 3]
+ROLES = [
+    {"id": 1, "name": "analista", "description": "Analista de crédito"},
+    {"id": 2, "name": "coordenador", "description": "Coordenador de crédito"},
+    {"id": 3, "name": "diretor", "description": "Diretoria financeira"},
+]
+# Os mesmos ids dos usuários mockados em auth_routes.MOCK_USERS
+ANALYSTS = [
+    {"id": 1, "logged_id": "mock-user-1", "name": "Admin User", "role_id": 1, "company_id": 1},
+    {"id": 2, "logged_id": "mock-user-2", "name": "Regular User", "role_id": 1, "company_id": 1},
+    {"id": 3, "logged_id": "mock-user-3", "name": "Teste User", "role_id": 2, "company_id": 2},
+]
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat(timespec="seconds")
+
+
+def build_tables(customers: int, items_per_customer: int, seed: int = 42) -> Dict[str, List[dict]]:
+    rng = random.Random(seed)
+    now = datetime.now()
+
+    tables: Dict[str, List[dict]] = {
+        "company": [
+            {"id": company_id, "name": f"Empresa {company_id}", "corporate_group_id": CORPORATE_GROUP_ID}
+            for company_id in COMPANY_IDS
+        ],
+        "user_role": list(ROLES),
+        "user_profile": list(ANALYSTS),
+        "customer": [],
+        "credit_limit_amount": [],
+        "faturas": [],
+        "parcelas_fat": [],
+        "sale_orders": [],
+        "credit_limit_request": [],
+        "workflow_sale_order": [],
+        "workflow_details": [],
+    }
+
+    for index in range(customers):
+        customer_id = index + 1
+        company_id = COMPANY_IDS[index % len(COMPANY_IDS)]
+        credit_limit = round(rng.uniform(50000, 2000000), 2)
+
+        tables["customer"].append(
+            {
+                "id": customer_id,
+                "name": f"Cliente {index} Ltda",
+                "company_code": customer_code(index),
+                "company_id": company_id,
+                "credit_limits_id": customer_id,
+            }
+        )
+        tables["credit_limit_amount"].append(
+            {
+                "id": customer_id,
+                "credit_limit": credit_limit,
+                "credit_limit_used": round(credit_limit * rng.uniform(0, 0.9), 2),
+            }
+        )
+
+        for position in range(items_per_customer):
+            invoice_id = customer_id * 10000 + position
+            issued = now - timedelta(days=rng.randint(0, 365))
+            value = round(rng.uniform(1000, 80000), 2)
+            tables["faturas"].append(
+                {
+                    "id": invoice_id,
+                    "dt_emissao": issued.date().isoformat(),
+                    "dt_vencimento": (issued + timedelta(days=60)).date().isoformat(),
+                    "valor_orig": value,
+                    "customer_id": customer_id,
+                    "company_id": company_id,
+                }
+            )
+            for installment in range(2):
+                due = issued + timedelta(days=30 * (installment + 1))
+                paid = due < now and rng.random() < 0.8
+                tables["parcelas_fat"].append(
+                    {
+                        "id": invoice_id * 10 + installment,
+                        "fat_id": invoice_id,
+                        "dt_vencimento": due.date().isoformat(),
+                        "valor_parc": round(value / 2, 2),
+                        "dt_pagamento": (due + timedelta(days=rng.randint(0, 15))).date().isoformat() if paid else None,
+                        "valor_pago": round(value / 2, 2) if paid else 0,
+                    }
+                )
+
+            created = now - timedelta(days=rng.randint(0, 390), seconds=rng.randint(0, 86400))
+            tables["sale_orders"].append(
+                {
+                    "id": invoice_id,
+                    "created_at": _iso(created),
+                    "due_date": _iso(created + timedelta(days=rng.choice([28, 30, 45, 60]))),
+                    "customer_id": customer_id,
+                    "company_id": company_id,
+                    "total_amt": round(rng.uniform(500, 50000), 2),
+                }
+            )
+
+        # Algumas solicitações de limite por cliente, cada uma com um workflow de 3 etapas
+        for request_number in range(rng.randint(0, 3)):
+            request_id = customer_id * 10 + request_number
+            tables["credit_limit_request"].append(
+                {
+                    "id": request_id,
+                    "created_at": _iso(now - timedelta(days=rng.randint(0, 180))),
+                    "credit_limit_amt": round(credit_limit * rng.uniform(1.1, 2), 2),
+                    "customer_id": customer_id,
+                    "status_id": rng.choice([1, 2, 3]),
+                }
+            )
+            tables["workflow_sale_order"].append({"id": request_id, "credit_limit_req_id": request_id})
+
+            pending = rng.randint(0, 3)
+            for step, role in enumerate(ROLES, start=1):
+                approved = step <= pending
+                tables["workflow_details"].append(
+                    {
+                        "id": request_id * 10 + step,
+                        "workflow_sale_order_id": request_id,
+                        "workflow_step": step,
+                        "jurisdiction_id": role["id"],
+                        "approval": True if approved else None,
+                        "approver": ANALYSTS[step - 1]["logged_id"] if approved else None,
+                        "notes": "",
+                    }
+                )
+
+    return tables
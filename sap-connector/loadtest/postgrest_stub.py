@@ -0,0 +1,216 @@
+"""
+Stub do PostgREST (Supabase /rest/v1) para os testes de carga.
+
+Serve, em memória, as tabelas lidas pelos fluxos do dashboard (cliente, faturas, pedidos,
+workflow e notificações) com dados sintéticos determinísticos. Entende o subconjunto da
+sintaxe do PostgREST que o supabase-py gera nessas rotas:
+
+- select com colunas, * e recursos embutidos (alias:tabela!inner (colunas))
+- filtros eq, neq, gt, gte, lt, lte, in, is
+- order=col.asc|desc, limit, offset
+- Accept: application/vnd.pgrst.object+json (.single())
+
+Uso:
+    POSTGREST_STUB_CUSTOMERS=200 python -m loadtest.postgrest_stub
+
+    SUPABASE_URL=http://localhost:8082 SUPABASE_SERVICE_KEY=stub.stub.stub python server.py
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from json_response import ORJSONResponse
+from loadtest import fixtures
+
+SINGLE_OBJECT_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+
+# (tabela, tabela embutida) -> (coluna local, coluna remota); todas as relações usadas são N:1
+RELATIONSHIPS: Dict[Tuple[str, str], Tuple[str, str]] = {
+    ("workflow_details", "user_role"): ("jurisdiction_id", "id"),
+    ("workflow_details", "workflow_sale_order"): ("workflow_sale_order_id", "id"),
+    ("workflow_sale_order", "credit_limit_request"): ("credit_limit_req_id", "id"),
+    ("customer", "company"): ("company_id", "id"),
+}
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_select(select: str) -> List[Any]:
+    """Converte o parâmetro select em colunas (str) e embeds (alias, tabela, inner, sub-select)"""
+    fields = []
+    for part in _split_top_level(" ".join(select.split())):
+        if "(" not in part:
+            fields.append(part)
+            continue
+
+        head, _, body = part.partition("(")
+        alias, _, table = head.strip().rpartition(":")
+        table, _, hint = table.strip().partition("!")
+        fields.append((alias or table, table, hint == "inner", parse_select(body.rstrip().removesuffix(")"))))
+    return fields
+
+
+def _coerce(value: str, sample: Any) -> Any:
+    if isinstance(sample, bool):
+        return value == "true"
+    if isinstance(sample, int):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    if isinstance(sample, float):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(operator: str, value: str) -> Callable[[Any], bool]:
+    if operator == "is":
+        expected = {"null": None, "true": True, "false": False}[value]
+        return lambda actual: actual is expected
+    if operator == "in":
+        options = [option.strip().strip('"') for option in value.strip("()").split(",")]
+        return lambda actual: actual is not None and str(actual) in options
+
+    def check(actual: Any) -> bool:
+        if actual is None:
+            return False
+        expected = _coerce(value, actual)
+        if operator == "eq":
+            return actual == expected
+        if operator == "neq":
+            return actual != expected
+        if operator == "gt":
+            return actual > expected
+        if operator == "gte":
+            return actual >= expected
+        if operator == "lt":
+            return actual < expected
+        if operator == "lte":
+            return actual <= expected
+        raise HTTPException(status_code=400, detail=f"Unsupported operator: {operator}")
+
+    return check
+
+
+class PostgrestStub:
+    def __init__(self, tables: Dict[str, List[dict]]):
+        self.tables = tables
+        self.indexes: Dict[Tuple[str, str], Dict[Any, List[dict]]] = {}
+
+    def _lookup(self, table: str, column: str, value: Any) -> List[dict]:
+        # Índice por (tabela, coluna) construído sob demanda, para os embeds não virarem O(n²)
+        index = self.indexes.get((table, column))
+        if index is None:
+            index = {}
+            for row in self.tables.get(table, []):
+                index.setdefault(row.get(column), []).append(row)
+            self.indexes[(table, column)] = index
+        return index.get(value, [])
+
+    def project(self, table: str, row: dict, fields: List[Any]) -> Optional[dict]:
+        result = {}
+        for field in fields:
+            if isinstance(field, str):
+                if field == "*":
+                    result.update(row)
+                else:
+                    alias, _, column = field.rpartition(":")
+                    result[alias or column] = row.get(column)
+                continue
+
+            alias, embedded, inner, sub_fields = field
+            local, remote = RELATIONSHIPS.get((table, embedded), (f"{embedded}_id", "id"))
+            matches = self._lookup(embedded, remote, row.get(local))
+            value = self.project(embedded, matches[0], sub_fields) if matches else None
+            if value is None and inner:
+                return None
+            result[alias] = value
+        return result
+
+    def query(self, table: str, params: List[Tuple[str, str]]) -> List[dict]:
+        if table not in self.tables:
+            raise HTTPException(status_code=404, detail=f"relation {table} does not exist")
+
+        select, order, limit, offset = "*", None, None, 0
+        rows = self.tables[table]
+        filters = []
+        for key, value in params:
+            if key == "select":
+                select = value
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            else:
+                operator, _, operand = value.partition(".")
+                filters.append((key, _compare(operator, operand)))
+                if operator == "eq" and rows is self.tables[table]:
+                    # Usa o índice da coluna no primeiro eq; os demais filtros rodam sobre o subconjunto
+                    rows = self._lookup(table, key, operand)
+                    if not rows and operand.lstrip("-").isdigit():
+                        rows = self._lookup(table, key, int(operand))
+
+        rows = [row for row in rows if all(check(row.get(column)) for column, check in filters)]
+
+        for clause in reversed(order.split(",") if order else []):
+            column, _, direction = clause.partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+
+        rows = rows[offset : offset + limit if limit is not None else None]
+        fields = parse_select(select)
+        projected = (self.project(table, row, fields) for row in rows)
+        return [row for row in projected if row is not None]
+
+
+def create_app(stub: PostgrestStub) -> FastAPI:
+    app = FastAPI(title="PostgREST Stub", default_response_class=ORJSONResponse)
+
+    @app.get("/rest/v1/{table}")
+    async def read_table(table: str, request: Request):
+        rows = stub.query(table, list(request.query_params.multi_items()))
+
+        if SINGLE_OBJECT_MEDIA_TYPE in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                raise HTTPException(status_code=406, detail="JSON object requested, multiple (or no) rows returned")
+            return rows[0]
+        return rows
+
+    @app.get("/health/live")
+    async def liveness_probe():
+        return {"status": "alive"}
+
+    return app
+
+
+app = create_app(
+    PostgrestStub(
+        fixtures.build_tables(
+            customers=int(os.getenv("POSTGREST_STUB_CUSTOMERS", "200")),
+            items_per_customer=int(os.getenv("POSTGREST_STUB_ITEMS_PER_CUSTOMER", "40")),
+            seed=int(os.getenv("POSTGREST_STUB_SEED", "42")),
+        )
+    )
+)
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("POSTGREST_STUB_PORT", "8082")))
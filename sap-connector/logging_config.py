@@ -0,0 +1,179 @@
+"""
+Pipeline de logging da API e dos workers.
+
+- Os registros vão para uma fila (QueueHandler) e são formatados e escritos por uma thread
+  separada (QueueListener); o event loop nunca espera I/O de stderr.
+- A mensagem só é formatada na thread do listener: use logger.info("... %s", valor) em vez de
+  f-strings nos caminhos quentes.
+- Com LOG_JSON, cada registro vira uma linha JSON com os campos passados em extra=..., o
+  request_id da requisição atual e os campos sensíveis (LOG_REDACT_KEYS) mascarados.
+- Logs verbosos de payload do SAP são amostrados por RFC (LOG_SAP_PAYLOAD_SAMPLE_RATE /
+  LOG_SAP_PAYLOAD_SAMPLE_RATES); LOG_TRACE_CUSTOMER e LOG_TRACE_REQUEST_ID ligam o rastreio
+  completo para um único cliente ou requisição.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import orjson
+from config import (
+    LOG_DATE_FORMAT,
+    LOG_FORMAT,
+    LOG_JSON,
+    LOG_LEVEL,
+    LOG_REDACT_KEYS,
+    LOG_SAP_PAYLOAD_SAMPLE_RATE,
+    LOG_SAP_PAYLOAD_SAMPLE_RATES,
+    LOG_TRACE_CUSTOMER,
+    LOG_TRACE_REQUEST_ID,
+)
+from json_response import ORJSON_OPTIONS, orjson_default
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_HEADER = b"x-request-id"
+REDACTED = "***"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos de todo LogRecord; o que sobra veio de extra=...
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None)))
+_RECORD_ATTRIBUTES |= {"message", "asctime", "taskName", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def redact(value: Any) -> Any:
+    """Cópia de dicts/listas com os valores das chaves sensíveis mascarados"""
+    if isinstance(value, dict):
+        return {key: REDACTED if str(key).lower() in LOG_REDACT_KEYS else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def _log_default(obj: Any) -> Any:
+    """Como o da API, mas um tipo desconhecido em extra=... vira str(obj) em vez de perder o registro"""
+    try:
+        return orjson_default(obj)
+    except Exception:
+        return str(obj)
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = redact(value)
+
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        try:
+            return orjson.dumps(entry, default=_log_default, option=ORJSON_OPTIONS).decode()
+        except orjson.JSONEncodeError:
+            # O que nem o default resolve (ex.: inteiro acima de 64 bits)
+            return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Guarda o request_id da requisição (contextvar) antes de mudar de thread; a formatação da
+        # mensagem fica para o listener
+        record.request_id = request_id_var.get()
+        return record
+
+
+def setup_logging():
+    """Configura o logger raiz com fila + listener; pode ser chamada mais de uma vez"""
+    global _listener
+
+    formatter = JSONFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_ContextQueueHandler(log_queue))
+    root.setLevel(getattr(logging, LOG_LEVEL.upper()))
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+# Esvazia a fila ao sair, para não perder as últimas linhas
+atexit.register(_stop_listener)
+
+
+def _mentions_customer(value: Any, customer: str) -> bool:
+    if isinstance(value, dict):
+        return any(_mentions_customer(item, customer) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_mentions_customer(item, customer) for item in value)
+    return isinstance(value, (str, int)) and str(value).lstrip("0") == customer
+
+
+def should_log_sap_payload(endpoint: str, payload: Any) -> bool:
+    """Decide se a chamada ao SAP terá o log verboso (payload, headers e corpo da resposta)"""
+    if LOG_TRACE_REQUEST_ID and request_id_var.get() == LOG_TRACE_REQUEST_ID:
+        return True
+    if LOG_TRACE_CUSTOMER and _mentions_customer(payload, LOG_TRACE_CUSTOMER.lstrip("0")):
+        return True
+
+    rate = LOG_SAP_PAYLOAD_SAMPLE_RATES.get(endpoint, LOG_SAP_PAYLOAD_SAMPLE_RATE)
+    return rate > 0 and random.random() < rate
+
+
+class RequestContextMiddleware:
+    """Middleware ASGI que define o request_id (header X-Request-ID ou gerado) e o devolve na resposta"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -1,15 +1,29 @@
 import time
-from functools import wraps
-from typing import Callable
+from typing import Optional
 
-from fastapi import Request
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Buckets ajustados para rotas que dependem do SAP CPI (timeout de 90s)
+REQUEST_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120)
+PAYLOAD_SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 500_000, 1_000_000, 5_000_000, 20_000_000, 50_000_000)
+
+# Rótulo usado quando nenhuma rota casa com o caminho, para não criar uma série por URL
+UNMATCHED_ROUTE = "<unmatched>"
 
 # Métricas para tempo de requisição das rotas
 REQUEST_DURATION = Histogram(
     "http_request_duration_seconds",
     "HTTP request duration in seconds",
     ["method", "endpoint", "status"],
+    buckets=REQUEST_LATENCY_BUCKETS,
 )
 
 # Métricas para contadores de requisições
@@ -19,6 +33,26 @@ REQUEST_COUNT = Counter(
     ["method", "endpoint", "status"],
 )
 
+REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size in bytes",
+    ["method", "endpoint"],
+    buckets=PAYLOAD_SIZE_BUCKETS,
+)
+
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes",
+    ["method", "endpoint"],
+    buckets=PAYLOAD_SIZE_BUCKETS,
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Number of HTTP requests currently being processed",
+    ["method"],
+)
+
 # Métricas específicas do SAP
 SAP_TOKEN_RENEW_COUNT = Counter("sap_connector_token_renew", "Number of times SAP token was renewed")
 
@@ -28,6 +62,178 @@ SAP_REQUESTS_COUNT = Counter(
     ["endpoint", "status", "auth_method"],
 )
 
+SAP_REQUEST_DURATION = Histogram(
+    "sap_connector_request_duration_seconds",
+    "SAP CPI call duration in seconds, split by phase (csrf fetch / post)",
+    ["endpoint", "phase"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+
+SAP_RESPONSE_SIZE = Histogram(
+    "sap_connector_response_size_bytes",
+    "SAP CPI response body size in bytes",
+    ["endpoint"],
+    buckets=PAYLOAD_SIZE_BUCKETS,
+)
+
+SAP_RESPONSE_ITEMS = Histogram(
+    "sap_connector_response_items",
+    "Number of table items returned by each SAP RFC",
+    ["endpoint"],
+    buckets=(0, 1, 10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000),
+)
+
+SAP_REQUESTS_IN_PROGRESS = Gauge(
+    "sap_connector_requests_in_progress",
+    "Number of SAP CPI calls currently in flight",
+    ["endpoint"],
+)
+
+SAP_CIRCUIT_STATE = Gauge(
+    "sap_connector_circuit_state",
+    "SAP circuit breaker state per RFC (0 = closed, 1 = half-open, 2 = open)",
+    ["endpoint"],
+)
+
+SAP_CIRCUIT_REJECTED = Counter(
+    "sap_connector_circuit_rejected",
+    "SAP calls rejected without reaching CPI because the circuit breaker was open",
+    ["endpoint"],
+)
+
+SAP_RETRIES = Counter(
+    "sap_connector_retries",
+    "SAP call retries after transient failures",
+    ["endpoint", "reason"],
+)
+
+SAP_HEDGED_REQUESTS = Counter(
+    "sap_connector_hedged_requests",
+    "Hedged SAP calls fired after the latency quantile delay (outcome fired/won)",
+    ["endpoint", "outcome"],
+)
+
+SAP_COALESCED_REQUESTS = Counter(
+    "sap_connector_coalesced_requests",
+    "Read SAP calls by single-flight role: leader goes to CPI, follower shares an in-flight call",
+    ["endpoint", "role"],
+)
+
+SAP_CONCURRENCY_LIMIT = Gauge(
+    "sap_connector_concurrency_limit",
+    "Current adaptive concurrency limit per SAP RFC",
+    ["endpoint"],
+)
+
+SAP_QUEUE_LENGTH = Gauge(
+    "sap_connector_queue_length",
+    "SAP calls waiting for a concurrency slot",
+    ["endpoint"],
+)
+
+SAP_QUEUE_WAIT = Histogram(
+    "sap_connector_queue_wait_seconds",
+    "Time SAP calls waited for a concurrency slot, per priority lane",
+    ["endpoint", "priority"],
+    buckets=(0, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+SAP_SHED_REQUESTS = Counter(
+    "sap_connector_shed_requests",
+    "SAP calls rejected with 503 by the concurrency limiter (queue_full / queue_timeout / evicted)",
+    ["endpoint", "priority", "reason"],
+)
+
+# Métricas do scheduler dos workers
+WORKER_NEXT_RUN = Gauge(
+    "sap_connector_worker_next_run_timestamp_seconds",
+    "Unix timestamp of the next scheduled run of each worker job",
+    ["job"],
+)
+
+WORKER_LAST_DURATION = Gauge(
+    "sap_connector_worker_last_duration_seconds",
+    "Duration of the last finished run of each worker job",
+    ["job"],
+)
+
+WORKER_LAST_SUCCESS = Gauge(
+    "sap_connector_worker_last_success_timestamp_seconds",
+    "Unix timestamp of the last successful run of each worker job",
+    ["job"],
+)
+
+WORKER_RUNS = Counter(
+    "sap_connector_worker_runs",
+    "Worker job runs by outcome (success / failed / skipped_running / skipped_locked / lease_error)",
+    ["job", "status"],
+)
+
+# Métricas das execuções de sync, expostas pelo processo dos workers e lidas pelo GET /sync/progress
+SYNC_RUNNING = Gauge(
+    "sap_connector_sync_running",
+    "Sync runs in progress in this process",
+    ["sync_type"],
+)
+
+SYNC_RECORDS_PROCESSED = Counter(
+    "sap_connector_sync_records_processed",
+    "Records processed by sync runs",
+    ["sync_type"],
+)
+
+SYNC_ITEMS_FETCHED = Counter(
+    "sap_connector_sync_items_fetched",
+    "SAP rows fetched by syncs that process one customer at a time (e.g. sales orders)",
+    ["sync_type"],
+)
+
+SYNC_RECORDS_RATE = Gauge(
+    "sap_connector_sync_records_per_second",
+    "Records processed per second since the previous progress report of the running sync",
+    ["sync_type"],
+)
+
+SYNC_LAST_PROGRESS = Gauge(
+    "sap_connector_sync_last_progress_timestamp_seconds",
+    "Unix timestamp of the last committed batch of the running sync",
+    ["sync_type"],
+)
+
+SYNC_LAST_SUCCESS = Gauge(
+    "sap_connector_sync_last_success_timestamp_seconds",
+    "Unix timestamp of the last full sync that completed",
+    ["sync_type"],
+)
+
+SYNC_SAP_FETCH_DURATION = Histogram(
+    "sap_connector_sync_sap_fetch_duration_seconds",
+    "Time to fetch one customer from SAP during a sync",
+    ["sync_type"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+
+SYNC_DB_WRITE_DURATION = Histogram(
+    "sap_connector_sync_db_write_duration_seconds",
+    "Time to compare hashes and write one batch of sync records",
+    ["sync_type"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+SYNC_QUEUE_DEPTH = Gauge(
+    "sap_connector_sync_queue_depth",
+    "Work waiting in each sync queue (pending_customers / write_buffer / sync_jobs)",
+    ["sync_type", "queue"],
+)
+
+MODEL_STATISTICS_SAMPLE_SIZE = Gauge(
+    "sap_connector_model_statistics_sample_size",
+    "Customers read by the last model statistics run (a new version needs MODEL_STATISTICS_MIN_SAMPLES)",
+)
+
+# Valores do gauge de estado do circuit breaker
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
 
 def get_metrics():
     """Retorna as métricas no formato do Prometheus"""
@@ -39,52 +245,62 @@ def get_metrics_content_type():
     return CONTENT_TYPE_LATEST
 
 
-def monitor_request_duration():
-    """Middleware para monitorar duração das requisições"""
+class PrometheusMiddleware:
+    """
+    Middleware ASGI que registra duração, contagem e tamanhos de todas as requisições HTTP.
 
-    def decorator(func: Callable):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            start_time = time.time()
+    As métricas são rotuladas pelo template da rota (ex.: /credit/dashboard/{customer}),
+    obtido do scope depois do roteamento, e não pelo caminho da URL.
+    """
 
-            try:
-                # Extrair informações da requisição
-                request = None
-                for arg in args:
-                    if isinstance(arg, Request):
-                        request = arg
-                        break
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-                method = request.method if request else "UNKNOWN"
-                endpoint = request.url.path if request else "UNKNOWN"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-                # Executar a função
-                response = await func(*args, **kwargs)
+        method = scope["method"]
+        status_code = 500
+        request_size = 0
+        response_size = 0
 
-                # Calcular duração
-                duration = time.time() - start_time
+        async def receive_wrapper() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
 
-                # Registrar métricas
-                status = getattr(response, "status_code", 200)
-                REQUEST_DURATION.labels(method=method, endpoint=endpoint, status=status).observe(duration)
-                REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status).inc()
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
 
-                return response
+        REQUESTS_IN_PROGRESS.labels(method=method).inc()
+        start_time = time.perf_counter()
 
-            except Exception as e:
-                # Em caso de erro, registrar com status 500
-                duration = time.time() - start_time
-                method = "UNKNOWN"
-                endpoint = "UNKNOWN"
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            REQUESTS_IN_PROGRESS.labels(method=method).dec()
 
-                REQUEST_DURATION.labels(method=method, endpoint=endpoint, status=500).observe(duration)
-                REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=500).inc()
+            endpoint = get_route_template(scope)
+            REQUEST_DURATION.labels(method=method, endpoint=endpoint, status=status_code).observe(duration)
+            REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status_code).inc()
+            REQUEST_SIZE.labels(method=method, endpoint=endpoint).observe(request_size)
+            RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe(response_size)
 
-                raise e
 
-        return wrapper
-
-    return decorator
+def get_route_template(scope: Scope) -> str:
+    """Retorna o template da rota que atendeu a requisição (preenchido pelo roteador no scope)"""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
 
 
 def increment_sap_token_renew():
@@ -95,3 +311,127 @@ def increment_sap_token_renew():
 def increment_sap_request(endpoint: str, status: str, auth_method: str):
     """Incrementa o contador de requisições do SAP"""
     SAP_REQUESTS_COUNT.labels(endpoint=endpoint, status=status, auth_method=auth_method).inc()
+
+
+def observe_sap_phase(endpoint: str, phase: str, duration: float):
+    """Registra a duração de uma fase da chamada ao SAP (csrf ou post)"""
+    SAP_REQUEST_DURATION.labels(endpoint=endpoint, phase=phase).observe(duration)
+
+
+def observe_sap_response(endpoint: str, size_bytes: int, items: Optional[int] = None):
+    """Registra o tamanho da resposta do SAP e, quando conhecida, a quantidade de itens"""
+    SAP_RESPONSE_SIZE.labels(endpoint=endpoint).observe(size_bytes)
+    if items is not None:
+        SAP_RESPONSE_ITEMS.labels(endpoint=endpoint).observe(items)
+
+
+def sap_request_started(endpoint: str):
+    SAP_REQUESTS_IN_PROGRESS.labels(endpoint=endpoint).inc()
+
+
+def sap_request_finished(endpoint: str):
+    SAP_REQUESTS_IN_PROGRESS.labels(endpoint=endpoint).dec()
+
+
+def set_sap_circuit_state(endpoint: str, state: str):
+    """Atualiza o estado do circuit breaker do RFC (closed, half_open ou open)"""
+    SAP_CIRCUIT_STATE.labels(endpoint=endpoint).set(CIRCUIT_STATE_VALUES[state])
+
+
+def increment_sap_circuit_rejected(endpoint: str):
+    SAP_CIRCUIT_REJECTED.labels(endpoint=endpoint).inc()
+
+
+def increment_sap_retry(endpoint: str, reason: str):
+    SAP_RETRIES.labels(endpoint=endpoint, reason=reason).inc()
+
+
+def increment_sap_hedge(endpoint: str, outcome: str):
+    SAP_HEDGED_REQUESTS.labels(endpoint=endpoint, outcome=outcome).inc()
+
+
+def increment_sap_coalesced(endpoint: str, role: str):
+    """Registra uma chamada de leitura como leader (foi ao CPI) ou follower (reaproveitou outra)"""
+    SAP_COALESCED_REQUESTS.labels(endpoint=endpoint, role=role).inc()
+
+
+def set_sap_concurrency(endpoint: str, limit: float, queued: int):
+    """Atualiza o limite e o tamanho da fila do limitador do RFC"""
+    SAP_CONCURRENCY_LIMIT.labels(endpoint=endpoint).set(limit)
+    SAP_QUEUE_LENGTH.labels(endpoint=endpoint).set(queued)
+
+
+def observe_sap_queue_wait(endpoint: str, priority: str, duration: float):
+    SAP_QUEUE_WAIT.labels(endpoint=endpoint, priority=priority).observe(duration)
+
+
+def increment_sap_shed(endpoint: str, priority: str, reason: str):
+    SAP_SHED_REQUESTS.labels(endpoint=endpoint, priority=priority, reason=reason).inc()
+
+
+def set_worker_next_run(job: str, timestamp: float):
+    WORKER_NEXT_RUN.labels(job=job).set(timestamp)
+
+
+def observe_worker_run(job: str, status: str, duration: float):
+    """Registra uma execução finalizada do job (success / failed)"""
+    WORKER_RUNS.labels(job=job, status=status).inc()
+    WORKER_LAST_DURATION.labels(job=job).set(duration)
+    if status == "success":
+        WORKER_LAST_SUCCESS.labels(job=job).set_to_current_time()
+
+
+def increment_worker_run(job: str, status: str):
+    """Registra uma execução pulada (skipped_running / skipped_locked / lease_error)"""
+    WORKER_RUNS.labels(job=job, status=status).inc()
+
+
+def sync_started(sync_type: str):
+    SYNC_RUNNING.labels(sync_type=sync_type).inc()
+    SYNC_LAST_PROGRESS.labels(sync_type=sync_type).set_to_current_time()
+
+
+def observe_sync_progress(sync_type: str, records: int, rate: float):
+    """Registra um lote commitado: registros desde o relatório anterior e a vazão no período"""
+    SYNC_RECORDS_PROCESSED.labels(sync_type=sync_type).inc(records)
+    SYNC_RECORDS_RATE.labels(sync_type=sync_type).set(rate)
+    SYNC_LAST_PROGRESS.labels(sync_type=sync_type).set_to_current_time()
+
+
+def observe_sync_items(sync_type: str, items: int):
+    """Linhas do SAP lidas, em syncs cujo progresso é contado em clientes"""
+    SYNC_ITEMS_FETCHED.labels(sync_type=sync_type).inc(items)
+
+
+def sync_finished(sync_type: str, status: str, full: bool):
+    """Fim de uma execução; só um sync completo (sem customer_codes) conta como último sucesso"""
+    SYNC_RUNNING.labels(sync_type=sync_type).dec()
+    SYNC_RECORDS_RATE.labels(sync_type=sync_type).set(0)
+    if status == "completed" and full:
+        SYNC_LAST_SUCCESS.labels(sync_type=sync_type).set_to_current_time()
+
+
+def seed_sync_last_success(sync_type: str, timestamp: float):
+    """Último sucesso lido do SyncLog na subida do processo; o gauge é local e zera a cada restart"""
+    SYNC_LAST_SUCCESS.labels(sync_type=sync_type).set(timestamp)
+
+
+def observe_sync_sap_fetch(sync_type: str, duration: float):
+    SYNC_SAP_FETCH_DURATION.labels(sync_type=sync_type).observe(duration)
+
+
+def observe_sync_db_write(sync_type: str, duration: float):
+    SYNC_DB_WRITE_DURATION.labels(sync_type=sync_type).observe(duration)
+
+
+def set_sync_queue_depth(sync_type: str, queue: str, depth: int):
+    SYNC_QUEUE_DEPTH.labels(sync_type=sync_type, queue=queue).set(depth)
+
+
+def set_model_statistics_sample_size(size: int):
+    MODEL_STATISTICS_SAMPLE_SIZE.set(size)
+
+
+def start_metrics_server(port: int):
+    """Expõe /metrics numa porta própria, para processos sem a API (scheduler dos workers)"""
+    start_http_server(port)
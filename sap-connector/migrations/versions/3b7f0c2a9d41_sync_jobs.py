@@ -0,0 +1,61 @@
+"""sync jobs
+
+Revision ID: 3b7f0c2a9d41
+Revises: e86d86529845
+Create Date: 2026-10-19 14:05:12.318402
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7f0c2a9d41"
+down_revision: Union[str, None] = "e86d86529845"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_jobs",
+        sa.Column("sync_type", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("customer_codes", sa.JSON(), nullable=True),
+        sa.Column("dedup_key", sa.String(length=100), nullable=False),
+        sa.Column("requested_by", sa.String(length=255), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("worker_id", sa.String(length=100), nullable=True),
+        sa.Column("error_message", sa.String(length=500), nullable=True),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_sync_job_claim", "sync_jobs", ["status", "run_after"], unique=False)
+    op.create_index(
+        "idx_sync_job_queued_dedup",
+        "sync_jobs",
+        ["dedup_key"],
+        unique=True,
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.add_column("sync_logs", sa.Column("records_total", sa.Integer(), nullable=True))
+    op.add_column("sync_logs", sa.Column("job_id", sa.UUID(), nullable=True))
+    op.create_index(op.f("ix_sync_logs_job_id"), "sync_logs", ["job_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_sync_logs_job_id"), table_name="sync_logs")
+    op.drop_column("sync_logs", "job_id")
+    op.drop_column("sync_logs", "records_total")
+    op.drop_index("idx_sync_job_queued_dedup", table_name="sync_jobs")
+    op.drop_index("idx_sync_job_claim", table_name="sync_jobs")
+    op.drop_table("sync_jobs")
@@ -0,0 +1,26 @@
+"""sync log checkpoint
+
+Revision ID: 5d8a3e1f6b92
+Revises: c41f9e7b2d58
+Create Date: 2026-10-19 18:20:51.447210
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8a3e1f6b92"
+down_revision: Union[str, None] = "c41f9e7b2d58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("sync_logs", sa.Column("checkpoint", sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("sync_logs", "checkpoint")
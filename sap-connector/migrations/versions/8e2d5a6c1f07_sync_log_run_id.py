@@ -0,0 +1,28 @@
+"""sync log run id
+
+Revision ID: 8e2d5a6c1f07
+Revises: 3b7f0c2a9d41
+Create Date: 2026-10-19 15:12:40.507316
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2d5a6c1f07"
+down_revision: Union[str, None] = "3b7f0c2a9d41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("sync_logs", sa.Column("run_id", sa.String(length=100), nullable=True))
+    op.create_index(op.f("ix_sync_logs_run_id"), "sync_logs", ["run_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_sync_logs_run_id"), table_name="sync_logs")
+    op.drop_column("sync_logs", "run_id")
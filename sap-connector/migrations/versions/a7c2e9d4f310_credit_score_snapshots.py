@@ -0,0 +1,49 @@
+"""credit score snapshots
+
+Revision ID: a7c2e9d4f310
+Revises: 5d8a3e1f6b92
+Create Date: 2026-10-19 18:05:12.417530
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c2e9d4f310"
+down_revision: Union[str, None] = "5d8a3e1f6b92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_score_snapshots",
+        sa.Column("customer_code", sa.String(length=50), nullable=False),
+        sa.Column("company_code", sa.String(length=10), nullable=False),
+        sa.Column("month", sa.String(length=7), nullable=False),
+        sa.Column("key_date", sa.Date(), nullable=False),
+        sa.Column("model_version", sa.String(length=64), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("probability_default", sa.Float(), nullable=False),
+        sa.Column("metrics", sa.JSON(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_score_snapshot_series",
+        "credit_score_snapshots",
+        ["customer_code", "company_code", "model_version", "month"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_score_snapshot_series", table_name="credit_score_snapshots")
+    op.drop_table("credit_score_snapshots")
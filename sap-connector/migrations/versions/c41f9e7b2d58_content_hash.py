@@ -0,0 +1,32 @@
+"""content hash
+
+Revision ID: c41f9e7b2d58
+Revises: 8e2d5a6c1f07
+Create Date: 2026-10-19 16:42:37.905113
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f9e7b2d58"
+down_revision: Union[str, None] = "8e2d5a6c1f07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("sap_customers", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.add_column("sap_sales_orders", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.add_column("sap_credit_limits", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.add_column("sync_logs", sa.Column("records_unchanged", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("sync_logs", "records_unchanged")
+    op.drop_column("sap_credit_limits", "content_hash")
+    op.drop_column("sap_sales_orders", "content_hash")
+    op.drop_column("sap_customers", "content_hash")
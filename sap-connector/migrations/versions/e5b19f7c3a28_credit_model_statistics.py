@@ -0,0 +1,41 @@
+"""credit model statistics
+
+Revision ID: e5b19f7c3a28
+Revises: a7c2e9d4f310
+Create Date: 2026-10-19 20:11:48.260914
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b19f7c3a28"
+down_revision: Union[str, None] = "a7c2e9d4f310"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_model_statistics",
+        sa.Column("version", sa.String(length=32), nullable=False),
+        sa.Column("statistics", sa.JSON(), nullable=False),
+        sa.Column("quantiles", sa.JSON(), nullable=False),
+        sa.Column("sample_size", sa.Integer(), nullable=False),
+        sa.Column("source_month", sa.String(length=7), nullable=True),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("version"),
+    )
+    op.create_index("idx_model_statistics_active", "credit_model_statistics", ["is_active", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("idx_model_statistics_active", table_name="credit_model_statistics")
+    op.drop_table("credit_model_statistics")
@@ -1,15 +1,43 @@
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional
 
 import httpx
-from config import BASE_URL, CLIENT_ID, CLIENT_SECRET, LOG_LEVEL, OAUTH_URL
+import orjson
+from config import (
+    BASE_URL,
+    CLIENT_ID,
+    CLIENT_SECRET,
+    OAUTH_URL,
+    SAP_CONNECT_TIMEOUT,
+    SAP_RFC_TIMEOUTS,
+    SAP_STREAM_RFCS,
+    SAP_TIMEOUT,
+)
+from deadline import DeadlineExceeded, budget, expired
 from fastapi import HTTPException
-from metrics import increment_sap_request, increment_sap_token_renew
+from json_response import ORJSONResponse
+from logging_config import redact, should_log_sap_payload
+from metrics import (
+    increment_sap_request,
+    increment_sap_token_renew,
+    observe_sap_phase,
+    observe_sap_response,
+    sap_request_finished,
+    sap_request_started,
+)
+from sap_limiter import Slot, acquire_slot, sap_slot
+from sap_resilience import acquire, call_with_resilience, record_result
+from sap_singleflight import coalesce
+from sap_stream import JsonItemParser
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
 
 cached_token = None
 token_expiration = None
 
-logging.basicConfig(level=getattr(logging, LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +50,7 @@ async def get_token():
 
     # Incrementa o contador de renovação de token
     increment_sap_token_renew()
+    timeout = budget(SAP_CONNECT_TIMEOUT)
 
     try:
         data = {
@@ -35,6 +64,7 @@ async def get_token():
                 OAUTH_URL,
                 data=data,
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
+                timeout=timeout,
             )
 
             if response.status_code != 200:
@@ -56,39 +86,113 @@ async def get_token():
         raise HTTPException(status_code=500, detail=f"Unable to authenticate: {str(e)}")
 
 
+def _sap_headers(token: str) -> dict:
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "X-Requested-With": "XMLHttpRequest",
+        "X-CSRF-Token": "Fetch",  # Header específico do SAP
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+    }
+
+
+async def _fetch_csrf_token(client: httpx.AsyncClient, endpoint: str, headers: dict) -> None:
+    # Primeiro faz uma requisição GET para obter o CSRF token
+    start_time = time.perf_counter()
+    init_response = await client.get(f"{BASE_URL}/{endpoint}", headers=headers, timeout=budget(SAP_CONNECT_TIMEOUT))
+    observe_sap_phase(endpoint, "csrf", time.perf_counter() - start_time)
+
+    # Extrai o CSRF token se disponível
+    csrf_token = init_response.headers.get("x-csrf-token", "")
+    if csrf_token:
+        headers["X-CSRF-Token"] = csrf_token
+
+
+def _count_sap_items(endpoint: str, result) -> int:
+    # As tabelas do RFC vêm como {"TABELA": {"item": [...]}} dentro de "<RFC>.Response"
+    response = result.get(f"{endpoint}.Response", result) if isinstance(result, dict) else {}
+    if not isinstance(response, dict):
+        return 0
+
+    total = 0
+    for table in response.values():
+        if isinstance(table, dict) and "item" in table:
+            items = table["item"]
+            total += len(items) if isinstance(items, list) else 1
+    return total
+
+
+def _sap_timeout(endpoint: str) -> httpx.Timeout:
+    # Timeout do RFC limitado ao que resta do deadline da requisição; conexão com timeout curto
+    # para o CPI fora do ar falhar rápido em vez de esperar o timeout inteiro
+    timeout = budget(SAP_RFC_TIMEOUTS.get(endpoint, SAP_TIMEOUT))
+    return httpx.Timeout(timeout, connect=min(SAP_CONNECT_TIMEOUT, timeout))
+
+
 async def call_sap(endpoint: str, request_data: dict):
     """
-    Tenta com headers específicos do SAP CPI
+    Tenta com headers específicos do SAP CPI, protegido pelo circuit breaker do RFC e com
+    retries/hedging para RFCs de leitura (ver sap_resilience). Leituras idênticas simultâneas
+    compartilham uma única chamada (ver sap_singleflight).
     """
+    return await coalesce(endpoint, request_data, lambda: _call_sap(endpoint, request_data))
+
+
+async def _call_sap(endpoint: str, request_data: dict):
+    # A vaga no limitador vale para a chamada inteira, incluindo retries
+    async with sap_slot(endpoint):
+        sap_request_started(endpoint)
+        try:
+            return await call_with_resilience(endpoint, lambda: _post_sap(endpoint, request_data))
+        except httpx.TransportError as e:
+            raise _transport_error(endpoint, e)
+        finally:
+            sap_request_finished(endpoint)
+
+
+def _transport_error(endpoint: str, error: Exception) -> HTTPException:
+    if isinstance(error, httpx.TimeoutException) and expired():
+        return DeadlineExceeded(status_code=504, detail=f"Error {endpoint}: request deadline exceeded")
+    return HTTPException(status_code=500, detail=f"Error {endpoint}: {str(error)}")
+
+
+async def _post_sap(endpoint: str, request_data: dict):
     try:
         token = await get_token()
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "X-Requested-With": "XMLHttpRequest",
-            "X-CSRF-Token": "Fetch",  # Header específico do SAP
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-        }
+        headers = _sap_headers(token)
 
         async with httpx.AsyncClient() as client:
-            # Primeiro faz uma requisição GET para obter o CSRF token
-            init_response = await client.get(f"{BASE_URL}/{endpoint}", headers=headers)
-
-            # Extrai o CSRF token se disponível
-            csrf_token = init_response.headers.get("x-csrf-token", "")
-            if csrf_token:
-                headers["X-CSRF-Token"] = csrf_token
+            await _fetch_csrf_token(client, endpoint, headers)
 
             # Agora faz a requisição POST com o CSRF token
-            response = await client.post(f"{BASE_URL}/{endpoint}", headers=headers, json=request_data, timeout=90)
-            logger.info(f"Calling SAP endpoint: {endpoint}")
-            logger.info(f"Request data: {request_data}")
-            logger.info(f"Response status code: {response.status_code}")
-            logger.info(f"Response headers: {response.headers}")
-            logger.info(f"Response text: {response.text[:200]}")
+            start_time = time.perf_counter()
+            response = await client.post(
+                f"{BASE_URL}/{endpoint}", headers=headers, json=request_data, timeout=_sap_timeout(endpoint)
+            )
+            duration = time.perf_counter() - start_time
+            observe_sap_phase(endpoint, "post", duration)
+            logger.info(
+                "SAP %s -> %s in %.3fs",
+                endpoint,
+                response.status_code,
+                duration,
+                extra={"sap_endpoint": endpoint, "status_code": response.status_code, "duration": duration},
+            )
+            if should_log_sap_payload(endpoint, request_data):
+                logger.info(
+                    "SAP %s payload",
+                    endpoint,
+                    extra={
+                        "sap_endpoint": endpoint,
+                        "request_data": redact(request_data),
+                        "response_headers": redact(dict(response.headers)),
+                        # O corpo bruto não passa pela máscara de campos sensíveis: só o tamanho
+                        "response_bytes": len(response.content),
+                    },
+                )
 
             if response.status_code == 403:
                 increment_sap_request(endpoint, "failure", "sap_headers")
@@ -111,6 +215,7 @@ async def call_sap(endpoint: str, request_data: dict):
             try:
                 result = response.json()
                 increment_sap_request(endpoint, "success", "sap_headers")
+                observe_sap_response(endpoint, len(response.content), _count_sap_items(endpoint, result))
                 return result
             except Exception:
                 increment_sap_request(endpoint, "failure", "sap_headers")
@@ -121,6 +226,200 @@ async def call_sap(endpoint: str, request_data: dict):
 
     except HTTPException:
         raise
+    except httpx.TransportError:
+        # Propaga o erro de rede original para call_with_resilience decidir sobre o retry
+        increment_sap_request(endpoint, "failure", "sap_headers")
+        raise
     except Exception as e:
         increment_sap_request(endpoint, "failure", "sap_headers")
         raise HTTPException(status_code=500, detail=f"Error {endpoint}: {str(e)}")
+
+
+async def _open_stream(endpoint: str, content: bytes):
+    """
+    Abre a chamada ao SAP CPI em modo stream e lê até o primeiro bloco com conteúdo.
+    Devolve (response, client, slot, chunks, first_chunk); quem chama fecha com _close_stream.
+    """
+    # Sem retry no stream (o corpo já vai sendo consumido), apenas o limitador e o circuit
+    # breaker; a vaga do limitador só é liberada quando o stream termina, mas a latência que ajusta
+    # o limite é medida no primeiro bloco
+    slot = await acquire_slot(endpoint)
+    try:
+        breaker = acquire(endpoint)
+    except HTTPException as e:
+        slot.release(e)
+        raise
+    client = httpx.AsyncClient(timeout=_sap_timeout(endpoint))
+    response = None
+    sap_request_started(endpoint)
+
+    try:
+        token = await get_token()
+        headers = _sap_headers(token)
+
+        await _fetch_csrf_token(client, endpoint, headers)
+
+        request = client.build_request("POST", f"{BASE_URL}/{endpoint}", headers=headers, content=content)
+        start_time = time.perf_counter()
+        response = await client.send(request, stream=True)
+        observe_sap_phase(endpoint, "post", time.perf_counter() - start_time)
+        logger.info(
+            "Streaming SAP %s -> %s",
+            endpoint,
+            response.status_code,
+            extra={"sap_endpoint": endpoint, "status_code": response.status_code},
+        )
+
+        if response.status_code == 403:
+            body = await response.aread()
+            increment_sap_request(endpoint, "failure", "sap_headers")
+            raise HTTPException(
+                status_code=403,
+                detail=f"403 Forbidden - Check permissions for {endpoint}. Response: {body.decode(errors='replace')}",
+            )
+
+        if response.status_code != 200:
+            body = await response.aread()
+            increment_sap_request(endpoint, "failure", "sap_headers")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Error {endpoint}: {body.decode(errors='replace')}",
+            )
+
+        # Lê até o primeiro bloco com conteúdo para manter a validação de resposta vazia
+        chunks = response.aiter_bytes()
+        first_chunk = b""
+        async for chunk in chunks:
+            if chunk.strip():
+                first_chunk = chunk
+                break
+
+        if not first_chunk:
+            increment_sap_request(endpoint, "failure", "sap_headers")
+            raise HTTPException(status_code=500, detail=f"Error {endpoint}: Empty response from SAP")
+
+        # Latência do CPI até o primeiro byte; o resto do corpo depende de quem está lendo o stream
+        slot.observe()
+
+    except HTTPException as e:
+        record_result(breaker, e)
+        await _close_stream(endpoint, response, client, slot, e)
+        raise
+    except asyncio.CancelledError as e:
+        record_result(breaker, e)
+        await _close_stream(endpoint, response, client, slot, e)
+        raise
+    except Exception as e:
+        record_result(breaker, e)
+        await _close_stream(endpoint, response, client, slot, e)
+        increment_sap_request(endpoint, "failure", "sap_headers")
+        raise _transport_error(endpoint, e)
+
+    record_result(breaker)
+    return response, client, slot, chunks, first_chunk
+
+
+async def stream_sap(endpoint: str, content: bytes) -> StreamingResponse:
+    """
+    Pass-through do SAP CPI: encaminha o corpo da requisição e devolve os bytes da resposta
+    ao cliente à medida que chegam, sem converter para objetos Python e sem re-serializar.
+    """
+    response, client, slot, chunks, first_chunk = await _open_stream(endpoint, content)
+    closed = False
+
+    async def close(error: Optional[BaseException] = None):
+        nonlocal closed
+        if not closed:
+            closed = True
+            await _close_stream(endpoint, response, client, slot, error)
+
+    async def body_iterator():
+        size = len(first_chunk)
+        error = None
+        try:
+            yield first_chunk
+            async for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        except Exception as e:
+            error = e
+            increment_sap_request(endpoint, "failure", "sap_headers")
+            raise
+        else:
+            increment_sap_request(endpoint, "success", "sap_headers")
+            # Sem parse no pass-through: apenas o tamanho é registrado, não a quantidade de itens
+            observe_sap_response(endpoint, size)
+        finally:
+            # O BackgroundTask não roda quando o iterador levanta no meio do corpo: a vaga do
+            # limitador e o cliente HTTP são liberados aqui
+            await close(error)
+
+    return StreamingResponse(
+        body_iterator(),
+        status_code=200,
+        media_type=response.headers.get("content-type", "application/json"),
+        # Cliente desconectado: o iterador fica parado no yield, sem chegar ao finally
+        background=BackgroundTask(close),
+    )
+
+
+async def sap_passthrough(endpoint: str, content: bytes):
+    """
+    Rotas /cpi/*: RFCs de listagem (SAP_STREAM_RFCS) vão em streaming; as demais passam por
+    call_sap, com single-flight, retries/hedging e validação do JSON da resposta.
+    """
+    if endpoint in SAP_STREAM_RFCS:
+        return await stream_sap(endpoint, content)
+
+    try:
+        request_data = orjson.loads(content)
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+    return ORJSONResponse(await call_sap(endpoint, request_data))
+
+
+async def iter_sap_items(endpoint: str, request_data: dict, table: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Chama o RFC e devolve as linhas de `table` (ex.: "ADDRESSDATA") à medida que chegam, com o
+    parser incremental de sap_stream: a resposta nunca fica inteira em memória.
+    """
+    parser = JsonItemParser((f"{endpoint}.Response", table, "item"))
+    response, client, slot, chunks, first_chunk = await _open_stream(endpoint, orjson.dumps(request_data))
+    size = len(first_chunk)
+    error = None
+    try:
+        for item in parser.feed(first_chunk):
+            yield item
+        async for chunk in chunks:
+            size += len(chunk)
+            for item in parser.feed(chunk):
+                yield item
+        parser.close()
+    except httpx.TransportError as e:
+        error = e
+        increment_sap_request(endpoint, "failure", "sap_headers")
+        raise _transport_error(endpoint, e)
+    except ValueError as e:
+        # JSON inválido ou cortado no meio (orjson.JSONDecodeError também é ValueError)
+        error = e
+        increment_sap_request(endpoint, "failure", "sap_headers")
+        raise HTTPException(status_code=500, detail=f"Error {endpoint}: Invalid JSON response - {str(e)}")
+    except BaseException as e:
+        # Inclui o consumidor abandonando o iterador (GeneratorExit) ou sendo cancelado
+        error = e
+        raise
+    else:
+        increment_sap_request(endpoint, "success", "sap_headers")
+        observe_sap_response(endpoint, size, parser.items_found)
+    finally:
+        await _close_stream(endpoint, response, client, slot, error)
+
+
+async def _close_stream(
+    endpoint: str, response, client: httpx.AsyncClient, slot: Slot, error: Optional[BaseException] = None
+) -> None:
+    sap_request_finished(endpoint)
+    slot.release(error)
+    if response is not None:
+        await response.aclose()
+    await client.aclose()
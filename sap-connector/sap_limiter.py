@@ -0,0 +1,249 @@
+"""
+Limite adaptativo de concorrência por RFC para as chamadas ao SAP CPI.
+
+Cada RFC tem um limite de chamadas simultâneas ajustado por AIMD: cresce devagar (+1 por janela
+de chamadas) enquanto o CPI responde bem e cai multiplicativamente quando há falhas ou quando a
+latência passa de SAP_LIMIT_LATENCY_TOLERANCE vezes a menor latência recente do RFC.
+
+Chamadas acima do limite esperam numa fila com prioridade por faixa: interativas (rotas do
+dashboard) passam na frente de workers e de cálculos em lote. Quem espera mais que o tempo máximo
+da faixa, ou encontra a fila cheia, recebe 503 com Retry-After em vez de esperar o timeout do SAP.
+
+Limite e fila são por processo. Na API, a prioridade vale entre as rotas e o /credit/batch (faixa
+BATCH). O scheduler e o consumidor da fila de sync rodam em processos próprios, só na faixa WORKER,
+e nunca disputam a fila com as rotas. Por isso as faixas WORKER e BATCH têm também um teto fixo
+por RFC (SAP_LIMIT_BACKGROUND_MAX): os workers não ocupam sozinhos a capacidade do CPI que os pods
+da API também usam.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import (
+    SAP_LIMIT_BACKGROUND_MAX,
+    SAP_LIMIT_BACKGROUND_QUEUE_TIMEOUT,
+    SAP_LIMIT_BACKOFF,
+    SAP_LIMIT_INITIAL,
+    SAP_LIMIT_LATENCY_TOLERANCE,
+    SAP_LIMIT_MAX,
+    SAP_LIMIT_MAX_QUEUE,
+    SAP_LIMIT_MIN,
+    SAP_LIMIT_QUEUE_TIMEOUT,
+)
+from deadline import budget
+from fastapi import HTTPException
+from metrics import increment_sap_shed, observe_sap_queue_wait, set_sap_concurrency
+from sap_resilience import is_failure
+
+# Faixas de prioridade: menor valor é atendido primeiro
+INTERACTIVE = "interactive"
+WORKER = "worker"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, WORKER: 1, BATCH: 2}
+
+QUEUE_TIMEOUTS = {
+    INTERACTIVE: SAP_LIMIT_QUEUE_TIMEOUT,
+    WORKER: SAP_LIMIT_BACKGROUND_QUEUE_TIMEOUT,
+    BATCH: SAP_LIMIT_BACKGROUND_QUEUE_TIMEOUT,
+}
+
+# Faixa das chamadas feitas no contexto atual; rotas HTTP ficam no padrão (interativa)
+sap_priority: ContextVar[str] = ContextVar("sap_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority_lane(lane: str):
+    """Executa o bloco com as chamadas ao SAP na faixa indicada"""
+    token = sap_priority.set(lane)
+    try:
+        yield
+    finally:
+        sap_priority.reset(token)
+
+
+class LoadShedError(HTTPException):
+    """Chamada descartada pelo limitador antes de chegar ao CPI"""
+
+
+class AdaptiveLimiter:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.limit = float(SAP_LIMIT_INITIAL)
+        self.in_flight = 0
+        self.queued = 0
+        self.waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self.sequence = itertools.count()
+        self.latencies: Deque[float] = deque(maxlen=100)
+        self.average_latency = 1.0
+        set_sap_concurrency(endpoint, self.limit, self.queued)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.average_latency))
+
+    def _shed(self, lane: str, reason: str) -> LoadShedError:
+        increment_sap_shed(self.endpoint, lane, reason)
+        return LoadShedError(
+            status_code=503,
+            detail=f"SAP CPI overloaded for {self.endpoint}, try again later",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    def _limit_for(self, lane: str) -> int:
+        # Faixas de fundo ficam abaixo do teto fixo, mesmo com o limite adaptativo mais alto
+        if lane == INTERACTIVE:
+            return int(self.limit)
+        return min(int(self.limit), SAP_LIMIT_BACKGROUND_MAX)
+
+    async def acquire(self, lane: str):
+        start_time = time.perf_counter()
+        if self.in_flight < self._limit_for(lane) and not self.waiters:
+            self.in_flight += 1
+            self._update_gauges()
+            observe_sap_queue_wait(self.endpoint, lane, 0.0)
+            return
+
+        # Sem passar do deadline da requisição esperando na fila
+        queue_timeout = budget(QUEUE_TIMEOUTS[lane])
+        if self.queued >= SAP_LIMIT_MAX_QUEUE and not self._evict_below(PRIORITIES[lane]):
+            raise self._shed(lane, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (PRIORITIES[lane], next(self.sequence), lane, future))
+        self.queued += 1
+        # Com a fila presa no teto das faixas de fundo ainda pode haver vaga para esta chamada
+        self._wake()
+        self._update_gauges()
+
+        try:
+            await asyncio.wait_for(future, timeout=queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # A vaga foi entregue no mesmo instante do timeout/cancelamento: devolve
+                self.release()
+            else:
+                self.queued -= 1
+                self._update_gauges()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._shed(lane, "queue_timeout")
+        finally:
+            observe_sap_queue_wait(self.endpoint, lane, time.perf_counter() - start_time)
+
+    def _evict_below(self, priority: int) -> bool:
+        """Com a fila cheia, descarta o último da faixa menos prioritária para dar lugar a uma mais prioritária"""
+        pending = [waiter for waiter in self.waiters if not waiter[3].done()]
+        if not pending:
+            return False
+
+        victim = max(pending, key=lambda waiter: (waiter[0], waiter[1]))
+        if victim[0] <= priority:
+            return False
+
+        self.waiters.remove(victim)
+        heapq.heapify(self.waiters)
+        self.queued -= 1
+        victim[3].set_exception(self._shed(victim[2], "evicted"))
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+        self._update_gauges()
+
+    def observe(self, duration: float, congested: bool = False):
+        """Ajusta o limite com a latência (ou a falha) de uma chamada que ainda ocupa a vaga"""
+        if not congested:
+            self.latencies.append(duration)
+            self.average_latency = 0.9 * self.average_latency + 0.1 * duration
+            baseline = min(self.latencies)
+            congested = SAP_LIMIT_LATENCY_TOLERANCE > 0 and duration > SAP_LIMIT_LATENCY_TOLERANCE * baseline
+
+        if congested:
+            self.limit = max(SAP_LIMIT_MIN, self.limit * SAP_LIMIT_BACKOFF)
+        elif self.in_flight >= self.limit / 2:
+            # Só cresce quando o limite está sendo usado, para não inflar em períodos ociosos
+            self.limit = min(SAP_LIMIT_MAX, self.limit + 1 / self.limit)
+        self._wake()
+        self._update_gauges()
+
+    def _wake(self):
+        while self.waiters and self.in_flight < int(self.limit):
+            _, _, lane, future = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)
+                continue
+            # Os de trás têm a mesma prioridade ou menor: também teriam de esperar
+            if self.in_flight >= self._limit_for(lane):
+                break
+            heapq.heappop(self.waiters)
+            self.queued -= 1
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _update_gauges(self):
+        set_sap_concurrency(self.endpoint, self.limit, self.queued)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(endpoint: str) -> AdaptiveLimiter:
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        limiter = _limiters[endpoint] = AdaptiveLimiter(endpoint)
+    return limiter
+
+
+class Slot:
+    """Vaga ocupada no limitador do RFC; observe() e release() são idempotentes"""
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self.limiter = limiter
+        self.start_time = time.perf_counter()
+        self.observed = False
+        self.released = False
+
+    def observe(self, error: Optional[BaseException] = None):
+        """
+        Registra a latência da chamada no AIMD, uma única vez. Em streams é chamado no primeiro bloco
+        da resposta: o tempo que o cliente leva para ler o corpo não é latência do CPI.
+        """
+        if self.observed:
+            return
+        self.observed = True
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            # Sem resultado (ou stream abandonado por quem lia), a duração não diz nada sobre o CPI
+            return
+        congested = error is not None and is_failure(error)
+        self.limiter.observe(time.perf_counter() - self.start_time, congested)
+
+    def release(self, error: Optional[BaseException] = None):
+        if self.released:
+            return
+        self.released = True
+        self.observe(error)
+        self.limiter.release()
+
+
+async def acquire_slot(endpoint: str) -> Slot:
+    limiter = get_limiter(endpoint)
+    await limiter.acquire(sap_priority.get())
+    return Slot(limiter)
+
+
+@asynccontextmanager
+async def sap_slot(endpoint: str):
+    slot = await acquire_slot(endpoint)
+    try:
+        yield slot
+    except BaseException as e:
+        slot.release(e)
+        raise
+    slot.release()
@@ -0,0 +1,465 @@
+"""
+Servidor SAP CPI simulado para desenvolvimento e benchmarks offline.
+
+Implementa o handshake OAuth (client_credentials) + CSRF usado pelo sap_client e os RFCs
+consumidos pelos workers e pelo motor de crédito, com dados sintéticos determinísticos
+(mesma seed => mesmas respostas) e injeção de latência e de erros.
+
+Uso:
+    SAP_MOCK_CUSTOMERS=5000 SAP_MOCK_LATENCY=lognormal:250,0.6 python sap_mock_server.py
+
+    # no sap-connector
+    SAP_BASE_URL=http://localhost:8081/http
+    SAP_OAUTH_URL=http://localhost:8081/oauth/token
+
+Distribuições de latência (SAP_MOCK_LATENCY / SAP_MOCK_CSRF_LATENCY), em milissegundos:
+    none | fixed:<ms> | uniform:<min>,<max> | normal:<media>,<desvio> | lognormal:<mediana>,<sigma>
+
+A configuração pode ser alterada em tempo de execução via GET/PUT /_mock/config,
+inclusive por RFC (campo "endpoints"), sem reiniciar o servidor.
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import os
+import random
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Form, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
+from json_response import ORJSONResponse
+from pydantic import BaseModel, Field
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+CUSTOMER_CODE_OFFSET = 100000
+COMPANY_CODE = "1000"
+DATE_FORMAT = "%Y%m%d"
+
+
+class EndpointSettings(BaseModel):
+    latency: Optional[str] = None
+    error_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    error_status: Optional[int] = None
+
+
+class MockSettings(BaseModel):
+    customers: int = Field(default=int(os.getenv("SAP_MOCK_CUSTOMERS", "1000")), ge=0)
+    items_per_customer: int = Field(default=int(os.getenv("SAP_MOCK_ITEMS_PER_CUSTOMER", "50")), ge=0)
+    seed: int = int(os.getenv("SAP_MOCK_SEED", "42"))
+    latency: str = os.getenv("SAP_MOCK_LATENCY", "none")
+    csrf_latency: str = os.getenv("SAP_MOCK_CSRF_LATENCY", "none")
+    error_rate: float = Field(default=float(os.getenv("SAP_MOCK_ERROR_RATE", "0")), ge=0, le=1)
+    error_status: int = int(os.getenv("SAP_MOCK_ERROR_STATUS", "500"))
+    token_ttl: int = int(os.getenv("SAP_MOCK_TOKEN_TTL", "3600"))
+    endpoints: Dict[str, EndpointSettings] = {}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Converte a especificação de latência em um sampler que devolve segundos"""
+    name, _, args = spec.strip().partition(":")
+    params = [float(value) for value in args.split(",") if value.strip()]
+
+    if name in ("", "none"):
+        return lambda rng: 0.0
+    if name == "fixed" and len(params) == 1:
+        return lambda rng: params[0] / 1000
+    if name == "uniform" and len(params) == 2:
+        return lambda rng: rng.uniform(params[0], params[1]) / 1000
+    if name == "normal" and len(params) == 2:
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1])) / 1000
+    if name == "lognormal" and len(params) == 2:
+        return lambda rng: rng.lognormvariate(math.log(params[0]), params[1]) / 1000
+
+    raise ValueError(f"Invalid latency distribution: {spec}")
+
+
+# ============================================
+# Geradores de dados sintéticos
+# ============================================
+
+
+def customer_code(index: int) -> str:
+    return str(CUSTOMER_CODE_OFFSET + index).zfill(10)
+
+
+def customer_index(code: str) -> Optional[int]:
+    try:
+        index = int(code) - CUSTOMER_CODE_OFFSET
+    except (TypeError, ValueError):
+        return None
+    return index if 0 <= index < settings.customers else None
+
+
+def _rng(*key) -> random.Random:
+    # Uma semente por entidade: a resposta não depende da ordem das chamadas
+    return random.Random(":".join(str(part) for part in (settings.seed, *key)))
+
+
+def _amount(rng: random.Random, low: float, high: float) -> str:
+    return "%.2f" % rng.uniform(low, high)
+
+
+def generate_customer(index: int) -> dict:
+    rng = _rng("customer", index)
+    code = customer_code(index)
+    city, region = rng.choice([("SAO PAULO", "SP"), ("RIO DE JANEIRO", "RJ"), ("CURITIBA", "PR"), ("RECIFE", "PE")])
+
+    return {
+        "CUSTOMER": code,
+        "ADDRESS": str(rng.randint(10**7, 10**8 - 1)),
+        "SORT1": f"CLIENTE{index}",
+        "NAME": f"Cliente {index} Ltda",
+        "COUNTRY": "BR",
+        "COUNTRYISO": "BR",
+        "CITY": city,
+        "POSTL_COD1": "%05d-%03d" % (rng.randint(1000, 99999), rng.randint(0, 999)),
+        "REGION": region,
+        "STREET": f"Rua {rng.randint(1, 500)}, {rng.randint(1, 3000)}",
+        "TEL1_NUMBR": "11%08d" % rng.randint(0, 99999999),
+        "FAX_NUMBER": "",
+        "LANGU": "P",
+    }
+
+
+def generate_open_items(index: int, key_date: datetime) -> List[dict]:
+    rng = _rng("open_items", index)
+    items = []
+
+    for position in range(settings.items_per_customer):
+        doc_date = key_date - timedelta(days=rng.randint(0, 395))
+        due_date = doc_date + timedelta(days=rng.choice([28, 30, 45, 60, 90]))
+        amount = _amount(rng, 100, 150000)
+        item = {
+            "DOC_NO": str(1400000000 + index * 1000 + position),
+            "DOC_DATE": doc_date.strftime(DATE_FORMAT),
+            "BLINE_DATE": doc_date.strftime(DATE_FORMAT),
+            "FKDATE": due_date.strftime(DATE_FORMAT),
+            "AMOUNT": amount,
+            "AMOUNT_SGM": amount,
+            "LC_AMOUNT": amount,
+            "CURRENCY": "BRL",
+            "ITEM_TEXT": f"NF {rng.randint(1000, 999999)}",
+        }
+        # ~70% pagos, parte deles com atraso
+        if rng.random() < 0.7:
+            payment_date = due_date + timedelta(days=max(0, int(rng.gauss(0, 10))))
+            if payment_date <= key_date:
+                item["PAYMENT_DATE"] = payment_date.strftime(DATE_FORMAT)
+        items.append(item)
+
+    return items
+
+
+def generate_sales_orders(index: int, start: datetime, end: datetime) -> List[dict]:
+    rng = _rng("sales_orders", index)
+    orders = []
+    span = max((end - start).days, 0)
+
+    for position in range(settings.items_per_customer):
+        doc_date = start + timedelta(days=rng.randint(0, span))
+        quantity = rng.randint(1, 500)
+        net_price = rng.uniform(10, 2000)
+        orders.append(
+            {
+                "SD_DOC": str(10000000 + index * 1000 + position).zfill(10),
+                "ITM_NUMBER": "000010",
+                "MATERIAL": "MAT%06d" % rng.randint(1, 5000),
+                "SHORT_TEXT": f"Produto {rng.randint(1, 5000)}",
+                "DOC_TYPE": rng.choice(["ZVEN", "ZBON", "ZDEV"]),
+                "DOC_DATE": doc_date.strftime(DATE_FORMAT),
+                "REQ_DATE": (doc_date + timedelta(days=rng.randint(1, 20))).strftime(DATE_FORMAT),
+                "REQ_QTY": "%.3f" % quantity,
+                "PURCH_NO": f"PC{rng.randint(1000, 99999)}",
+                "VALID_FROM": doc_date.strftime(DATE_FORMAT),
+                "VALID_TO": (doc_date + timedelta(days=30)).strftime(DATE_FORMAT),
+                "NAME": f"Cliente {index} Ltda",
+                "EXCHG_RATE": "1.00000",
+                "NET_PRICE": "%.2f" % net_price,
+                "NET_VALUE": "%.2f" % (net_price * quantity),
+                "NET_VAL_HD": "%.2f" % (net_price * quantity),
+                "DIVISION": "01",
+                "DOC_STATUS": rng.choice(["A", "B", "C"]),
+                "SALES_ORG": COMPANY_CODE,
+                "CURRENCY": "BRL",
+                "PLANT": "1001",
+                "CREATION_DATE": doc_date.strftime(DATE_FORMAT),
+                "CREATION_TIME": "%02d%02d%02d" % (rng.randint(7, 19), rng.randint(0, 59), rng.randint(0, 59)),
+            }
+        )
+
+    return orders
+
+
+def generate_credit_segment(index: int, segment: str) -> dict:
+    rng = _rng("credit", index, segment)
+    today = datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 365))
+
+    return {
+        "PARTNER": customer_code(index),
+        "CREDIT_SGMNT": segment,
+        "CREDIT_LIMIT": _amount(rng, 10000, 5000000),
+        "XBLOCKED": "X" if rng.random() < 0.05 else "",
+        "BLOCK_REASON": "",
+        "LIMIT_VALID_DATE": (today + timedelta(days=365)).strftime(DATE_FORMAT),
+        "LIMIT_CHG_DATE": today.strftime(DATE_FORMAT),
+        "COORDINATOR": f"ANALISTA{rng.randint(1, 10)}",
+        "CUST_GROUP": rng.choice(["Z001", "Z002", "Z003"]),
+        "FOLLOW_UP_DT": (today + timedelta(days=90)).strftime(DATE_FORMAT),
+        "XCRITICAL": "X" if rng.random() < 0.03 else "",
+        "REQ_DATE": today.strftime(DATE_FORMAT),
+    }
+
+
+def generate_invoices(index: int) -> List[dict]:
+    rng = _rng("invoices", index)
+    now = datetime.now()
+    invoices = []
+
+    for position in range(settings.items_per_customer):
+        bill_date = now - timedelta(days=rng.randint(0, 395))
+        invoices.append(
+            {
+                "BILLINGDOC": str(90000000 + index * 1000 + position),
+                "BILL_DATE": bill_date.strftime(DATE_FORMAT),
+                "PAYER": customer_code(index),
+                "NET_VALUE": _amount(rng, 100, 150000),
+                "TAX_VALUE": _amount(rng, 10, 20000),
+                "CURRENCY": "BRL",
+                "REFERENCE": f"NF{rng.randint(1000, 999999)}",
+            }
+        )
+
+    return invoices
+
+
+def _parse_date(value: Optional[str], default: datetime) -> datetime:
+    try:
+        return datetime.strptime(value, DATE_FORMAT)
+    except (TypeError, ValueError):
+        return default
+
+
+def _customer_or_empty(code: Optional[str]) -> Optional[int]:
+    return customer_index(str(code or "").strip())
+
+
+# ============================================
+# Handlers dos RFCs
+# ============================================
+
+
+def _id_range_bounds(item: dict) -> Optional[tuple]:
+    """Faixa de códigos (low, high) de uma linha do IDRANGE com OPTION EQ ou BT; None para as demais"""
+    option = str(item.get("OPTION") or "EQ").upper()
+    try:
+        low = int(item.get("LOW") or 0)
+        if option == "EQ":
+            return low, low
+        if option == "BT":
+            return low, int(item.get("HIGH") or 9999999999)
+    except ValueError:
+        pass
+    return None
+
+
+def _id_range_indexes(bounds: tuple) -> range:
+    first = max(bounds[0] - CUSTOMER_CODE_OFFSET, 0)
+    last = min(bounds[1] - CUSTOMER_CODE_OFFSET, settings.customers - 1)
+    return range(first, last + 1)
+
+
+def bapi_customer_getlist(payload: dict) -> dict:
+    max_rows = int(payload.get("MAXROWS") or settings.customers)
+    id_range = (payload.get("IDRANGE") or {}).get("item") or []
+    if isinstance(id_range, dict):
+        id_range = [id_range]
+
+    included, excluded = [], []
+    for item in id_range:
+        bounds = _id_range_bounds(item)
+        if bounds is not None:
+            (excluded if str(item.get("SIGN") or "I").upper() == "E" else included).append(bounds)
+
+    # Sem linhas de inclusão o SAP devolve todos os clientes; as faixas são percorridas em ordem
+    # de código, sem montar a lista inteira antes de cortar no MAXROWS
+    ranges = [_id_range_indexes(bounds) for bounds in included] if included else [range(settings.customers)]
+    items = []
+    previous = None
+    for index in heapq.merge(*ranges):
+        if len(items) >= max_rows:
+            break
+        if index == previous:
+            continue
+        previous = index
+        code = CUSTOMER_CODE_OFFSET + index
+        if any(low <= code <= high for low, high in excluded):
+            continue
+        items.append(generate_customer(index))
+    return {"ADDRESSDATA": {"item": items}, "RETURN": {"TYPE": "", "MESSAGE": ""}}
+
+
+def bapi_salesorder_getlist(payload: dict) -> dict:
+    index = _customer_or_empty(payload.get("CUSTOMER_NUMBER"))
+    end = _parse_date(payload.get("DOCUMENT_DATE_TO"), datetime.now())
+    start = _parse_date(payload.get("DOCUMENT_DATE"), end - timedelta(days=365))
+
+    orders = generate_sales_orders(index, start, end) if index is not None else []
+    return {"SALES_ORDERS": {"item": orders}, "RETURN": {"TYPE": "", "MESSAGE": ""}}
+
+
+def ukm_db_ukmbp_cms_sgm_read(payload: dict) -> dict:
+    index = _customer_or_empty(payload.get("I_PARTNER"))
+    if index is None:
+        return {}
+    return generate_credit_segment(index, payload.get("I_SEGMENT") or "0001")
+
+
+def zbapi_ar_acc_getopenitems_v2(payload: dict) -> dict:
+    index = _customer_or_empty(payload.get("CUSTOMER"))
+    key_date = _parse_date(payload.get("KEYDATE"), datetime.now())
+
+    items = generate_open_items(index, key_date) if index is not None else []
+    return {"T_ITEMS": {"item": items}, "RETURN": {"TYPE": "", "MESSAGE": ""}}
+
+
+def zbapi_webinvoice_getlist2(payload: dict) -> dict:
+    index = _customer_or_empty(payload.get("PARTNER_NUMBER"))
+
+    invoices = generate_invoices(index) if index is not None else []
+    return {"T_INVOICE": {"item": invoices}, "RETURN": {"TYPE": "", "MESSAGE": ""}}
+
+
+RFC_HANDLERS: Dict[str, Callable[[dict], dict]] = {
+    "BAPI_CUSTOMER_GETLIST": bapi_customer_getlist,
+    "BAPI_SALESORDER_GETLIST": bapi_salesorder_getlist,
+    "UKM_DB_UKMBP_CMS_SGM_READ": ukm_db_ukmbp_cms_sgm_read,
+    "ZBAPI_AR_ACC_GETOPENITEMS_V2": zbapi_ar_acc_getopenitems_v2,
+    "ZBAPI_WEBINVOICE_GETLIST2": zbapi_webinvoice_getlist2,
+}
+
+
+# ============================================
+# Aplicação
+# ============================================
+
+settings = MockSettings()
+fault_rng = random.Random(settings.seed)
+issued_tokens: Dict[str, float] = {}
+# Um CSRF token por access token, como a sessão do CPI
+csrf_tokens: Dict[str, str] = {}
+
+app = FastAPI(
+    title="SAP CPI Mock",
+    description="Servidor SAP CPI simulado para desenvolvimento e benchmarks",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+
+
+def _endpoint_settings(rfc: str) -> EndpointSettings:
+    return settings.endpoints.get(rfc) or EndpointSettings()
+
+
+def _check_bearer(request: Request) -> str:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    expires_at = issued_tokens.get(token)
+    if scheme.lower() != "bearer" or expires_at is None or expires_at < time.time():
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return token
+
+
+async def _inject_faults(rfc: str, latency_spec: str) -> Optional[Response]:
+    await asyncio.sleep(parse_latency(latency_spec)(fault_rng))
+
+    overrides = _endpoint_settings(rfc)
+    error_rate = overrides.error_rate if overrides.error_rate is not None else settings.error_rate
+    if error_rate and fault_rng.random() < error_rate:
+        status_code = overrides.error_status or settings.error_status
+        return PlainTextResponse(f"Injected error for {rfc}", status_code=status_code)
+    return None
+
+
+@app.post("/oauth/token")
+async def oauth_token(grant_type: str = Form(...), client_id: str = Form(""), client_secret: str = Form("")):
+    if grant_type != "client_credentials":
+        raise HTTPException(status_code=400, detail="unsupported_grant_type")
+
+    now = time.time()
+    for expired in [token for token, expires_at in issued_tokens.items() if expires_at < now]:
+        issued_tokens.pop(expired, None)
+        csrf_tokens.pop(expired, None)
+
+    token = secrets.token_urlsafe(32)
+    issued_tokens[token] = now + settings.token_ttl
+    return {"access_token": token, "token_type": "bearer", "expires_in": settings.token_ttl}
+
+
+@app.get("/http/{rfc}")
+async def fetch_csrf_token(rfc: str, request: Request):
+    access_token = _check_bearer(request)
+    await asyncio.sleep(parse_latency(settings.csrf_latency)(fault_rng))
+
+    headers = {}
+    if request.headers.get("x-csrf-token", "").lower() == "fetch":
+        headers["x-csrf-token"] = csrf_tokens.setdefault(access_token, secrets.token_urlsafe(16))
+    return Response(status_code=200, headers=headers)
+
+
+@app.post("/http/{rfc}")
+async def call_rfc(rfc: str, request: Request):
+    access_token = _check_bearer(request)
+    if request.headers.get("x-csrf-token") != csrf_tokens.get(access_token):
+        return PlainTextResponse("CSRF token validation failed", status_code=403)
+
+    handler = RFC_HANDLERS.get(rfc)
+    if handler is None:
+        raise HTTPException(status_code=404, detail=f"RFC {rfc} not implemented in mock")
+
+    error = await _inject_faults(rfc, _endpoint_settings(rfc).latency or settings.latency)
+    if error is not None:
+        return error
+
+    payload = await request.json() if await request.body() else {}
+    return {f"{rfc}.Response": handler(payload)}
+
+
+@app.get("/_mock/config")
+async def get_mock_config():
+    return settings
+
+
+@app.put("/_mock/config")
+async def update_mock_config(new_settings: MockSettings):
+    global settings, fault_rng
+
+    for spec in [new_settings.latency, new_settings.csrf_latency] + [
+        endpoint.latency for endpoint in new_settings.endpoints.values() if endpoint.latency
+    ]:
+        try:
+            parse_latency(spec)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    settings = new_settings
+    fault_rng = random.Random(settings.seed)
+    logger.info(f"Mock config updated: {settings.model_dump()}")
+    return settings
+
+
+@app.get("/health/live")
+async def liveness_probe():
+    return {"status": "alive"}
+
+
+if __name__ == "__main__":
+    parse_latency(settings.latency)
+    parse_latency(settings.csrf_latency)
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("SAP_MOCK_PORT", "8081")))
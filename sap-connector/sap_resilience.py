@@ -0,0 +1,308 @@
+"""
+Proteções das chamadas ao SAP CPI.
+
+- Circuit breaker por RFC: depois de SAP_BREAKER_FAILURE_THRESHOLD falhas seguidas (5xx ou erro de
+  conexão) as chamadas são recusadas com 503 por SAP_BREAKER_RESET_TIMEOUT segundos; em seguida
+  algumas chamadas de sondagem (half-open) decidem se o circuito fecha ou abre de novo.
+- Retries com backoff exponencial e jitter, somente para RFCs de leitura (idempotentes).
+- Hedging opcional para leituras: se a chamada passa do p95 recente do RFC, uma segunda tentativa
+  é disparada e vence a primeira que responder.
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+from config import (
+    SAP_BREAKER_FAILURE_THRESHOLD,
+    SAP_BREAKER_HALF_OPEN_MAX_CALLS,
+    SAP_BREAKER_RESET_TIMEOUT,
+    SAP_HEDGE_ENABLED,
+    SAP_HEDGE_MIN_DELAY,
+    SAP_HEDGE_MIN_SAMPLES,
+    SAP_HEDGE_QUANTILE,
+    SAP_LATENCY_WINDOW,
+    SAP_RETRY_ATTEMPTS,
+    SAP_RETRY_BASE_DELAY,
+    SAP_RETRY_MAX_DELAY,
+    SAP_RETRY_STATUS,
+)
+from deadline import DeadlineExceeded, expired, remaining
+from fastapi import HTTPException
+from metrics import (
+    increment_sap_circuit_rejected,
+    increment_sap_hedge,
+    increment_sap_retry,
+    set_sap_circuit_state,
+)
+
+T = TypeVar("T")
+
+# RFCs somente de leitura: podem ser repetidas ou duplicadas sem efeito colateral no SAP.
+# Escritas (ZCADASTRA_DADOS_BANC, ZVENDOR_UPDATE, ZFI_DOCUMENT_CHANGE, BAPI_VENDOR_CREATE,
+# ZUKM_DB_UKMBP_CMS_EXECUTE) ficam de fora e são feitas uma única vez.
+SAP_READ_RFCS = frozenset(
+    {
+        "BAPI_CUSTOMER_GETLIST",
+        "BAPI_SALESORDER_GETLIST",
+        "BAPI_WEBINVOICE_GETDETAIL",
+        "BAPI_WEBINVOICE_GETLIST",
+        "BBP_VENDOR_GETLIST",
+        "FIN_AP_AR_GET_BANK",
+        "UKM_DB_UKMBP_CMS_SGM_READ",
+        "ZBAPI_AP_ACC_GETINVOICEDETAILS",
+        "ZBAPI_AP_ACC_GETOPENITEMS",
+        "ZBAPI_AR_ACC_GETOPENITEMS",
+        "ZBAPI_AR_ACC_GETOPENITEMS2",
+        "ZBAPI_AR_ACC_GETOPENITEMS_V2",
+        "ZBAPI_BUPA_TAX_PAR_GET_DETAIL",
+        "ZBAPI_WEBINVOICE_GETLIST2",
+        "ZCHANGEDOCU_CDPOS_READ_V2",
+        "ZDETALHES_FATURA",
+        "ZFATURA_PARC2",
+        "ZFIN_AP_AR_GET_BANK",
+        "ZFI_F4_ZTERM",
+        "ZGET_VENDOR_DETAILS",
+        "ZUKM_DB_UKMBP_CMS_SGM_READ",
+    }
+)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+
+class CircuitBreaker:
+    def __init__(self, endpoint: str, failure_threshold: int, reset_timeout: float, half_open_max_calls: int):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        set_sap_circuit_state(endpoint, CLOSED)
+
+    def retry_after(self) -> float:
+        """Segundos até o circuito aceitar chamadas de sondagem"""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self._transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        if self.state == HALF_OPEN:
+            self._transition(OPEN)
+            return
+
+        self.failures += 1
+        if self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._transition(OPEN)
+
+    def release(self):
+        """Devolve a vaga de sondagem de uma chamada cancelada antes de ter resultado"""
+        if self.state == HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def _transition(self, state: str):
+        self.state = state
+        self.half_open_calls = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        if state == CLOSED:
+            self.failures = 0
+        set_sap_circuit_state(self.endpoint, state)
+
+
+class CircuitOpenError(HTTPException):
+    """Chamada recusada pelo breaker sem chegar ao CPI; nunca é repetida"""
+
+
+class LatencyWindow:
+    """Últimas durações de chamadas bem-sucedidas de um RFC, para o atraso do hedging"""
+
+    def __init__(self, size: int):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def observe(self, duration: float):
+        self.samples.append(duration)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < SAP_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyWindow] = {}
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            endpoint, SAP_BREAKER_FAILURE_THRESHOLD, SAP_BREAKER_RESET_TIMEOUT, SAP_BREAKER_HALF_OPEN_MAX_CALLS
+        )
+        _breakers[endpoint] = breaker
+    return breaker
+
+
+def _latency_window(endpoint: str) -> LatencyWindow:
+    window = _latencies.get(endpoint)
+    if window is None:
+        window = _latencies[endpoint] = LatencyWindow(SAP_LATENCY_WINDOW)
+    return window
+
+
+def acquire(endpoint: str) -> CircuitBreaker:
+    """Retorna o breaker do RFC se a chamada pode seguir; senão responde 503 com Retry-After"""
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        increment_sap_circuit_rejected(endpoint)
+        raise CircuitOpenError(
+            status_code=503,
+            detail=f"SAP CPI circuit open for {endpoint}",
+            headers={"Retry-After": str(max(1, math.ceil(breaker.retry_after())))},
+        )
+    return breaker
+
+
+def record_result(breaker: CircuitBreaker, error: Optional[BaseException] = None):
+    """Registra no breaker o resultado de uma chamada liberada por acquire()"""
+    if isinstance(error, asyncio.CancelledError):
+        breaker.release()
+    elif error is not None and is_failure(error):
+        breaker.record_failure()
+    else:
+        # 4xx indica que o CPI está respondendo: conta como sucesso para o breaker
+        breaker.record_success()
+
+
+def is_failure(error: BaseException) -> bool:
+    """Erros que indicam CPI degradado e contam para abrir o circuito"""
+    if isinstance(error, DeadlineExceeded) or (isinstance(error, httpx.TimeoutException) and expired()):
+        # Prazo curto da própria requisição, não lentidão do CPI
+        return False
+    if isinstance(error, HTTPException):
+        return error.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Erros que valem uma nova tentativa"""
+    if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    if isinstance(error, HTTPException):
+        return error.status_code in SAP_RETRY_STATUS
+    if isinstance(error, (httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    if isinstance(error, httpx.TimeoutException):
+        # Timeout de leitura já consumiu o SAP_TIMEOUT inteiro; repetir só multiplicaria a espera
+        return False
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_reason(error: BaseException) -> str:
+    if isinstance(error, HTTPException):
+        return f"status_{error.status_code}"
+    return type(error).__name__
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponencial com full jitter"""
+    return random.uniform(0, min(SAP_RETRY_MAX_DELAY, SAP_RETRY_BASE_DELAY * 2**attempt))
+
+
+async def _guarded(endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    breaker = acquire(endpoint)
+    start_time = time.perf_counter()
+    try:
+        result = await attempt()
+    except BaseException as e:
+        record_result(breaker, e)
+        raise
+
+    record_result(breaker)
+    _latency_window(endpoint).observe(time.perf_counter() - start_time)
+    return result
+
+
+async def _hedged(endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    delay = _latency_window(endpoint).quantile(SAP_HEDGE_QUANTILE)
+    # Sem histórico suficiente, ou com o circuito em sondagem, não há segunda tentativa
+    if delay is None or get_breaker(endpoint).state != CLOSED:
+        return await _guarded(endpoint, attempt)
+
+    primary = asyncio.create_task(_guarded(endpoint, attempt))
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=max(SAP_HEDGE_MIN_DELAY, delay))
+        if done:
+            return primary.result()
+
+        increment_sap_hedge(endpoint, "fired")
+        hedge = asyncio.create_task(_guarded(endpoint, attempt))
+        pending = {primary, hedge}
+        errors: Dict[asyncio.Task, BaseException] = {}
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    if task is hedge:
+                        increment_sap_hedge(endpoint, "won")
+                    return task.result()
+                errors[task] = error
+
+        # As duas falharam: o erro da chamada original é o mais representativo
+        raise errors[primary]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def call_with_resilience(endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    """
+    Executa attempt() protegido pelo circuit breaker do RFC. Leituras são repetidas em erros
+    transitórios (até SAP_RETRY_ATTEMPTS tentativas) e, com SAP_HEDGE_ENABLED, duplicadas
+    quando passam do p95 recente.
+    """
+    read_only = endpoint in SAP_READ_RFCS
+    attempts = max(1, SAP_RETRY_ATTEMPTS) if read_only else 1
+
+    for number in range(attempts):
+        try:
+            if read_only and SAP_HEDGE_ENABLED:
+                return await _hedged(endpoint, attempt)
+            return await _guarded(endpoint, attempt)
+        except Exception as e:
+            if number + 1 >= attempts or not is_transient(e):
+                raise
+            delay = backoff_delay(number)
+            left = remaining()
+            if left is not None and left <= delay:
+                # Não sobra prazo para outra tentativa depois do backoff
+                raise
+            increment_sap_retry(endpoint, _retry_reason(e))
+            await asyncio.sleep(delay)
@@ -0,0 +1,89 @@
+"""
+Single-flight das chamadas de leitura ao SAP CPI.
+
+Chamadas idênticas (mesmo RFC, mesmo payload e mesma faixa de prioridade) que chegam enquanto uma
+delas ainda está em andamento compartilham a mesma requisição ao CPI e o mesmo resultado, em vez de
+cada uma ir ao SAP. Vale apenas para RFCs de leitura (SAP_READ_RFCS); escritas nunca são agrupadas.
+
+A chamada compartilhada roda sem o deadline da requisição que a iniciou (só com o timeout do RFC):
+cada chamador espera no máximo o seu próprio deadline. Quando o último chamador desiste
+(desconexão, deadline ou cancelamento), a chamada ao CPI é cancelada.
+
+O resultado é o mesmo objeto para todos os chamadores e deve ser tratado como somente leitura.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from deadline import DeadlineExceeded, remaining, request_deadline
+from metrics import increment_sap_coalesced
+from sap_limiter import sap_priority
+from sap_resilience import SAP_READ_RFCS
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """Chamada em andamento e quantos chamadores ainda esperam por ela"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+_in_flight: Dict[str, _Flight] = {}
+
+
+def coalescing_key(endpoint: str, payload: dict, lane: str = "") -> str:
+    """RFC + faixa de prioridade + hash do payload canônico (chaves ordenadas, sem espaços)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return f"{endpoint}:{lane}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+
+def _discard(key: str, flight: _Flight):
+    if _in_flight.get(key) is flight:
+        del _in_flight[key]
+
+
+def _forget(key: str, flight: _Flight):
+    _discard(key, flight)
+    # Consome a exceção para não gerar "Task exception was never retrieved" quando ninguém mais espera
+    if not flight.task.cancelled():
+        flight.task.exception()
+
+
+async def coalesce(endpoint: str, payload: dict, call: Callable[[], Awaitable[T]]) -> T:
+    """Executa call() uma única vez para cada (RFC, faixa, payload) em andamento"""
+    if endpoint not in SAP_READ_RFCS:
+        return await call()
+
+    key = coalescing_key(endpoint, payload, sap_priority.get())
+    flight = _in_flight.get(key)
+    if flight is None:
+        increment_sap_coalesced(endpoint, "leader")
+        # Task própria, num contexto sem o deadline de quem chegou primeiro: a faixa de prioridade
+        # já faz parte da chave, e o timeout do RFC continua valendo dentro da chamada
+        context = contextvars.copy_context()
+        context.run(request_deadline.set, None)
+        flight = _Flight(asyncio.get_running_loop().create_task(call(), context=context))
+        _in_flight[key] = flight
+        flight.task.add_done_callback(lambda done: _forget(key, flight))
+    else:
+        increment_sap_coalesced(endpoint, "follower")
+
+    flight.waiters += 1
+    try:
+        return await asyncio.wait_for(asyncio.shield(flight.task), timeout=remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(status_code=504, detail=f"Error {endpoint}: request deadline exceeded")
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # Ninguém mais espera: cancela a chamada ao CPI e não deixa novos chamadores se juntarem a ela
+            _discard(key, flight)
+            flight.task.cancel()
@@ -0,0 +1,150 @@
+"""
+Parser incremental de respostas JSON do SAP CPI.
+
+Em vez de carregar a resposta inteira para depois ler uma tabela do RFC, o JsonItemParser recebe
+os bytes em blocos (feed) e devolve cada item da tabela assim que o objeto termina de chegar.
+Só o item em andamento fica em memória, qualquer que seja o tamanho da resposta.
+
+    parser = JsonItemParser(("BAPI_CUSTOMER_GETLIST.Response", "ADDRESSDATA", "item"))
+    async for chunk in response.aiter_bytes():
+        for item in parser.feed(chunk):
+            ...
+    parser.close()
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+# Fora dos itens: strings completas e caracteres estruturais (números, true/false/null e espaços
+# são pulados sem inspeção). Um '"' sozinho é uma string que ainda não chegou inteira.
+_TOKEN = re.compile(_STRING + rb'|[{}\[\],:]|"', re.S)
+# Dentro de um item só importam strings e chaves/colchetes; o item é decodificado inteiro pelo orjson
+_ITEM_TOKEN = re.compile(_STRING + rb'|[{}\[\]]|"', re.S)
+
+_QUOTE, _OPEN_OBJECT, _OPEN_ARRAY, _COMMA = ord('"'), ord("{"), ord("["), ord(",")
+
+
+class _Frame:
+    __slots__ = ("is_object", "key", "expect_key", "items")
+
+    def __init__(self, is_object: bool, items: bool = False):
+        self.is_object = is_object
+        self.key: Optional[str] = None
+        self.expect_key = is_object
+        # Array da tabela procurada: cada objeto filho é um item
+        self.items = items
+
+
+class JsonItemParser:
+    """
+    Extrai os objetos de `path` (chaves a partir da raiz) de um JSON recebido em blocos.
+    O SAP devolve uma tabela com uma linha só como objeto em vez de lista: os dois formatos valem.
+    """
+
+    def __init__(self, path: Sequence[str]):
+        self.path = tuple(path)
+        self.items_found = 0
+        self._buffer = bytearray()
+        self._position = 0
+        self._stack: List[_Frame] = []
+        # Item em andamento: início no buffer e profundidade de chaves/colchetes abertos
+        self._item_start: Optional[int] = None
+        self._item_depth = 0
+        self._done = False
+
+    def _at_target(self) -> bool:
+        top = self._stack[-1] if self._stack else None
+        if top is None or not top.is_object:
+            return False
+        return tuple(frame.key for frame in self._stack if frame.is_object) == self.path
+
+    def _scan_item(self, buffer: bytearray, position: int, items: List[Dict[str, Any]]) -> Optional[int]:
+        """Avança dentro do item; devolve a nova posição ou None se o item ainda não chegou inteiro"""
+        while True:
+            match = _ITEM_TOKEN.search(buffer, position)
+            if match is None:
+                return None
+            if match.end() - match.start() == 1 and buffer[match.start()] == _QUOTE:
+                self._position = match.start()
+                return None
+
+            position = match.end()
+            char = buffer[match.start()]
+            if char == _QUOTE:
+                continue
+            self._item_depth += 1 if char in (_OPEN_OBJECT, _OPEN_ARRAY) else -1
+            if self._item_depth == 0:
+                items.append(orjson.loads(bytes(buffer[self._item_start : position])))
+                self._item_start = None
+                return position
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        buffer = self._buffer
+        buffer += chunk
+        items: List[Dict[str, Any]] = []
+        position = self._position
+
+        while not self._done:
+            if self._item_start is not None:
+                self._position = len(buffer)
+                resumed = self._scan_item(buffer, position, items)
+                if resumed is None:
+                    position = self._position
+                    break
+                position = resumed
+                continue
+
+            match = _TOKEN.search(buffer, position)
+            if match is None:
+                position = len(buffer)
+                break
+
+            char = buffer[match.start()]
+            top = self._stack[-1] if self._stack else None
+
+            if char == _QUOTE:
+                if match.end() - match.start() == 1:
+                    # String ainda incompleta: espera o próximo bloco
+                    position = match.start()
+                    break
+                position = match.end()
+                if top is not None and top.is_object and top.expect_key:
+                    top.key = orjson.loads(match.group())
+                    top.expect_key = False
+                continue
+
+            position = match.end()
+            if char == _OPEN_OBJECT:
+                if (top is not None and not top.is_object and top.items) or self._at_target():
+                    self._item_start, self._item_depth = match.start(), 1
+                else:
+                    self._stack.append(_Frame(True))
+            elif char == _OPEN_ARRAY:
+                self._stack.append(_Frame(False, items=self._at_target()))
+            elif char == _COMMA:
+                if top is not None and top.is_object:
+                    top.expect_key = True
+            elif char != ord(":"):
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+
+        # Descarta o que já foi lido, preservando o item em andamento
+        keep_from = position if self._item_start is None else self._item_start
+        if keep_from:
+            del buffer[:keep_from]
+            position -= keep_from
+            if self._item_start is not None:
+                self._item_start -= keep_from
+        self._position = position
+
+        self.items_found += len(items)
+        return items
+
+    def close(self):
+        """Falha se a resposta terminou antes de fechar o JSON (conexão cortada no meio)"""
+        if not self._done:
+            raise ValueError("Truncated JSON response")
@@ -4,9 +4,19 @@ import os
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from config import LOG_LEVEL, LOG_FORMAT, LOG_DATE_FORMAT
-from metrics import get_metrics, get_metrics_content_type
+from fastapi.responses import Response
+from config import (
+    COMPRESSION_MINIMUM_SIZE,
+    HTTP_CACHE_PATHS,
+    REQUEST_TIMEOUT,
+    REQUEST_TIMEOUT_MAX,
+    REQUEST_TIMEOUT_ROUTES,
+)
+from deadline import DeadlineMiddleware, parse_route_timeouts
+from http_cache import CompressionETagMiddleware
+from json_response import ORJSONResponse
+from logging_config import RequestContextMiddleware, setup_logging
+from metrics import PrometheusMiddleware, get_metrics, get_metrics_content_type
 from src.routes.data_routes import router as data_router
 from src.routes.sap_routes import router as sap_router
 from src.routes.user_role_routes import router as user_role_router
@@ -30,12 +40,8 @@ from src.routes.invoice_routes import router as invoice_router
 from src.routes.auth_routes import router as auth_router
 from src.routes.invite_user_routes import router as invite_user_router
 
-# Configure logging - Formato estruturado para melhor compatibilidade
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL.upper()),
-    format=LOG_FORMAT,
-    datefmt=LOG_DATE_FORMAT
-)
+# Configure logging - JSON via fila e thread dedicada (ver logging_config)
+setup_logging()
 
 # Desabilitar logs verbosos do httpx (Supabase requests)
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -54,6 +60,7 @@ app = FastAPI(
     openapi_url="/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     openapi_tags=[
         {"name": "Authentication", "description": "Endpoints de autenticação"},
         {"name": "SAP", "description": "Endpoints de integração com SAP"},
@@ -83,6 +90,17 @@ app = FastAPI(
 # Get CORS origins from environment variable
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
 
+# Deadline por requisição (SAP/Supabase/banco); registrado primeiro, mais interno, para o 504 passar por CORS e métricas
+app.add_middleware(
+    DeadlineMiddleware,
+    default_timeout=REQUEST_TIMEOUT,
+    max_timeout=REQUEST_TIMEOUT_MAX,
+    route_timeouts=parse_route_timeouts(REQUEST_TIMEOUT_ROUTES),
+)
+
+# Compressão e ETag/304 nos endpoints de leitura pesados; registrado antes do CORS para o 304 receber os headers CORS
+app.add_middleware(CompressionETagMiddleware, paths=HTTP_CACHE_PATHS, minimum_size=COMPRESSION_MINIMUM_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -91,6 +109,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# request_id (X-Request-ID) nos logs da requisição e na resposta
+app.add_middleware(RequestContextMiddleware)
+
+# Métricas por template de rota para todos os routers; registrado por último para medir a requisição inteira
+app.add_middleware(PrometheusMiddleware)
+
 # Debug middleware to inspect requests
 from fastapi import Request
 import json
@@ -111,19 +135,19 @@ async def root():
 @app.get("/health/live")
 async def liveness_probe():
     """Liveness probe for Kubernetes"""
-    return JSONResponse(content={"status": "alive"}, status_code=200)
+    return ORJSONResponse(content={"status": "alive"}, status_code=200)
 
 
 @app.get("/health/ready")
 async def readiness_probe():
     """Readiness probe for Kubernetes"""
-    return JSONResponse(content={"status": "ready"}, status_code=200)
+    return ORJSONResponse(content={"status": "ready"}, status_code=200)
 
 
 @app.get("/health/internal")
 async def internal_health_check():
     """Internal health check (no public access)"""
-    return JSONResponse(
+    return ORJSONResponse(
         content={"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"},
         status_code=200,
     )
@@ -9,7 +9,8 @@ from config import (
     IS_PRODUCTION,
     get_database_url,
 )
-from sqlalchemy import create_engine
+from deadline import remaining
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import NullPool
 from src.database.models import Base
@@ -38,6 +39,14 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
 
+@event.listens_for(SessionLocal, "after_begin")
+def _apply_deadline(session, transaction, connection):
+    # Dentro de uma requisição, o statement_timeout da transação é o que resta do deadline
+    left = remaining()
+    if left is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(left * 1000))}")
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
 
@@ -1,7 +1,18 @@
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -22,6 +33,8 @@ class SAPCustomer(BaseModel):
 
     customer_code = Column(String(50), unique=True, nullable=False, index=True)
     sap_data = Column(JSON, nullable=False)
+    # sha256 da linha canônica: o worker só regrava quando muda
+    content_hash = Column(String(64))
 
     __table_args__ = (
         Index("idx_sap_customer_code", "customer_code"),
@@ -36,6 +49,7 @@ class SAPSalesOrder(BaseModel):
     customer_code = Column(String(50), index=True)
     document_date = Column(DateTime)
     sap_data = Column(JSON, nullable=False)
+    content_hash = Column(String(64))
 
     __table_args__ = (
         Index("idx_sap_order_number", "order_number"),
@@ -50,6 +64,7 @@ class SAPCreditLimit(BaseModel):
     customer_code = Column(String(50), nullable=False, index=True)
     segment = Column(String(50), nullable=False)
     sap_data = Column(JSON, nullable=False)
+    content_hash = Column(String(64))
 
     __table_args__ = (
         Index("idx_sap_credit_customer_segment", "customer_code", "segment", unique=True),
@@ -57,6 +72,52 @@ class SAPCreditLimit(BaseModel):
     )
 
 
+class CreditScoreSnapshot(BaseModel):
+    """Score do cliente no fechamento de cada mês, calculado com os itens em aberto na KEYDATE do fim do mês"""
+
+    __tablename__ = "credit_score_snapshots"
+
+    customer_code = Column(String(50), nullable=False)
+    company_code = Column(String(10), nullable=False)
+    # Mês de referência (YYYY-MM) e a KEYDATE usada na consulta ao SAP (último dia do mês)
+    month = Column(String(7), nullable=False)
+    key_date = Column(Date, nullable=False)
+    # Versão do modelo (estatísticas + pesos); um modelo novo gera uma nova série, sem apagar a anterior
+    model_version = Column(String(64), nullable=False)
+    score = Column(Float, nullable=False)
+    probability_default = Column(Float, nullable=False)
+    metrics = Column(JSON, nullable=False)
+    content_hash = Column(String(64))
+
+    __table_args__ = (
+        # Série do dashboard numa consulta só: cliente + empresa + versão, meses em ordem
+        Index(
+            "idx_score_snapshot_series",
+            "customer_code",
+            "company_code",
+            "model_version",
+            "month",
+            unique=True,
+        ),
+    )
+
+
+class CreditModelStatistics(BaseModel):
+    """Versão das estatísticas globais do score (médias, desvios e quantis da carteira); a ativa é a usada"""
+
+    __tablename__ = "credit_model_statistics"
+
+    version = Column(String(32), unique=True, nullable=False)
+    # Campos de GlobalStatistics (mean_*/std_*) e quantis por variável (p01, p25, median, p75, p99, iqr)
+    statistics = Column(JSON, nullable=False)
+    quantiles = Column(JSON, nullable=False)
+    sample_size = Column(Integer, nullable=False)
+    # Mês dos snapshots usados como amostra da carteira
+    source_month = Column(String(7))
+
+    __table_args__ = (Index("idx_model_statistics_active", "is_active", "created_at"),)
+
+
 class SyncLog(BaseModel):
     __tablename__ = "sync_logs"
 
@@ -68,10 +129,48 @@ class SyncLog(BaseModel):
     records_created = Column(Integer, default=0)
     records_updated = Column(Integer, default=0)
     records_failed = Column(Integer, default=0)
+    records_unchanged = Column(Integer, default=0)
+    records_total = Column(Integer)
     error_message = Column(String(500))
     details = Column(JSON, default={})
+    job_id = Column(UUID(as_uuid=True), index=True)
+    # Mesma execução agendada em várias partições (sharding): um SyncLog por partição
+    run_id = Column(String(100), index=True)
+    # Último cliente gravado (commitado junto com os dados); uma execução interrompida é retomada dali
+    checkpoint = Column(String(50))
 
     __table_args__ = (
         Index("idx_sync_log_type_status", "sync_type", "status"),
         Index("idx_sync_log_dates", "started_at", "completed_at"),
     )
+
+
+class SyncJob(BaseModel):
+    """Sincronização pedida sob demanda; consumida pelos workers com SELECT ... FOR UPDATE SKIP LOCKED"""
+
+    __tablename__ = "sync_jobs"
+
+    sync_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    # Lista de códigos de cliente; None sincroniza todos
+    customer_codes = Column(JSON)
+    dedup_key = Column(String(100), nullable=False)
+    requested_by = Column(String(255))
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    worker_id = Column(String(100))
+    error_message = Column(String(500))
+
+    __table_args__ = (
+        Index("idx_sync_job_claim", "status", "run_after"),
+        # No máximo um job na fila por tipo + escopo: pedidos repetidos reaproveitam o existente
+        Index(
+            "idx_sync_job_queued_dedup",
+            "dedup_key",
+            unique=True,
+            postgresql_where=text("status = 'queued'"),
+        ),
+    )
@@ -1,5 +1,7 @@
 from supabase import create_client, Client
 from config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from deadline import budget
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,10 +21,26 @@ class SupabaseClient:
                 raise ValueError("Supabase URL and Service Key must be configured")
             
             self._client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+            self._client._init_postgrest_client = _init_postgrest_client_with_deadline
             logger.info("Supabase client initialized successfully")
         
         return self._client
 
+def _apply_deadline(request: httpx.Request):
+    """Limita o timeout de cada chamada ao PostgREST ao que resta do deadline da requisição"""
+    timeout = request.extensions.get("timeout", {})
+    request.extensions["timeout"] = {
+        phase: budget(value) if value is not None else None for phase, value in timeout.items()
+    }
+
+
+def _init_postgrest_client_with_deadline(*args, **kwargs):
+    # O supabase-py recria o cliente PostgREST em eventos de auth; o hook é instalado a cada criação
+    postgrest = Client._init_postgrest_client(*args, **kwargs)
+    hooks = postgrest.session.event_hooks
+    postgrest.session.event_hooks = {**hooks, "request": [*hooks.get("request", []), _apply_deadline]}
+    return postgrest
+
 # Global instance
 supabase_client = SupabaseClient()
 
@@ -1,9 +1,43 @@
-from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-from sqlalchemy import String, and_, func, or_
-from sqlalchemy.orm import Session
-from src.database.models import SAPCreditLimit, SAPCustomer, SAPSalesOrder, SyncLog
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import String, and_, func, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
+from src.database.models import (
+    CreditModelStatistics,
+    CreditScoreSnapshot,
+    SAPCreditLimit,
+    SAPCustomer,
+    SAPSalesOrder,
+    SyncJob,
+    SyncLog,
+)
+
+
+def project_sap_data(db: Session, model, sap_keys: Optional[Sequence[str]] = None) -> Query:
+    """
+    Monta a consulta de um modelo SAP carregando apenas as chaves pedidas de sap_data.
+
+    Sem sap_keys a entidade completa é carregada. Com sap_keys, as demais colunas são
+    selecionadas normalmente e sap_data é reconstruído no banco só com as chaves pedidas que
+    existem na linha, de forma que os formatadores continuam lendo row.sap_data (com os mesmos
+    padrões para chaves ausentes) sem trafegar o JSON inteiro.
+    """
+    if sap_keys is None:
+        return db.query(model)
+
+    columns = [getattr(model, column.key) for column in model.__table__.columns if column.key != "sap_data"]
+    # json_build_object devolveria null para as chaves ausentes; json_each só lista as presentes
+    entries = func.json_each(model.sap_data).table_valued("key", "value")
+    sap_data = (
+        select(func.json_object_agg(entries.c.key, entries.c.value, type_=model.sap_data.type))
+        .where(entries.c.key.in_(list(sap_keys)))
+        .scalar_subquery()
+    )
+
+    return db.query(*columns, sap_data.label("sap_data"))
 
 
 class CustomerRepository:
@@ -13,10 +47,10 @@ class CustomerRepository:
     def get_by_code(self, customer_code: str) -> Optional[SAPCustomer]:
         return self.db.query(SAPCustomer).filter_by(customer_code=customer_code, is_active=True).first()
 
-    def search(self, term: str, limit: int = 100) -> List[SAPCustomer]:
+    def search(self, term: str, limit: int = 100, sap_keys: Optional[Sequence[str]] = None) -> List[SAPCustomer]:
         search_term = f"%{term}%"
         return (
-            self.db.query(SAPCustomer)
+            project_sap_data(self.db, SAPCustomer, sap_keys)
             .filter(
                 and_(
                     SAPCustomer.is_active == True,
@@ -31,11 +65,27 @@ class CustomerRepository:
             .all()
         )
 
-    def get_all(self, offset: int = 0, limit: int = 100) -> List[SAPCustomer]:
-        return self.db.query(SAPCustomer).filter_by(is_active=True).offset(offset).limit(limit).all()
+    def get_page(
+        self, after_code: Optional[str] = None, limit: int = 100, sap_keys: Optional[Sequence[str]] = None
+    ) -> List[SAPCustomer]:
+        query = project_sap_data(self.db, SAPCustomer, sap_keys).filter(SAPCustomer.is_active == True)
+
+        if after_code is not None:
+            query = query.filter(SAPCustomer.customer_code > after_code)
+
+        return query.order_by(SAPCustomer.customer_code).limit(limit).all()
+
+    def get_estimated_count(self) -> Optional[int]:
+        row = self.db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": SAPCustomer.__tablename__},
+        ).first()
 
-    def get_total_count(self) -> int:
-        return self.db.query(SAPCustomer).filter_by(is_active=True).count()
+        # reltuples is -1 until the table is analyzed for the first time
+        if not row or row[0] is None or row[0] < 0:
+            return None
+
+        return int(row[0])
 
     def get_by_ids(self, customer_codes: List[str]) -> List[SAPCustomer]:
         return (
@@ -52,19 +102,25 @@ class SalesOrderRepository:
     def get_by_order_number(self, order_number: str) -> Optional[SAPSalesOrder]:
         return self.db.query(SAPSalesOrder).filter_by(order_number=order_number, is_active=True).first()
 
-    def get_by_customer(self, customer_code: str, limit: int = 100) -> List[SAPSalesOrder]:
+    def get_by_customer(
+        self, customer_code: str, limit: int = 100, sap_keys: Optional[Sequence[str]] = None
+    ) -> List[SAPSalesOrder]:
         return (
-            self.db.query(SAPSalesOrder)
-            .filter_by(customer_code=customer_code, is_active=True)
+            project_sap_data(self.db, SAPSalesOrder, sap_keys)
+            .filter(SAPSalesOrder.customer_code == customer_code, SAPSalesOrder.is_active == True)
             .order_by(SAPSalesOrder.document_date.desc())
             .limit(limit)
             .all()
         )
 
     def get_by_date_range(
-        self, start_date: datetime, end_date: datetime, customer_code: Optional[str] = None
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        customer_code: Optional[str] = None,
+        sap_keys: Optional[Sequence[str]] = None,
     ) -> List[SAPSalesOrder]:
-        query = self.db.query(SAPSalesOrder).filter(
+        query = project_sap_data(self.db, SAPSalesOrder, sap_keys).filter(
             and_(
                 SAPSalesOrder.is_active == True,
                 SAPSalesOrder.document_date >= start_date,
@@ -77,10 +133,10 @@ class SalesOrderRepository:
 
         return query.order_by(SAPSalesOrder.document_date.desc()).all()
 
-    def get_recent_orders(self, limit: int = 100) -> List[SAPSalesOrder]:
+    def get_recent_orders(self, limit: int = 100, sap_keys: Optional[Sequence[str]] = None) -> List[SAPSalesOrder]:
         return (
-            self.db.query(SAPSalesOrder)
-            .filter_by(is_active=True)
+            project_sap_data(self.db, SAPSalesOrder, sap_keys)
+            .filter(SAPSalesOrder.is_active == True)
             .order_by(SAPSalesOrder.created_at.desc())
             .limit(limit)
             .all()
@@ -98,26 +154,124 @@ class CreditLimitRepository:
             .first()
         )
 
-    def get_blocked_customers(self) -> List[SAPCreditLimit]:
+    def get_blocked_customers(self, sap_keys: Optional[Sequence[str]] = None) -> List[SAPCreditLimit]:
         return (
-            self.db.query(SAPCreditLimit)
+            project_sap_data(self.db, SAPCreditLimit, sap_keys)
             .filter(
                 and_(SAPCreditLimit.is_active == True, func.cast(SAPCreditLimit.sap_data["XBLOCKED"], String) == "X")
             )
             .all()
         )
 
-    def get_critical_customers(self) -> List[SAPCreditLimit]:
+    def get_critical_customers(self, sap_keys: Optional[Sequence[str]] = None) -> List[SAPCreditLimit]:
         return (
-            self.db.query(SAPCreditLimit)
+            project_sap_data(self.db, SAPCreditLimit, sap_keys)
             .filter(
                 and_(SAPCreditLimit.is_active == True, func.cast(SAPCreditLimit.sap_data["XCRITICAL"], String) == "X")
             )
             .all()
         )
 
-    def get_all_limits(self, limit: int = 100) -> List[SAPCreditLimit]:
-        return self.db.query(SAPCreditLimit).filter_by(is_active=True).limit(limit).all()
+    def get_all_limits(self, limit: int = 100, sap_keys: Optional[Sequence[str]] = None) -> List[SAPCreditLimit]:
+        return (
+            project_sap_data(self.db, SAPCreditLimit, sap_keys)
+            .filter(SAPCreditLimit.is_active == True)
+            .limit(limit)
+            .all()
+        )
+
+
+class ScoreSnapshotRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_series(
+        self, customer_code: str, company_code: str, model_version: str, since_month: str
+    ) -> List[CreditScoreSnapshot]:
+        """
+        Snapshots do cliente desde since_month (YYYY-MM), um por mês, em ordem. Prefere a versão
+        model_version; mês ainda não recalculado nela (logo após trocar as estatísticas) usa a anterior.
+        """
+        rows = (
+            self.db.query(CreditScoreSnapshot)
+            .filter(
+                CreditScoreSnapshot.customer_code == customer_code,
+                CreditScoreSnapshot.company_code == company_code,
+                CreditScoreSnapshot.month >= since_month,
+            )
+            .order_by(CreditScoreSnapshot.month, CreditScoreSnapshot.created_at)
+        )
+        months: Dict[str, CreditScoreSnapshot] = {}
+        for snapshot in rows:
+            current = months.get(snapshot.month)
+            if current is None or current.model_version != model_version:
+                months[snapshot.month] = snapshot
+        return list(months.values())
+
+    def get_month_metrics(self, customer_code: str, company_code: str) -> Dict[str, Tuple[Set[str], Dict[str, Any]]]:
+        """Por mês: versões do modelo com snapshot e as métricas do mês (iguais em todas as versões)"""
+        rows = self.db.query(
+            CreditScoreSnapshot.month, CreditScoreSnapshot.model_version, CreditScoreSnapshot.metrics
+        ).filter_by(customer_code=customer_code, company_code=company_code)
+
+        months: Dict[str, Tuple[Set[str], Dict[str, Any]]] = {}
+        for month, model_version, metrics in rows:
+            months.setdefault(month, (set(), metrics))[0].add(model_version)
+        return months
+
+    def iter_month_metrics(self, month: str, batch_size: int = 1000) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Métricas de todos os clientes no mês, uma vez por cliente e empresa (as versões do modelo
+        repetem as mesmas métricas). Lidas com cursor no servidor, em lotes de batch_size.
+        """
+        rows = (
+            self.db.query(
+                CreditScoreSnapshot.customer_code, CreditScoreSnapshot.company_code, CreditScoreSnapshot.metrics
+            )
+            .filter(CreditScoreSnapshot.month == month)
+            .order_by(CreditScoreSnapshot.customer_code, CreditScoreSnapshot.company_code)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        previous = None
+        for customer_code, company_code, metrics in rows:
+            if (customer_code, company_code) == previous:
+                continue
+            previous = (customer_code, company_code)
+            yield customer_code, company_code, metrics
+
+    def delete_other_versions(self, customer_codes: List[str], model_version: str) -> int:
+        """Remove os snapshots dos clientes em versões do modelo diferentes de model_version (sem commit)"""
+        if not customer_codes:
+            return 0
+        return (
+            self.db.query(CreditScoreSnapshot)
+            .filter(
+                CreditScoreSnapshot.customer_code.in_(customer_codes),
+                CreditScoreSnapshot.model_version != model_version,
+            )
+            .delete(synchronize_session=False)
+        )
+
+
+class ModelStatisticsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_active(self) -> Optional[CreditModelStatistics]:
+        return (
+            self.db.query(CreditModelStatistics)
+            .filter_by(is_active=True)
+            .order_by(CreditModelStatistics.created_at.desc())
+            .first()
+        )
+
+    def activate(self, statistics: CreditModelStatistics) -> CreditModelStatistics:
+        """Grava a versão nova como a ativa; as anteriores ficam no histórico, inativas"""
+        self.db.query(CreditModelStatistics).filter_by(is_active=True).update({"is_active": False})
+        statistics.is_active = True
+        self.db.add(statistics)
+        self.db.commit()
+        return statistics
 
 
 class SyncLogRepository:
@@ -135,6 +289,51 @@ class SyncLogRepository:
     def get_by_status(self, status: str, limit: int = 100) -> List[SyncLog]:
         return self.db.query(SyncLog).filter_by(status=status).order_by(SyncLog.started_at.desc()).limit(limit).all()
 
+    def get_by_job(self, job_id: UUID) -> Optional[SyncLog]:
+        return self.db.query(SyncLog).filter_by(job_id=job_id).order_by(SyncLog.started_at.desc()).first()
+
+    def get_by_runs(self, run_ids: List[str]) -> List[SyncLog]:
+        return self.db.query(SyncLog).filter(SyncLog.run_id.in_(run_ids)).order_by(SyncLog.started_at).all()
+
+    def get_recent_run_ids(self, sync_type: Optional[str] = None, limit: int = 20) -> List[str]:
+        started = func.max(SyncLog.started_at)
+        query = self.db.query(SyncLog.run_id).filter(SyncLog.run_id.isnot(None))
+
+        if sync_type:
+            query = query.filter_by(sync_type=sync_type)
+
+        return [run_id for (run_id,) in query.group_by(SyncLog.run_id).order_by(started.desc()).limit(limit)]
+
+    def get_previous_full_run(
+        self, sync_type: str, shard_index: Optional[int], exclude_id: UUID, limit: int = 100
+    ) -> Optional[SyncLog]:
+        """Última execução de todos os clientes (sem customer_codes) da mesma partição"""
+        recent = (
+            self.db.query(SyncLog)
+            .filter(SyncLog.sync_type == sync_type, SyncLog.id != exclude_id)
+            .order_by(SyncLog.started_at.desc())
+            .limit(limit)
+        )
+        for sync_log in recent:
+            details = sync_log.details or {}
+            if not details.get("customer_codes") and details.get("shard") == shard_index:
+                return sync_log
+        return None
+
+    def get_last_full_success(self, sync_type: str, shard_index: Optional[int], limit: int = 100) -> Optional[SyncLog]:
+        """Última execução concluída de todos os clientes que cobre a partição (a própria ou sem sharding)"""
+        recent = (
+            self.db.query(SyncLog)
+            .filter(SyncLog.sync_type == sync_type, SyncLog.status == "completed", SyncLog.completed_at.isnot(None))
+            .order_by(SyncLog.completed_at.desc())
+            .limit(limit)
+        )
+        for sync_log in recent:
+            details = sync_log.details or {}
+            if not details.get("customer_codes") and details.get("shard") in (None, shard_index):
+                return sync_log
+        return None
+
     def get_recent_logs(self, limit: int = 100) -> List[SyncLog]:
         return self.db.query(SyncLog).order_by(SyncLog.started_at.desc()).limit(limit).all()
 
@@ -149,3 +348,114 @@ class SyncLogRepository:
         running = query.filter_by(status="running").count()
 
         return {"completed": completed, "failed": failed, "running": running, "total": completed + failed + running}
+
+
+class SyncJobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, job_id: UUID) -> Optional[SyncJob]:
+        return self.db.query(SyncJob).filter_by(id=job_id).first()
+
+    def get_queued(self, dedup_key: str) -> Optional[SyncJob]:
+        return self.db.query(SyncJob).filter_by(dedup_key=dedup_key, status="queued").first()
+
+    def enqueue(
+        self,
+        sync_type: str,
+        dedup_key: str,
+        customer_codes: Optional[List[str]] = None,
+        requested_by: Optional[str] = None,
+    ) -> Tuple[SyncJob, bool]:
+        """Enfileira o job ou devolve o que já está na fila com o mesmo escopo; o bool indica se foi criado"""
+        existing = self.get_queued(dedup_key)
+        if existing:
+            return existing, False
+
+        job = SyncJob(
+            sync_type=sync_type,
+            status="queued",
+            dedup_key=dedup_key,
+            customer_codes=customer_codes,
+            requested_by=requested_by,
+        )
+        self.db.add(job)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Outro pedido igual entrou entre a consulta e o insert (índice único parcial)
+            self.db.rollback()
+            existing = self.get_queued(dedup_key)
+            if existing is None:
+                raise
+            return existing, False
+
+        return job, True
+
+    def count_queued(self) -> Dict[str, int]:
+        """Jobs na fila por tipo de sync"""
+        rows = (
+            self.db.query(SyncJob.sync_type, func.count(SyncJob.id))
+            .filter_by(status="queued")
+            .group_by(SyncJob.sync_type)
+        )
+        return {sync_type: count for sync_type, count in rows}
+
+    def claim_next(self, worker_id: str, stale_after: float, max_attempts: int) -> Optional[SyncJob]:
+        """
+        Reserva o próximo job: da fila ou "running" sem heartbeat há stale_after segundos (worker morto).
+        Com SKIP LOCKED, consumidores concorrentes nunca pegam o mesmo job.
+        """
+        now = datetime.utcnow()
+        stale = and_(SyncJob.status == "running", SyncJob.heartbeat_at < now - timedelta(seconds=stale_after))
+
+        # Abandonados que já esgotaram as tentativas não voltam mais
+        self.db.query(SyncJob).filter(stale, SyncJob.attempts >= max_attempts).update(
+            {"status": "failed", "completed_at": now, "error_message": "Worker stopped responding"},
+            synchronize_session=False,
+        )
+
+        job = (
+            self.db.query(SyncJob)
+            .filter(or_(and_(SyncJob.status == "queued", SyncJob.run_after <= now), stale))
+            .order_by(SyncJob.run_after)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+
+        if job:
+            job.status = "running"
+            job.attempts += 1
+            job.worker_id = worker_id
+            job.started_at = now
+            job.heartbeat_at = now
+
+        self.db.commit()
+        return job
+
+    def heartbeat(self, job_id: UUID):
+        self.db.query(SyncJob).filter_by(id=job_id).update({"heartbeat_at": datetime.utcnow()})
+        self.db.commit()
+
+    def finish(self, job_id: UUID, status: str, error_message: Optional[str] = None):
+        self.db.query(SyncJob).filter_by(id=job_id).update(
+            {"status": status, "completed_at": datetime.utcnow(), "error_message": error_message}
+        )
+        self.db.commit()
+
+    def requeue(self, job_id: UUID, delay: float):
+        """Devolve o job para a fila, para ser tentado de novo depois de delay segundos"""
+        # Não conta como tentativa: o job nem chegou a rodar ou parou pelo desligamento do processo
+        values = {
+            "status": "queued",
+            "run_after": datetime.utcnow() + timedelta(seconds=delay),
+            "worker_id": None,
+            "attempts": SyncJob.attempts - 1,
+        }
+        try:
+            self.db.query(SyncJob).filter_by(id=job_id).update(values)
+            self.db.commit()
+        except IntegrityError:
+            # Já há um pedido igual na fila; este pode ser encerrado
+            self.db.rollback()
+            self.finish(job_id, "deduplicated")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Header, Request
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional
 import os
@@ -162,7 +162,7 @@ async def login(login_data: LoginRequest):
         logger.info(f"Login bem-sucedido para: {login_data.email}")
 
         # Criar resposta com cookies
-        response = JSONResponse(content=session_data)
+        response = ORJSONResponse(content=session_data)
 
         # Definir cookies seguros
         response.set_cookie(
@@ -248,7 +248,7 @@ async def logout(request: Request, authorization: Optional[str] = Header(None)):
         logger.info("Processando logout")
 
         # Criar resposta que limpa cookies
-        response = JSONResponse(content={"success": True, "message": "Logout realizado com sucesso"})
+        response = ORJSONResponse(content={"success": True, "message": "Logout realizado com sucesso"})
 
         # Limpar cookies
         cookies_to_clear = [
@@ -266,7 +266,7 @@ async def logout(request: Request, authorization: Optional[str] = Header(None)):
 
     except Exception as e:
         logger.error(f"Erro no logout: {e}")
-        response = JSONResponse(content={"success": True, "message": "Sessão finalizada"})
+        response = ORJSONResponse(content={"success": True, "message": "Sessão finalizada"})
         for cookie_name in ["sb-access-token", "sb-refresh-token"]:
             response.delete_cookie(cookie_name, path="/")
         return response
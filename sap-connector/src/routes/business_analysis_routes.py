@@ -2,7 +2,7 @@
 Rotas para análise de negócios
 """
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 from typing import Optional, List
 import logging
@@ -21,12 +21,12 @@ async def get_user_company_id(user_id: str, current_user: str = Depends(verify_t
         response = supabase.table('user_profile').select('company_id').eq('logged_id', user_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data.get('company_id')
             })
         else:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": None
             })
@@ -44,12 +44,12 @@ async def get_corporate_group_id(company_id: int, current_user: str = Depends(ve
         response = supabase.table('company').select('corporate_group_id').eq('id', company_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data.get('corporate_group_id')
             })
         else:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": None
             })
@@ -66,7 +66,7 @@ async def list_companies_by_corporate_group(corporate_group_id: int, current_use
         
         response = supabase.table('company').select('id').eq('corporate_group_id', corporate_group_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -84,12 +84,12 @@ async def get_customer_by_id(customer_id: int, current_user: str = Depends(verif
         response = supabase.table('customer').select('*').eq('id', customer_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data
             })
         else:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": None
             })
@@ -107,12 +107,12 @@ async def get_address_by_id(address_id: int, current_user: str = Depends(verify_
         response = supabase.table('address').select('*').eq('id', address_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data
             })
         else:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": None
             })
@@ -129,7 +129,7 @@ async def get_companies_by_corporate_group(corporate_group_id: int, current_user
         
         response = supabase.table('company').select('id').eq('corporate_group_id', corporate_group_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -169,7 +169,7 @@ async def get_sales_orders(
         orders = orders_result.data
         
         if not orders:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": []
             })
@@ -208,7 +208,7 @@ async def get_sales_orders(
                 "invoices": order_invoices
             })
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": orders_with_invoices
         })
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 from typing import Optional, Dict, Any
 import logging
@@ -23,7 +23,7 @@ async def get_company_by_id(company_id: str, current_user: str = Depends(verify_
         ).eq('id', company_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data
             })
@@ -52,7 +52,7 @@ async def update_company(company_id: str, request: Request, current_user: str =
             company_data
         ).eq('id', company_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Empresa atualizada com sucesso"
         })
@@ -83,7 +83,7 @@ async def create_company(request: Request, current_user: str = Depends(verify_to
         ).execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data[0]
             })
@@ -115,7 +115,7 @@ async def update_address(address_id: str, request: Request, current_user: str =
             address_data
         ).eq('id', address_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Endereço atualizado com sucesso"
         })
@@ -146,7 +146,7 @@ async def create_address(request: Request, current_user: str = Depends(verify_to
         ).execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data[0]
             })
@@ -173,7 +173,7 @@ async def get_corporate_group_id(company_id: str, current_user: str = Depends(ve
         ).eq('id', company_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data.get('corporate_group_id')
             })
@@ -196,7 +196,7 @@ async def list_companies_by_corporate_group(corporate_group_id: str, current_use
             'id, name'
         ).eq('corporate_group_id', corporate_group_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -222,7 +222,7 @@ async def get_monthly_billing(corporate_group_id: str, customer_id: Optional[str
             
         response = query.execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
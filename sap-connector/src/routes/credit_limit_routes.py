@@ -2,7 +2,7 @@
 Rotas para gerenciamento de limites de crédito
 """
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 from typing import Optional
 import logging
@@ -49,7 +49,7 @@ async def get_credit_limit_requests(
         
         result = query.execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": result.data
         })
@@ -73,7 +73,7 @@ async def create_credit_limit_request(request: Request, current_user: str = Depe
         result = supabase.table('credit_limit_request').insert([request_data]).execute()
         
         if result.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": result.data[0]
             })
@@ -102,7 +102,7 @@ async def update_credit_limit_request(request_id: int, request: Request, current
         result = supabase.table('credit_limit_request').update(request_data).eq('id', request_id).execute()
         
         if result.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": result.data[0]
             })
@@ -126,7 +126,7 @@ async def delete_credit_limit_request(request_id: int, current_user: str = Depen
         
         result = supabase.table('credit_limit_request').delete().eq('id', request_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Solicitação deletada com sucesso"
         })
@@ -153,7 +153,7 @@ async def get_calculated_credit_limit(customer_id: int, current_user: str = Depe
         credit_limits_id = customer_data.get('credit_limits_id')
         
         if not credit_limits_id:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": None
             })
@@ -162,13 +162,13 @@ async def get_calculated_credit_limit(customer_id: int, current_user: str = Depe
         credit_limit_result = supabase.table('credit_limit_amount').select('credit_limit_calc').eq('id', credit_limits_id).execute()
         
         if not credit_limit_result.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": None
             })
         
         credit_limit_data = credit_limit_result.data[0]
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": credit_limit_data.get('credit_limit_calc')
         })
@@ -199,7 +199,7 @@ async def get_credit_limit_dashboard(
         
         response = query.execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
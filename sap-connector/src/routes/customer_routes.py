@@ -2,7 +2,7 @@
 Rotas para gerenciamento de clientes
 """
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 from typing import Optional
 import logging
@@ -20,7 +20,7 @@ async def get_customer_credit_limits(customer_id: int, current_user: str = Depen
         supabase = get_supabase()
         
         if not customer_id:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": None
             })
@@ -29,7 +29,7 @@ async def get_customer_credit_limits(customer_id: int, current_user: str = Depen
         customer_result = supabase.table('customer').select('credit_limits_id').eq('id', customer_id).single().execute()
         
         if not customer_result.data or not customer_result.data.get('credit_limits_id'):
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": {
                     "creditLimitsId": None,
@@ -46,7 +46,7 @@ async def get_customer_credit_limits(customer_id: int, current_user: str = Depen
         
         if credit_limit_result.data:
             data = credit_limit_result.data
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": {
                     "creditLimitsId": data.get('id'),
@@ -56,7 +56,7 @@ async def get_customer_credit_limits(customer_id: int, current_user: str = Depen
                 }
             })
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": {
                 "creditLimitsId": None,
@@ -89,7 +89,7 @@ async def update_customer_credit_limits(customer_id: int, request: Request, curr
             # Atualiza limite existente
             credit_limits_id = customer_result.data['credit_limits_id']
             result = supabase.table('credit_limit_amount').update(limit_data).eq('id', credit_limits_id).execute()
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": result.data
             })
@@ -100,7 +100,7 @@ async def update_customer_credit_limits(customer_id: int, request: Request, curr
                 new_limit_id = new_limit_result.data[0]['id']
                 # Atualiza o cliente com o novo credit_limits_id
                 supabase.table('customer').update({'credit_limits_id': new_limit_id}).eq('id', customer_id).execute()
-                return JSONResponse(content={
+                return ORJSONResponse(content={
                     "success": True,
                     "data": new_limit_result.data
                 })
@@ -134,7 +134,7 @@ async def get_customers_by_company_group(user_company_id: int, current_user: str
         # Busca clientes das empresas do grupo
         customers_result = supabase.table('customer').select('id, name, company_code').in_('company_id', company_ids).order('name', desc=False).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": customers_result.data
         })
@@ -153,7 +153,7 @@ async def get_customer_by_id(customer_id: int, current_user: str = Depends(verif
         
         result = supabase.table('customer').select('*').eq('id', customer_id).single().execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": result.data if result.data else None
         })
@@ -170,7 +170,7 @@ async def list_customers(current_user: str = Depends(verify_token)):
         
         result = supabase.table('customer').select('id, name').order('name', desc=False).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": result.data
         })
@@ -196,7 +196,7 @@ async def get_customer_details(customer_id: int, current_user: str = Depends(ver
             address:addr_id(*)
         """).eq('id', customer_id).single().execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": result.data if result.data else None
         })
@@ -222,7 +222,7 @@ async def get_customer_details_with_address(customer_id: int, current_user: str
             address:addr_id(*)
         """).eq('id', customer_id).single().execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": result.data if result.data else None
         })
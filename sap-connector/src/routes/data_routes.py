@@ -1,44 +1,66 @@
+import logging
 from datetime import datetime
 from typing import List, Optional
+from uuid import UUID
 
 from auth import verify_token
+from config import SCORE_SNAPSHOT_MONTHS
 from fastapi import APIRouter, Depends, HTTPException, Query
-from metrics import monitor_request_duration
+from json_response import ORJSONResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from src.database.connection import get_db
+from src.repository.sap_repository import ScoreSnapshotRepository
 from src.schemas.credit import (
     BatchCalculationRequest,
     CreditCalculationRequest,
-    GlobalStatistics,
     ModelParameters,
     ModelWeights,
 )
+from src.schemas.sync import SyncTriggerRequest
 from src.services.credit_service import (
     build_dashboard_response,
     calculate_batch_credit_scores,
     calculate_credit_score,
     calculate_ks_statistics,
     get_customer_data_from_sap_with_historical,
+    month_end_key_dates,
+    score_model_version,
 )
 from src.services.data_service import DataService
+from src.services.model_statistics import get_active_statistics
+from src.services.sync_progress_service import collect_sync_progress
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
 @router.get("/customers")
 async def get_all_customers(
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None),
+    include_raw: bool = Query(False),
+    include_total: bool = Query(False),
+    fields: Optional[str] = Query(None),
     current_user: str = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
     service = DataService(db)
+    selected_fields = _parse_fields(fields)
 
+    # Listagens devolvem ORJSONResponse direto: um dict retornado passaria antes pelo jsonable_encoder
     if search:
-        return service.search_customers(search)
+        return ORJSONResponse(service.search_customers(search, fields=selected_fields, include_raw=include_raw))
     else:
-        return service.get_all_customers(offset, limit)
+        return ORJSONResponse(service.get_all_customers(cursor, limit, include_raw, include_total, selected_fields))
 
 
 @router.get("/customers/{customer_code}")
@@ -55,11 +77,13 @@ async def get_customer(
 async def search_customers(
     term: str,
     limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Query(None),
+    include_raw: bool = Query(False),
     current_user: str = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
     service = DataService(db)
-    return service.search_customers(term, limit)
+    return ORJSONResponse(service.search_customers(term, limit, _parse_fields(fields), include_raw))
 
 
 @router.get("/customers/{customer_code}/full")
@@ -78,11 +102,15 @@ async def get_sales_orders(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Query(None),
+    include_raw: bool = Query(False),
     current_user: str = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
     service = DataService(db)
-    return service.get_sales_orders(customer_code, start_date, end_date, limit)
+    return ORJSONResponse(
+        service.get_sales_orders(customer_code, start_date, end_date, limit, _parse_fields(fields), include_raw)
+    )
 
 
 @router.get("/sales-orders/{order_number}")
@@ -100,17 +128,20 @@ async def get_all_credit_limits(
     limit: int = Query(100, ge=1, le=500),
     blocked_only: bool = Query(False),
     critical_only: bool = Query(False),
+    fields: Optional[str] = Query(None),
+    include_raw: bool = Query(False),
     current_user: str = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
     service = DataService(db)
+    selected_fields = _parse_fields(fields)
 
     if blocked_only:
-        return service.get_blocked_customers()
+        return ORJSONResponse(service.get_blocked_customers(selected_fields, include_raw))
     elif critical_only:
-        return service.get_critical_customers()
+        return ORJSONResponse(service.get_critical_customers(selected_fields, include_raw))
     else:
-        return service.get_all_credit_limits(limit)
+        return ORJSONResponse(service.get_all_credit_limits(limit, selected_fields, include_raw))
 
 
 @router.get("/credit-limits/{customer_code}")
@@ -146,9 +177,41 @@ async def get_sync_logs(
     return service.get_sync_logs(sync_type, status, limit)
 
 
-@router.post("/sync/trigger/{sync_type}")
-async def trigger_sync(sync_type: str, current_user: str = Depends(verify_token)):
-    valid_types = ["customers", "sales_orders", "credit_limits"]
+@router.get("/sync/progress")
+async def get_sync_progress(current_user: str = Depends(verify_token)):
+    """Vazão, latências, filas e último sucesso por tipo, lidos das métricas dos workers"""
+    return await collect_sync_progress()
+
+
+@router.get("/sync/runs")
+async def get_sync_runs(
+    sync_type: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: str = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    service = DataService(db)
+    return service.get_sync_runs(sync_type, limit)
+
+
+@router.get("/sync/runs/{run_id}")
+async def get_sync_run(
+    run_id: str,
+    current_user: str = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    service = DataService(db)
+    return service.get_sync_run(run_id)
+
+
+@router.post("/sync/trigger/{sync_type}", status_code=202)
+async def trigger_sync(
+    sync_type: str,
+    request: Optional[SyncTriggerRequest] = None,
+    current_user: str = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    valid_types = ["customers", "sales_orders", "credit_limits", "score_snapshots"]
 
     if sync_type not in valid_types:
         raise HTTPException(
@@ -156,11 +219,22 @@ async def trigger_sync(sync_type: str, current_user: str = Depends(verify_token)
             detail=f"Invalid sync type. Must be one of: {', '.join(valid_types)}",
         )
 
-    return {"message": f"Sync triggered for {sync_type}", "status": "initiated"}
+    service = DataService(db)
+    job = service.enqueue_sync(sync_type, request.customer_codes if request else None, current_user)
+    return {"message": f"Sync queued for {sync_type}", **job}
+
+
+@router.get("/sync/jobs/{job_id}")
+async def get_sync_job(
+    job_id: UUID,
+    current_user: str = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    service = DataService(db)
+    return service.get_sync_job(job_id)
 
 
 @router.post("/credit/calculate")
-@monitor_request_duration()
 async def calculate_credit_limit(request: CreditCalculationRequest, current_user: str = Depends(verify_token)):
     """Calculate credit limit for a single customer"""
     try:
@@ -171,7 +245,6 @@ async def calculate_credit_limit(request: CreditCalculationRequest, current_user
 
 
 @router.post("/credit/batch")
-@monitor_request_duration()
 async def calculate_batch_credit_limits(request: BatchCalculationRequest, current_user: str = Depends(verify_token)):
     """Calculate credit limits for multiple customers"""
     try:
@@ -182,7 +255,6 @@ async def calculate_batch_credit_limits(request: BatchCalculationRequest, curren
 
 
 @router.post("/credit/ks")
-@monitor_request_duration()
 async def calculate_ks_statistics_router(clients_data: List[dict], current_user: str = Depends(verify_token)):
     """Calculate KS statistics for model performance evaluation"""
     if not clients_data:
@@ -202,21 +274,29 @@ async def calculate_ks_statistics_router(clients_data: List[dict], current_user:
 @router.get("/credit/statistics")
 async def get_credit_statistics(current_user: str = Depends(verify_token)):
     """Get current model statistics and parameters"""
-    stats = GlobalStatistics()
+    model = get_active_statistics()
     weights = ModelWeights()
     params = ModelParameters()
 
     return {
-        "global_statistics": stats.dict(),
+        "version": model.version,
+        "model_version": score_model_version(model, weights),
+        "sample_size": model.sample_size,
+        "global_statistics": model.statistics.dict(),
+        "quantiles": model.quantiles,
         "model_weights": weights.dict(),
         "model_parameters": params.dict(),
-        "last_update": datetime.now().isoformat(),
+        "last_update": model.computed_at.isoformat() if model.computed_at else None,
     }
 
 
 @router.get("/credit/dashboard/{customer}")
-@monitor_request_duration()
-async def get_credit_dashboard(customer: str, company_code: str = "1000", current_user: str = Depends(verify_token)):
+async def get_credit_dashboard(
+    customer: str,
+    company_code: str = "1000",
+    current_user: str = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
     """Get comprehensive dashboard with performance metrics and credit analysis"""
     try:
         historical_data = await get_customer_data_from_sap_with_historical(customer, company_code)
@@ -224,7 +304,21 @@ async def get_credit_dashboard(customer: str, company_code: str = "1000", curren
         calc_request = CreditCalculationRequest(customer=customer, company_code=company_code)
         credit_result = await calculate_credit_score(calc_request)
 
-        dashboard = build_dashboard_response(customer, credit_result, historical_data)
+        # Score dos meses fechados vem dos snapshots do worker, sem recalcular o histórico aqui
+        model_version = score_model_version(get_active_statistics(), ModelWeights())
+        since_month = month_end_key_dates(SCORE_SNAPSHOT_MONTHS)[0].strftime("%Y-%m")
+        try:
+            snapshots = ScoreSnapshotRepository(db).get_series(
+                customer.zfill(10), company_code, model_version, since_month
+            )
+            score_history = {snapshot.month: snapshot.score for snapshot in snapshots}
+        except SQLAlchemyError as e:
+            # Sem banco o dashboard continua com o score atual, só sem a série histórica
+            logger.warning(f"Snapshots de score indisponíveis para {customer}: {e}")
+            db.rollback()
+            score_history = {}
+
+        dashboard = build_dashboard_response(customer, credit_result, historical_data, score_history)
         return dashboard
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -6,7 +6,7 @@ import logging
 from typing import Dict, Any
 
 from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from fastapi import Depends
 from auth import verify_token
 
@@ -39,7 +39,7 @@ async def save_invoices(request_data: InvoiceBulkRequest, current_user: str = De
         
         result = await invoice_service.save_invoices(request_data)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": result.get("success", False),
             "message": f"Processadas {result.get('processed', 0)} faturas com {result.get('errors', 0)} erros",
             "data": result
@@ -65,7 +65,7 @@ async def update_invoice_status(request_data: InvoiceStatusUpdate, current_user:
         
         result = await invoice_service.update_invoice_status(request_data.invoiceIds)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": result.get("success", False),
             "message": result.get("message", ""),
             "data": result
@@ -92,7 +92,7 @@ async def update_invoice(invoice_id: str, update_data: InvoiceUpdate, current_us
         
         result = await invoice_service.update_invoice_details(invoice_id, update_data)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": result.get("success", False),
             "message": result.get("message", ""),
             "data": result
@@ -118,7 +118,7 @@ async def update_customer_cnpj(request_data: CustomerCNPJUpdate, current_user: s
         
         result = await invoice_service.update_customer_cnpj(request_data.invoiceId, request_data.cnpj)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": result.get("success", False),
             "message": result.get("message", ""),
             "data": result
@@ -2,7 +2,7 @@
 Rotas para dados de lookup (classificação, meio de pagamento, etc.)
 """
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 import logging
 from fastapi import Depends
@@ -19,7 +19,7 @@ async def get_classifications(current_user: str = Depends(verify_token)):
         
         response = supabase.table('silim_classificacao').select('id, name').order('name').execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -36,7 +36,7 @@ async def get_payment_methods(current_user: str = Depends(verify_token)):
         
         response = supabase.table('silim_meio_pgto').select('id, name').order('name').execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -2,7 +2,7 @@
 Rotas para gerenciamento de pedidos e faturas
 """
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 import logging
 from fastapi import Depends
@@ -19,7 +19,7 @@ async def get_order_details(current_user: str = Depends(verify_token)):
         
         response = supabase.table('vw_detalhes_pedidos_faturas').select('*').order('pedido_data', desc=True).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
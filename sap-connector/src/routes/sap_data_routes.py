@@ -2,7 +2,7 @@
 Rotas para operações SAP (Sales Orders, Invoices, etc.)
 """
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 import logging
 import json
@@ -67,7 +67,7 @@ async def query_data(params: TableQueryParams):
         else:
             response = query.execute()
             
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -90,7 +90,7 @@ async def insert_data(params: TableModifyParams):
         
         response = supabase.table(params.table).insert(params.data).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -113,7 +113,7 @@ async def update_data(params: TableModifyParams):
         
         response = query.execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -136,7 +136,7 @@ async def delete_data(params: TableModifyParams):
         
         response = query.execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True
         })
         
@@ -155,7 +155,7 @@ async def upsert_data(params: TableModifyParams):
             on_conflict=params.on_conflict or "id"
         ).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -181,7 +181,7 @@ async def upsert_sap_sales_orders(request: Request):
             on_conflict='sap_order_number'
         ).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": f"Upsert de {len(orders_data)} pedidos realizado com sucesso"
         })
@@ -207,7 +207,7 @@ async def upsert_sap_sales_order_items(request: Request):
             on_conflict='sap_order_number,item_number'
         ).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": f"Upsert de {len(items_data)} itens realizado com sucesso"
         })
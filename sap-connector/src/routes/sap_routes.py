@@ -8,8 +8,7 @@ from config import ACCESS_TOKEN_EXPIRE_MINUTES, GOOGLE_CLIENT_ID, GOOGLE_CLIENT_
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from metrics import monitor_request_duration
-from sap_client import call_sap, get_token
+from sap_client import get_token, sap_passthrough
 from src.services.sap_service import (
     get_bank_data,
     get_invoice_details,
@@ -507,53 +506,38 @@ async def debug_google_oauth(request: Request):
 
 
 @router.post("/cpi/ZBAPI_AR_ACC_GETOPENITEMS_V2")
-@monitor_request_duration()
 async def zbapi_ar_acc_getopenitems_v2(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZBAPI_AR_ACC_GETOPENITEMS_V2", data)
+    return await sap_passthrough("ZBAPI_AR_ACC_GETOPENITEMS_V2", await request.body())
 
 
 @router.post("/cpi/ZBAPI_WEBINVOICE_GETLIST2")
-@monitor_request_duration()
 async def zbapi_webinvoice_getlist2(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZBAPI_WEBINVOICE_GETLIST2", data)
+    return await sap_passthrough("ZBAPI_WEBINVOICE_GETLIST2", await request.body())
 
 
 @router.post("/cpi/ZBAPI_AR_ACC_GETOPENITEMS")
-@monitor_request_duration()
 async def zbapi_ar_acc_getopenitems(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZBAPI_AR_ACC_GETOPENITEMS", data)
+    return await sap_passthrough("ZBAPI_AR_ACC_GETOPENITEMS", await request.body())
 
 
 @router.post("/cpi/ZFIN_AP_AR_GET_BANK")
-@monitor_request_duration()
 async def zfin_ap_ar_get_bank(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZFIN_AP_AR_GET_BANK", data)
+    return await sap_passthrough("ZFIN_AP_AR_GET_BANK", await request.body())
 
 
 @router.post("/cpi/ZDETALHES_FATURA")
-@monitor_request_duration()
 async def zdetalhes_fatura(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZDETALHES_FATURA", data)
+    return await sap_passthrough("ZDETALHES_FATURA", await request.body())
 
 
 @router.post("/cpi/ZFATURA_PARC2")
-@monitor_request_duration()
 async def zfatura_parc2(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZFATURA_PARC2", data)
+    return await sap_passthrough("ZFATURA_PARC2", await request.body())
 
 
 @router.post("/cpi/ZBAPI_AP_ACC_GETOPENITEMS")
-@monitor_request_duration()
 async def zbapi_ap_acc_getopenitems(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    print(data)
-    return await call_sap("ZBAPI_AP_ACC_GETOPENITEMS", data)
+    return await sap_passthrough("ZBAPI_AP_ACC_GETOPENITEMS", await request.body())
 
 
 @router.get("/Invoice/{vendor}/{company_code}/{date}")
@@ -581,119 +565,85 @@ async def dados_bancarios(request: Request, vendor: str, current_user: str = Dep
 
 
 @router.post("/cpi/ZCHANGEDOCU_CDPOS_READ_V2")
-@monitor_request_duration()
 async def zchangedocu_cdpos_read_v2(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZCHANGEDOCU_CDPOS_READ_V2", data)
+    return await sap_passthrough("ZCHANGEDOCU_CDPOS_READ_V2", await request.body())
 
 
 @router.post("/cpi/ZBAPI_BUPA_TAX_PAR_GET_DETAIL")
-@monitor_request_duration()
 async def zbapi_bupa_tax_par_get_detail(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZBAPI_BUPA_TAX_PAR_GET_DETAIL", data)
+    return await sap_passthrough("ZBAPI_BUPA_TAX_PAR_GET_DETAIL", await request.body())
 
 
 @router.post("/cpi/ZCADASTRA_DADOS_BANC")
-@monitor_request_duration()
 async def zcadastra_dados_banc(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZCADASTRA_DADOS_BANC", data)
+    return await sap_passthrough("ZCADASTRA_DADOS_BANC", await request.body())
 
 
 @router.post("/cpi/ZVENDOR_UPDATE")
-@monitor_request_duration()
 async def zvendor_update(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZVENDOR_UPDATE", data)
+    return await sap_passthrough("ZVENDOR_UPDATE", await request.body())
 
 
 @router.post("/cpi/ZFI_DOCUMENT_CHANGE")
-@monitor_request_duration()
 async def zfi_document_change(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZFI_DOCUMENT_CHANGE", data)
+    return await sap_passthrough("ZFI_DOCUMENT_CHANGE", await request.body())
 
 
 @router.post("/cpi/BBP_VENDOR_GETLIST")
-@monitor_request_duration()
 async def bbp_vendor_getlist(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("BBP_VENDOR_GETLIST", data)
+    return await sap_passthrough("BBP_VENDOR_GETLIST", await request.body())
 
 
 @router.post("/cpi/ZGET_VENDOR_DETAILS")
-@monitor_request_duration()
 async def zget_vendor_details(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZGET_VENDOR_DETAILS", data)
+    return await sap_passthrough("ZGET_VENDOR_DETAILS", await request.body())
 
 
 @router.post("/cpi/FIN_AP_AR_GET_BANK")
-@monitor_request_duration()
 async def fin_ap_ar_get_bank(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("FIN_AP_AR_GET_BANK", data)
+    return await sap_passthrough("FIN_AP_AR_GET_BANK", await request.body())
 
 
 @router.post("/cpi/BAPI_VENDOR_CREATE")
-@monitor_request_duration()
 async def bapi_vendor_create(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("BAPI_VENDOR_CREATE", data)
+    return await sap_passthrough("BAPI_VENDOR_CREATE", await request.body())
 
 
 @router.post("/cpi/ZBAPI_AR_ACC_GETOPENITEMS2")
-@monitor_request_duration()
 async def zbapi_ar_acc_getopenitems2(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZBAPI_AR_ACC_GETOPENITEMS2", data)
+    return await sap_passthrough("ZBAPI_AR_ACC_GETOPENITEMS2", await request.body())
 
 
 @router.post("/cpi/ZFI_F4_ZTERM")
-@monitor_request_duration()
 async def zfi_f4_zterm(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZFI_F4_ZTERM", data)
+    return await sap_passthrough("ZFI_F4_ZTERM", await request.body())
 
 
 @router.post("/cpi/BAPI_CUSTOMER_GETLIST")
-@monitor_request_duration()
 async def bapi_customer_getlist(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("BAPI_CUSTOMER_GETLIST", data)
+    return await sap_passthrough("BAPI_CUSTOMER_GETLIST", await request.body())
 
 
 @router.post("/cpi/BAPI_SALESORDER_GETLIST")
-@monitor_request_duration()
 async def bapi_salesorder_getlist(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("BAPI_SALESORDER_GETLIST", data)
+    return await sap_passthrough("BAPI_SALESORDER_GETLIST", await request.body())
 
 
 @router.post("/cpi/BAPI_WEBINVOICE_GETLIST")
-@monitor_request_duration()
 async def bapi_webinvoice_getlist(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("BAPI_WEBINVOICE_GETLIST", data)
+    return await sap_passthrough("BAPI_WEBINVOICE_GETLIST", await request.body())
 
 
 @router.post("/cpi/BAPI_WEBINVOICE_GETDETAIL")
-@monitor_request_duration()
 async def bapi_webinvoice_getdetail(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("BAPI_WEBINVOICE_GETDETAIL", data)
+    return await sap_passthrough("BAPI_WEBINVOICE_GETDETAIL", await request.body())
 
 
 @router.post("/cpi/ZUKM_DB_UKMBP_CMS_EXECUTE")
-@monitor_request_duration()
 async def zukm_db_ukmbp_cms_execute(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZUKM_DB_UKMBP_CMS_EXECUTE", data)
+    return await sap_passthrough("ZUKM_DB_UKMBP_CMS_EXECUTE", await request.body())
 
 
 @router.post("/cpi/ZUKM_DB_UKMBP_CMS_SGM_READ")
-@monitor_request_duration()
 async def zukm_db_ukmbp_cms_sgm_read(request: Request, current_user: str = Depends(verify_token)):
-    data = await request.json()
-    return await call_sap("ZUKM_DB_UKMBP_CMS_SGM_READ", data)
+    return await sap_passthrough("ZUKM_DB_UKMBP_CMS_SGM_READ", await request.body())
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 import logging
 import re
@@ -60,7 +60,7 @@ async def upload_file(
                 except:
                     response_data = {"path": clean_path}
                 
-                return JSONResponse(content={
+                return ORJSONResponse(content={
                     "success": True,
                     "data": response_data,
                     "path": clean_path,
@@ -85,7 +85,7 @@ async def upload_file(
         else:
             result_data = {"path": clean_path}
             
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": result_data,
             "path": clean_path,
@@ -115,7 +115,7 @@ async def get_public_url(bucket: str, path: str, current_user: str = Depends(ver
         elif isinstance(response, dict):
             public_url = response.get('publicUrl')
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": {
                 "publicUrl": public_url
@@ -140,7 +140,7 @@ async def remove_file(bucket: str, path: str, current_user: str = Depends(verify
         if hasattr(response, 'error') and response.error:
             raise HTTPException(status_code=400, detail=response.error.message)
             
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Arquivo removido com sucesso"
         })
@@ -163,7 +163,7 @@ async def list_files(bucket: str, path: str = "", current_user: str = Depends(ve
         if hasattr(response, 'error') and response.error:
             raise HTTPException(status_code=400, detail=response.error.message)
             
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data if hasattr(response, 'data') else response
         })
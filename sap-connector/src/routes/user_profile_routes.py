@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 import logging
 import json
@@ -22,7 +22,7 @@ async def get_current_user_profile(user_id: str, current_user: str = Depends(ver
         ).eq('logged_id', user_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data
             })
@@ -51,7 +51,7 @@ async def upsert_user_profile(request: Request, current_user: str = Depends(veri
             profile_data
         ).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Perfil atualizado com sucesso"
         })
@@ -75,7 +75,7 @@ async def get_roles(company_id: str, current_user: str = Depends(verify_token)):
             '*'
         ).eq('company_id', company_id).order('name').execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -96,7 +96,7 @@ async def list_user_profiles(company_id: str, current_user: str = Depends(verify
             '*, user_role:role_id(id, name), company:company_id(id, name)'
         ).eq('company_id', company_id).order('name', desc=False).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -117,7 +117,7 @@ async def delete_user_profile(profile_id: str, current_user: str = Depends(verif
             'id', profile_id
         ).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Perfil deletado com sucesso"
         })
@@ -138,7 +138,7 @@ async def list_companies(company_id: str, current_user: str = Depends(verify_tok
             'id, name'
         ).eq('id', company_id).order('name', desc=False).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -161,7 +161,7 @@ async def get_user_name(user_id: str, current_user: str = Depends(verify_token))
         
         user_name = response.data.get('name', '') if response.data else ''
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": user_name
         })
@@ -188,7 +188,7 @@ async def update_user_profile(profile_id: str, request: Request, current_user: s
             profile_data
         ).eq('id', profile_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Perfil atualizado com sucesso"
         })
@@ -210,7 +210,7 @@ async def get_user_profile_by_id(profile_id: str, current_user: str = Depends(ve
         ).eq('id', profile_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data
             })
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 import logging
 from typing import List, Dict, Optional
@@ -25,7 +25,7 @@ async def get_workflow_history(customer_id: int, current_user: str = Depends(ver
         credit_requests = credit_requests_response.data
         
         if not credit_requests:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": []
             })
@@ -99,7 +99,7 @@ async def get_workflow_history(customer_id: int, current_user: str = Depends(ver
                 
             workflow_history.append(history_item)
             
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": workflow_history
         })
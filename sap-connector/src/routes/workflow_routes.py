@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 from typing import List, Dict, Any
 import logging
@@ -23,7 +23,7 @@ async def get_credit_limit_requests_by_customer(customer_id: str, current_user:
             '*'
         ).eq('customer_id', customer_id).order('created_at', desc=True).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -45,7 +45,7 @@ async def get_workflow_sale_order(credit_limit_req_id: str, current_user: str =
         ).eq('credit_limit_req_id', credit_limit_req_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data
             })
@@ -68,7 +68,7 @@ async def get_workflow_details(workflow_sale_order_id: str, current_user: str =
             '*, jurisdiction:user_role(name, description)'
         ).eq('workflow_sale_order_id', workflow_sale_order_id).order('workflow_step', desc=False).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -102,7 +102,7 @@ async def approve_workflow_step(request: Request, current_user: str = Depends(ve
             'parecer': comments
         }).eq('id', step_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Etapa aprovada com sucesso"
         })
@@ -139,7 +139,7 @@ async def reject_workflow_step(request: Request, current_user: str = Depends(ver
             'parecer': comments
         }).eq('id', step_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Etapa rejeitada com sucesso"
         })
@@ -163,7 +163,7 @@ async def start_workflow_step(step_id: str, current_user: str = Depends(verify_t
             'started_at': datetime.now().isoformat()
         }).eq('id', step_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Etapa iniciada com sucesso"
         })
@@ -184,7 +184,7 @@ async def get_workflow_rules(company_id: str, current_user: str = Depends(verify
             '*'
         ).eq('company_id', company_id).order('value_range', desc=False).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -206,7 +206,7 @@ async def get_user_profile(user_id: str, current_user: str = Depends(verify_toke
         ).eq('logged_id', user_id).single().execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data
             })
@@ -251,7 +251,7 @@ async def create_workflow_sale_order(request: Request, current_user: str = Depen
         }).execute()
         
         if response.data:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "data": response.data[0]
             })
@@ -280,7 +280,7 @@ async def create_workflow_details(request: Request, current_user: str = Depends(
         details = data.get('details', [])
         
         if not details:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": False,
                 "message": "Nenhum detalhe de workflow fornecido"
             })
@@ -297,7 +297,7 @@ async def create_workflow_details(request: Request, current_user: str = Depends(
             workflow_details_deleted = supabase.table('workflow_details').delete().eq('workflow_sale_order_id', workflow_id).execute()
         response = supabase.table('workflow_details').insert(details).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": f"{len(details)} detalhes de workflow criados com sucesso"
         })
@@ -2,7 +2,7 @@
 Rotas para gerenciamento de regras de workflow
 """
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
+from json_response import ORJSONResponse
 from src.database.supabase_client import get_supabase
 import logging
 import json
@@ -24,7 +24,7 @@ async def list_workflow_rules(company_id: int, current_user: str = Depends(verif
             user_role:role_id(id, name)
         """).eq('company_id', company_id).order('created_at', desc=True).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data
         })
@@ -47,7 +47,7 @@ async def create_workflow_rule(request: Request, current_user: str = Depends(ver
         
         result = supabase.table('workflow_rules').insert([rule_data]).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Regra de workflow criada com sucesso"
         })
@@ -73,7 +73,7 @@ async def update_workflow_rule(rule_id: int, request: Request, current_user: str
         
         result = supabase.table('workflow_rules').update(rule_data).eq('id', rule_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Regra de workflow atualizada com sucesso"
         })
@@ -95,7 +95,7 @@ async def delete_workflow_rule(rule_id: int, current_user: str = Depends(verify_
         
         result = supabase.table('workflow_rules').delete().eq('id', rule_id).execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Regra de workflow deletada com sucesso"
         })
@@ -113,7 +113,7 @@ async def get_workflow_types(current_user: str = Depends(verify_token)):
         
         response = supabase.table('workflow_type').select('id, name').order('name').execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "data": response.data if response.data else []
         })
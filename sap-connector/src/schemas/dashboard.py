@@ -9,7 +9,8 @@ class MonthlyMetric(BaseModel):
 
     month: str
     avg_payment_term: float
-    score: float
+    # Sem snapshot do mês (cliente novo, backfill pendente): None
+    score: Optional[float] = None
     billing_amount: float
     limit_usage_pct: float
 
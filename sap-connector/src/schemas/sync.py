@@ -0,0 +1,7 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SyncTriggerRequest(BaseModel):
+    customer_codes: Optional[List[str]] = Field(default=None, description="Sincroniza só estes clientes; vazio = todos")
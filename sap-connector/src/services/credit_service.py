@@ -1,9 +1,12 @@
+import hashlib
+import json
 import math
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from sap_client import call_sap
+from sap_limiter import BATCH, priority_lane
 from src.schemas.credit import (
     BatchCalculationRequest,
     BatchCalculationResponse,
@@ -18,6 +21,7 @@ from src.schemas.credit import (
     StandardizedMetrics,
 )
 from src.schemas.dashboard import DashboardResponse, HighlightIndicators, MonthlyMetric
+from src.services.model_statistics import ActiveStatistics, get_active_statistics
 
 
 async def get_customer_data_from_sap(customer: str, company_code: str, reference_date: Optional[str] = None) -> Dict:
@@ -34,18 +38,19 @@ async def get_customer_data_from_sap(customer: str, company_code: str, reference
 
     try:
         response = await call_sap("ZBAPI_AR_ACC_GETOPENITEMS_V2", payload)
-        return parse_sap_data(response)
+        # Com KEYDATE informada, as janelas de 3 e 12 meses contam a partir dela, não de hoje
+        return parse_sap_data(response, datetime.strptime(key_date, "%Y%m%d") if reference_date else None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching SAP data: {str(e)}")
 
 
-def parse_sap_data(response: Dict) -> Dict:
+def parse_sap_data(response: Dict, reference: Optional[datetime] = None) -> Dict:
     items = response.get("ZBAPI_AR_ACC_GETOPENITEMS_V2.Response", {}).get("T_ITEMS", {}).get("item", [])
 
     if isinstance(items, dict):
         items = [items]
 
-    now = datetime.now()
+    now = reference or datetime.now()
     three_months_ago = now - timedelta(days=90)
     twelve_months_ago = now - timedelta(days=365)
 
@@ -67,6 +72,9 @@ def parse_sap_data(response: Dict) -> Dict:
             due_date = datetime.strptime(due_date_str, "%Y%m%d")
             amount = float(item.get("AMOUNT", 0))
 
+            if doc_date > now:
+                continue
+
             if doc_date >= three_months_ago:
                 purchase_count += 1
                 total_value += amount
@@ -75,8 +83,9 @@ def parse_sap_data(response: Dict) -> Dict:
 
             if doc_date >= twelve_months_ago:
                 payment_date_str = item.get("PAYMENT_DATE")
-                if payment_date_str:
-                    payment_date = datetime.strptime(payment_date_str, "%Y%m%d")
+                payment_date = datetime.strptime(payment_date_str, "%Y%m%d") if payment_date_str else None
+                # Pago depois da data de referência: naquela data o item ainda estava em aberto
+                if payment_date and payment_date <= now:
                     delay = max(0, (payment_date - due_date).days)
                 else:
                     if due_date < now:
@@ -261,18 +270,31 @@ def standardize_variable(value: float, mean: float, std: float) -> float:
     return (value - mean) / std
 
 
+def clip_variable(value: float, name: str, bounds: Optional[Dict[str, Tuple[float, float]]]) -> float:
+    if not bounds or name not in bounds:
+        return value
+    low, high = bounds[name]
+    return min(max(value, low), high)
+
+
 def calculate_score(
     metrics: CreditMetrics,
     stats: GlobalStatistics,
     weights: ModelWeights,
+    bounds: Optional[Dict[str, Tuple[float, float]]] = None,
 ) -> Tuple[float, StandardizedMetrics]:
-    z_hc = standardize_variable(metrics.hc, stats.mean_hc, stats.std_hc)
-    z_vc = standardize_variable(metrics.vc, stats.mean_vc, stats.std_vc)
-    z_pp = standardize_variable(metrics.pp, stats.mean_pp, stats.std_pp)
-    z_in = standardize_variable(metrics.in_, stats.mean_in, stats.std_in)
-    z_va = standardize_variable(metrics.va, stats.mean_va, stats.std_va)
-    z_se_count = standardize_variable(metrics.se_count, stats.mean_se_count, stats.std_se_count)
-    z_se_value = standardize_variable(metrics.se_value, stats.mean_se_value, stats.std_se_value)
+    """bounds: faixa [p01, p99] da carteira por variável; valores fora dela são limitados antes do z-score"""
+    z_hc = standardize_variable(clip_variable(metrics.hc, "hc", bounds), stats.mean_hc, stats.std_hc)
+    z_vc = standardize_variable(clip_variable(metrics.vc, "vc", bounds), stats.mean_vc, stats.std_vc)
+    z_pp = standardize_variable(clip_variable(metrics.pp, "pp", bounds), stats.mean_pp, stats.std_pp)
+    z_in = standardize_variable(clip_variable(metrics.in_, "in", bounds), stats.mean_in, stats.std_in)
+    z_va = standardize_variable(clip_variable(metrics.va, "va", bounds), stats.mean_va, stats.std_va)
+    z_se_count = standardize_variable(
+        clip_variable(metrics.se_count, "se_count", bounds), stats.mean_se_count, stats.std_se_count
+    )
+    z_se_value = standardize_variable(
+        clip_variable(metrics.se_value, "se_value", bounds), stats.mean_se_value, stats.std_se_value
+    )
 
     score = (
         weights.w1 * z_hc
@@ -318,39 +340,74 @@ def get_risk_level(probability_default: float) -> str:
         return "VERY_LOW"
 
 
-async def calculate_historical_scores(customer: str, company_code: str, months: int = 13) -> List[Dict]:
+def score_model_version(model: ActiveStatistics, weights: ModelWeights) -> str:
+    """Identifica o modelo pelas estatísticas, faixas e pesos: snapshots de versões diferentes não se misturam"""
+    canonical = json.dumps(
+        {"statistics": model.statistics.model_dump(), "bounds": model.bounds, "weights": weights.model_dump()},
+        sort_keys=True,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def month_end_key_dates(months: int, today: Optional[date] = None) -> List[date]:
+    """Último dia dos `months` meses fechados antes de hoje, do mais antigo ao mais recente"""
+    key_dates = []
+    month_start = (today or date.today()).replace(day=1)
+    for _ in range(months):
+        month_end = month_start - timedelta(days=1)
+        key_dates.append(month_end)
+        month_start = month_end.replace(day=1)
+    return list(reversed(key_dates))
+
+
+def score_snapshot(key_date: date, metrics: CreditMetrics, model: ActiveStatistics, weights: ModelWeights) -> Dict:
+    """Snapshot do score em key_date a partir de métricas já calculadas"""
+    score, _ = calculate_score(metrics, model.statistics, weights, model.bounds)
 
-    current_data = await get_customer_data_from_sap(customer, company_code)
+    return {
+        "month": key_date.strftime("%Y-%m"),
+        "key_date": key_date,
+        "score": score,
+        "probability_default": calculate_probability(score),
+        "metrics": metrics.model_dump(by_alias=True),
+    }
+
+
+async def calculate_score_as_of(
+    customer: str,
+    company_code: str,
+    key_date: date,
+    model: Optional[ActiveStatistics] = None,
+    weights: Optional[ModelWeights] = None,
+) -> Dict:
+    """Score do cliente com os itens em aberto na KEYDATE, como seria calculado naquele dia"""
+    sap_data = await get_customer_data_from_sap(customer, company_code, key_date.strftime("%Y%m%d"))
     serasa_data = await get_serasa_data(customer)
 
     metrics = CreditMetrics(
-        hc=current_data["hc"],
-        vc=current_data["vc"],
-        pp=current_data["pp"],
-        in_=current_data["in"],
-        va=current_data["va"],
+        hc=sap_data["hc"],
+        vc=sap_data["vc"],
+        pp=sap_data["pp"],
+        in_=sap_data["in"],
+        va=sap_data["va"],
         se_count=serasa_data["se_count"],
         se_value=serasa_data["se_value"],
     )
 
-    stats = GlobalStatistics()
-    weights = ModelWeights()
+    return score_snapshot(key_date, metrics, model or get_active_statistics(), weights or ModelWeights())
 
-    score, _ = calculate_score(metrics, stats, weights)
 
+async def calculate_historical_scores(customer: str, company_code: str, months: int = 13) -> List[Dict]:
+    """
+    Score no fechamento de cada um dos últimos `months` meses, um KEYDATE por mês. Faz uma chamada
+    ao SAP por mês: fica no worker de snapshots; o dashboard lê o resultado da tabela.
+    """
     historical_scores = []
-    now = datetime.now()
+    for key_date in month_end_key_dates(months):
+        result = await calculate_score_as_of(customer, company_code, key_date)
+        historical_scores.append({"month": result["month"], "score": result["score"], "date": key_date})
 
-    for i in range(months):
-        month_date = now - timedelta(days=30 * i)
-        month_key = month_date.strftime("%Y-%m")
-
-        score_variation = (i * 0.1) - (months * 0.05)
-        month_score = score + score_variation
-
-        historical_scores.append({"month": month_key, "score": month_score, "date": month_date})
-
-    return list(reversed(historical_scores))
+    return historical_scores
 
 
 def enhance_dashboard_with_score_variations(dashboard_data: Dict, historical_scores: List[Dict]) -> Dict:
@@ -389,11 +446,11 @@ async def calculate_credit_score(
         se_value=serasa_data["se_value"],
     )
 
-    stats = GlobalStatistics()
+    model = get_active_statistics()
     weights = ModelWeights()
     params = ModelParameters()
 
-    score, standardized_metrics = calculate_score(metrics, stats, weights)
+    score, standardized_metrics = calculate_score(metrics, model.statistics, weights, model.bounds)
 
     probability_default = calculate_probability(score)
     confidence = 1 - probability_default
@@ -424,15 +481,17 @@ async def calculate_batch_credit_scores(
     success_count = 0
     error_count = 0
 
-    for customer in request.customers:
-        try:
-            calc_request = CreditCalculationRequest(customer=customer, company_code=request.company_code)
-            result = await calculate_credit_score(calc_request)
-            results.append(result)
-            success_count += 1
-        except Exception as e:
-            errors.append({"customer": customer, "error": str(e)})
-            error_count += 1
+    # Lote de cálculos vai para a faixa de menor prioridade do limitador do SAP
+    with priority_lane(BATCH):
+        for customer in request.customers:
+            try:
+                calc_request = CreditCalculationRequest(customer=customer, company_code=request.company_code)
+                result = await calculate_credit_score(calc_request)
+                results.append(result)
+                success_count += 1
+            except Exception as e:
+                errors.append({"customer": customer, "error": str(e)})
+                error_count += 1
 
     return BatchCalculationResponse(
         success_count=success_count,
@@ -537,8 +596,23 @@ def build_dashboard_response(
     customer: str,
     credit_result: CreditScoreResponse,
     historical_data: Optional[Dict] = None,
+    score_history: Optional[Dict[str, float]] = None,
 ) -> DashboardResponse:
+    """
+    score_history traz o score de cada mês fechado (snapshots, por mês YYYY-MM); o mês corrente usa o
+    score calculado agora. Mês sem snapshot fica sem score em vez de repetir o atual.
+    """
     now = datetime.now()
+    current_month = now.strftime("%Y-%m")
+    score_history = score_history or {}
+
+    def month_score(month_key: str) -> Optional[float]:
+        return credit_result.score if month_key == current_month else score_history.get(month_key)
+
+    # Variação contra o fechamento do mês anterior
+    previous_month = (now.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+    previous_score = score_history.get(previous_month)
+    score_variation_points = credit_result.score - previous_score if previous_score is not None else 0.0
 
     if historical_data and "monthly_data" in historical_data:
         monthly_data = historical_data["monthly_data"]
@@ -556,7 +630,7 @@ def build_dashboard_response(
                 else credit_result.metrics.pp
             )
 
-            score = credit_result.score
+            score = month_score(month_key)
 
             billing_amount = month_data["billing_amount"]
 
@@ -580,10 +654,6 @@ def build_dashboard_response(
             payment_series.append(metric)
             billing_series.append(metric)
 
-        score_variation_points = 0.0
-        if len(sorted_months) >= 2:
-            score_variation_points = 0.0
-
         billing_variation_pct = historical_data.get("billing_variation_pct", 0.0)
 
         highlights = HighlightIndicators(
@@ -617,7 +687,7 @@ def build_dashboard_response(
                 MonthlyMetric(
                     month=ref_month,
                     avg_payment_term=credit_result.metrics.pp,
-                    score=credit_result.score,
+                    score=month_score(ref_month),
                     billing_amount=credit_result.metrics.vc,
                     limit_usage_pct=min(
                         100.0,
@@ -633,7 +703,7 @@ def build_dashboard_response(
 
         highlights = HighlightIndicators(
             current_score=credit_result.score,
-            score_variation_points=0.0,
+            score_variation_points=score_variation_points,
             avg_billing_last_3m=credit_result.metrics.vc,
             avg_billing_variation_pct=0.0,
             credit_limit=credit_result.suggested_credit_limit,
@@ -1,15 +1,74 @@
+import base64
+import binascii
+import hashlib
+from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
 
+from config import SYNC_JOB_MAX_CUSTOMERS
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from src.repository.sap_repository import (
     CreditLimitRepository,
     CustomerRepository,
     SalesOrderRepository,
+    SyncJobRepository,
     SyncLogRepository,
 )
 
+# Mapeamento campo de saída -> chave em sap_data, usado para carregar só os caminhos JSON necessários
+CUSTOMER_SAP_KEYS = {
+    "name": "SORT1",
+    "full_name": "NAME",
+    "country": "COUNTRY",
+    "country_iso": "COUNTRYISO",
+    "city": "CITY",
+    "postal_code": "POSTL_COD1",
+    "region": "REGION",
+    "street": "STREET",
+    "phone": "TEL1_NUMBR",
+    "fax": "FAX_NUMBER",
+    "address_code": "ADDRESS",
+}
+
+SALES_ORDER_SAP_KEYS = {
+    "item_number": "ITM_NUMBER",
+    "material": "MATERIAL",
+    "description": "SHORT_TEXT",
+    "document_type": "DOC_TYPE",
+    "request_date": "REQ_DATE",
+    "total_quantity": "REQ_QTY",
+    "reference_number": "PURCH_NO",
+    "valid_from": "VALID_FROM",
+    "valid_to": "VALID_TO",
+    "customer_name": "NAME",
+    "exchange_rate": "EXCHG_RATE",
+    "net_price": "NET_PRICE",
+    "net_value": "NET_VALUE",
+    "gross_value": "NET_VAL_HD",
+    "division": "DIVISION",
+    "status": "DOC_STATUS",
+    "sales_org": "SALES_ORG",
+    "currency": "CURRENCY",
+    "plant": "PLANT",
+    "creation_date": "CREATION_DATE",
+    "creation_time": "CREATION_TIME",
+}
+
+CREDIT_LIMIT_SAP_KEYS = {
+    "credit_limit": "CREDIT_LIMIT",
+    "is_blocked": "XBLOCKED",
+    "block_reason": "BLOCK_REASON",
+    "limit_valid_date": "LIMIT_VALID_DATE",
+    "limit_change_date": "LIMIT_CHG_DATE",
+    "coordinator": "COORDINATOR",
+    "customer_group": "CUST_GROUP",
+    "follow_up_date": "FOLLOW_UP_DT",
+    "is_critical": "XCRITICAL",
+    "request_date": "REQ_DATE",
+}
+
 
 class DataService:
     def __init__(self, db: Session):
@@ -17,16 +76,32 @@ class DataService:
         self.sales_orders = SalesOrderRepository(db)
         self.credit_limits = CreditLimitRepository(db)
         self.sync_logs = SyncLogRepository(db)
+        self.sync_jobs = SyncJobRepository(db)
+
+    def get_all_customers(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        include_raw: bool = False,
+        include_total: bool = False,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        after_code = _decode_cursor(cursor) if cursor else None
+        sap_keys = _resolve_sap_keys(CUSTOMER_SAP_KEYS, fields, include_raw)
 
-    def get_all_customers(self, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
-        customers = self.customers.get_all(offset, limit)
-        total = self.customers.get_total_count()
+        # Busca um registro a mais para saber se existe próxima página sem COUNT(*)
+        customers = self.customers.get_page(after_code, limit + 1, sap_keys)
+        has_more = len(customers) > limit
+        customers = customers[:limit]
+
+        next_cursor = _encode_cursor(customers[-1].customer_code) if has_more else None
 
         return {
-            "total": total,
-            "offset": offset,
+            "total": self.customers.get_estimated_count() if include_total else None,
+            "total_is_estimate": True if include_total else None,
             "limit": limit,
-            "data": [self._format_customer(c) for c in customers],
+            "next_cursor": next_cursor,
+            "data": [self._format_customer(c, fields, include_raw) for c in customers],
         }
 
     def get_customer(self, customer_code: str) -> Dict[str, Any]:
@@ -37,9 +112,16 @@ class DataService:
 
         return self._format_customer(customer)
 
-    def search_customers(self, term: str, limit: int = 100) -> List[Dict[str, Any]]:
-        customers = self.customers.search(term, limit)
-        return [self._format_customer(c) for c in customers]
+    def search_customers(
+        self,
+        term: str,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        include_raw: bool = False,
+    ) -> List[Dict[str, Any]]:
+        sap_keys = _resolve_sap_keys(CUSTOMER_SAP_KEYS, fields, include_raw)
+        customers = self.customers.search(term, limit, sap_keys)
+        return [self._format_customer(c, fields, include_raw) for c in customers]
 
     def get_customer_with_credit(self, customer_code: str) -> Dict[str, Any]:
         customer = self.customers.get_by_code(customer_code)
@@ -61,16 +143,19 @@ class DataService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        include_raw: bool = False,
     ) -> List[Dict[str, Any]]:
+        sap_keys = _resolve_sap_keys(SALES_ORDER_SAP_KEYS, fields, include_raw)
 
         if customer_code:
-            orders = self.sales_orders.get_by_customer(customer_code, limit)
+            orders = self.sales_orders.get_by_customer(customer_code, limit, sap_keys)
         elif start_date and end_date:
-            orders = self.sales_orders.get_by_date_range(start_date, end_date, customer_code)
+            orders = self.sales_orders.get_by_date_range(start_date, end_date, customer_code, sap_keys)
         else:
-            orders = self.sales_orders.get_recent_orders(limit)
+            orders = self.sales_orders.get_recent_orders(limit, sap_keys)
 
-        return [self._format_sales_order(o) for o in orders]
+        return [self._format_sales_order(o, fields, include_raw) for o in orders]
 
     def get_sales_order(self, order_number: str) -> Dict[str, Any]:
         order = self.sales_orders.get_by_order_number(order_number)
@@ -88,29 +173,53 @@ class DataService:
 
         return self._format_credit_limit(credit_limit)
 
-    def get_all_credit_limits(self, limit: int = 100) -> List[Dict[str, Any]]:
-        credit_limits = self.credit_limits.get_all_limits(limit)
-        return [self._format_credit_limit(cl) for cl in credit_limits]
+    def get_all_credit_limits(
+        self, limit: int = 100, fields: Optional[Sequence[str]] = None, include_raw: bool = False
+    ) -> List[Dict[str, Any]]:
+        sap_keys = _resolve_sap_keys(CREDIT_LIMIT_SAP_KEYS, fields, include_raw)
+        credit_limits = self.credit_limits.get_all_limits(limit, sap_keys)
+        return [self._format_credit_limit(cl, fields, include_raw) for cl in credit_limits]
 
-    def get_blocked_customers(self) -> List[Dict[str, Any]]:
-        blocked = self.credit_limits.get_blocked_customers()
-        return [self._format_credit_limit(cl) for cl in blocked]
+    def get_blocked_customers(
+        self, fields: Optional[Sequence[str]] = None, include_raw: bool = False
+    ) -> List[Dict[str, Any]]:
+        sap_keys = _resolve_sap_keys(CREDIT_LIMIT_SAP_KEYS, fields, include_raw)
+        blocked = self.credit_limits.get_blocked_customers(sap_keys)
+        return [self._format_credit_limit(cl, fields, include_raw) for cl in blocked]
 
-    def get_critical_customers(self) -> List[Dict[str, Any]]:
-        critical = self.credit_limits.get_critical_customers()
-        return [self._format_credit_limit(cl) for cl in critical]
+    def get_critical_customers(
+        self, fields: Optional[Sequence[str]] = None, include_raw: bool = False
+    ) -> List[Dict[str, Any]]:
+        sap_keys = _resolve_sap_keys(CREDIT_LIMIT_SAP_KEYS, fields, include_raw)
+        critical = self.credit_limits.get_critical_customers(sap_keys)
+        return [self._format_credit_limit(cl, fields, include_raw) for cl in critical]
 
     def get_sync_status(self, sync_type: Optional[str] = None) -> Dict[str, Any]:
         latest = self.sync_logs.get_latest(sync_type)
         stats = self.sync_logs.get_stats(sync_type)
 
-        result = {"stats": stats, "latest_sync": None}
+        result = {"stats": stats, "latest_sync": None, "latest_run": None}
 
         if latest:
             result["latest_sync"] = self._format_sync_log(latest)
+            if latest.run_id:
+                result["latest_run"] = self.get_sync_run(latest.run_id)
 
         return result
 
+    def get_sync_run(self, run_id: str) -> Dict[str, Any]:
+        logs = self.sync_logs.get_by_runs([run_id])
+        if not logs:
+            raise HTTPException(status_code=404, detail=f"Sync run {run_id} not found")
+        return self._merge_sync_run(run_id, logs)
+
+    def get_sync_runs(self, sync_type: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        run_ids = self.sync_logs.get_recent_run_ids(sync_type, limit)
+        logs_by_run = defaultdict(list)
+        for log in self.sync_logs.get_by_runs(run_ids):
+            logs_by_run[log.run_id].append(log)
+        return [self._merge_sync_run(run_id, logs_by_run[run_id]) for run_id in run_ids]
+
     def get_sync_logs(
         self,
         sync_type: Optional[str] = None,
@@ -125,10 +234,34 @@ class DataService:
 
         return [self._format_sync_log(log) for log in logs]
 
-    def _format_customer(self, customer) -> Dict[str, Any]:
+    def enqueue_sync(
+        self, sync_type: str, customer_codes: Optional[List[str]] = None, requested_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        codes = sorted({code.strip() for code in customer_codes or [] if code.strip()}) or None
+        if codes and len(codes) > SYNC_JOB_MAX_CUSTOMERS:
+            raise HTTPException(status_code=400, detail=f"At most {SYNC_JOB_MAX_CUSTOMERS} customer codes per sync job")
+
+        job, created = self.sync_jobs.enqueue(sync_type, _sync_dedup_key(sync_type, codes), codes, requested_by)
+        result = self._format_sync_job(job)
+        result["deduplicated"] = not created
+        return result
+
+    def get_sync_job(self, job_id: UUID) -> Dict[str, Any]:
+        job = self.sync_jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Sync job {job_id} not found")
+
+        result = self._format_sync_job(job)
+        sync_log = self.sync_logs.get_by_job(job.id)
+        result["sync_log"] = self._format_sync_log(sync_log) if sync_log else None
+        return result
+
+    def _format_customer(
+        self, customer, fields: Optional[Sequence[str]] = None, include_raw: bool = True
+    ) -> Dict[str, Any]:
         sap_data = customer.sap_data or {}
 
-        return {
+        result = {
             "id": str(customer.id),
             "customer_code": customer.customer_code,
             "name": sap_data.get("SORT1", ""),
@@ -144,13 +277,16 @@ class DataService:
             "address_code": sap_data.get("ADDRESS", ""),
             "created_at": (customer.created_at.isoformat() if customer.created_at else None),
             "updated_at": (customer.updated_at.isoformat() if customer.updated_at else None),
-            "raw_data": sap_data,
         }
 
-    def _format_sales_order(self, order) -> Dict[str, Any]:
+        return _select_fields(result, sap_data, fields, include_raw)
+
+    def _format_sales_order(
+        self, order, fields: Optional[Sequence[str]] = None, include_raw: bool = True
+    ) -> Dict[str, Any]:
         sap_data = order.sap_data or {}
 
-        return {
+        result = {
             "id": str(order.id),
             "order_number": order.order_number,
             "customer_code": order.customer_code,
@@ -178,13 +314,16 @@ class DataService:
             "creation_time": sap_data.get("CREATION_TIME", ""),
             "created_at": order.created_at.isoformat() if order.created_at else None,
             "updated_at": order.updated_at.isoformat() if order.updated_at else None,
-            "raw_data": sap_data,
         }
 
-    def _format_credit_limit(self, credit_limit) -> Dict[str, Any]:
+        return _select_fields(result, sap_data, fields, include_raw)
+
+    def _format_credit_limit(
+        self, credit_limit, fields: Optional[Sequence[str]] = None, include_raw: bool = True
+    ) -> Dict[str, Any]:
         sap_data = credit_limit.sap_data or {}
 
-        return {
+        result = {
             "id": str(credit_limit.id),
             "customer_code": credit_limit.customer_code,
             "segment": credit_limit.segment,
@@ -200,9 +339,10 @@ class DataService:
             "request_date": self._parse_sap_date(sap_data.get("REQ_DATE", "")),
             "created_at": (credit_limit.created_at.isoformat() if credit_limit.created_at else None),
             "updated_at": (credit_limit.updated_at.isoformat() if credit_limit.updated_at else None),
-            "raw_data": sap_data,
         }
 
+        return _select_fields(result, sap_data, fields, include_raw)
+
     def _format_sync_log(self, sync_log) -> Dict[str, Any]:
         return {
             "id": str(sync_log.id),
@@ -213,13 +353,89 @@ class DataService:
             "records_processed": sync_log.records_processed,
             "records_created": sync_log.records_created,
             "records_updated": sync_log.records_updated,
+            "records_unchanged": sync_log.records_unchanged,
             "records_failed": sync_log.records_failed,
+            "records_total": sync_log.records_total,
             "error_message": sync_log.error_message,
             "duration_seconds": (
                 (sync_log.completed_at - sync_log.started_at).total_seconds()
                 if sync_log.completed_at and sync_log.started_at
                 else None
             ),
+            "job_id": str(sync_log.job_id) if sync_log.job_id else None,
+            "run_id": sync_log.run_id,
+            "shard": (sync_log.details or {}).get("shard"),
+            "checkpoint": sync_log.checkpoint,
+            "resumed_from": (sync_log.details or {}).get("resumed_from"),
+            **_sync_progress(sync_log),
+        }
+
+    def _merge_sync_run(self, run_id: str, logs: List[Any]) -> Dict[str, Any]:
+        """Junta os SyncLog das partições de uma execução num resumo único"""
+        shard_count = max((log.details or {}).get("shard_count", 1) for log in logs)
+
+        # Por partição vale a tentativa mais recente (logs vêm ordenados por started_at)
+        shards = {(log.details or {}).get("shard", 0): log for log in logs}
+        statuses = {log.status for log in shards.values()}
+        missing = sorted(set(range(shard_count)) - set(shards))
+
+        if "running" in statuses:
+            status = "running"
+        elif "failed" in statuses:
+            status = "failed"
+        elif "interrupted" in statuses:
+            status = "interrupted"
+        elif "insufficient_sample" in statuses:
+            status = "insufficient_sample"
+        elif missing:
+            status = "incomplete"
+        else:
+            status = "completed"
+
+        started_at = min(log.started_at for log in shards.values() if log.started_at)
+        completed_at = None
+        if status in ("completed", "failed", "interrupted", "insufficient_sample"):
+            completed_at = max(log.completed_at for log in shards.values() if log.completed_at)
+
+        totals = [log.records_total for log in shards.values()]
+        # Partições têm tamanhos parecidos (hash): o progresso é a média, com as ausentes em zero
+        fractions = [_progress_fraction(log) for log in shards.values()]
+        progress = None
+        if any(fraction is not None for fraction in fractions):
+            progress = sum(fraction or 0.0 for fraction in fractions) / shard_count
+
+        return {
+            "run_id": run_id,
+            "sync_type": logs[0].sync_type,
+            "status": status,
+            "shard_count": shard_count,
+            "missing_shards": missing,
+            "started_at": started_at.isoformat(),
+            "completed_at": completed_at.isoformat() if completed_at else None,
+            "duration_seconds": (completed_at - started_at).total_seconds() if completed_at else None,
+            "records_processed": sum(log.records_processed or 0 for log in shards.values()),
+            "records_created": sum(log.records_created or 0 for log in shards.values()),
+            "records_updated": sum(log.records_updated or 0 for log in shards.values()),
+            "records_unchanged": sum(log.records_unchanged or 0 for log in shards.values()),
+            "records_failed": sum(log.records_failed or 0 for log in shards.values()),
+            "records_total": sum(totals) if not missing and None not in totals else None,
+            "progress": round(progress, 4) if progress is not None else None,
+            "eta_seconds": _eta_seconds(progress, started_at) if status == "running" else None,
+            "shards": [self._format_sync_log(shards[index]) for index in sorted(shards)],
+        }
+
+    def _format_sync_job(self, job) -> Dict[str, Any]:
+        return {
+            "job_id": str(job.id),
+            "sync_type": job.sync_type,
+            "status": job.status,
+            "customer_codes": job.customer_codes,
+            "requested_by": job.requested_by,
+            "attempts": job.attempts,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+            "error_message": job.error_message,
         }
 
     def _parse_sap_date(self, date_str: str) -> Optional[str]:
@@ -230,3 +446,76 @@ class DataService:
             except ValueError:
                 return None
         return None
+
+
+def _resolve_sap_keys(
+    field_map: Dict[str, str], fields: Optional[Sequence[str]], include_raw: bool
+) -> Optional[List[str]]:
+    # raw_data precisa do JSON completo; None faz o repositório carregar a entidade inteira
+    if include_raw:
+        return None
+
+    if fields is None:
+        return list(dict.fromkeys(field_map.values()))
+
+    return list(dict.fromkeys(field_map[field] for field in fields if field in field_map))
+
+
+def _select_fields(
+    result: Dict[str, Any], sap_data: Dict[str, Any], fields: Optional[Sequence[str]], include_raw: bool
+) -> Dict[str, Any]:
+    if fields is not None:
+        result = {key: value for key, value in result.items() if key in fields}
+
+    if include_raw:
+        result["raw_data"] = sap_data
+
+    return result
+
+
+def _sync_dedup_key(sync_type: str, customer_codes: Optional[List[str]]) -> str:
+    if not customer_codes:
+        return f"{sync_type}:all"
+    return f"{sync_type}:{hashlib.sha1(','.join(customer_codes).encode()).hexdigest()}"
+
+
+def _progress_fraction(sync_log) -> Optional[float]:
+    """Fração concluída pelo total de registros ou, sem ele, pelo total de clientes"""
+    details = sync_log.details or {}
+    if sync_log.status in ("completed", "insufficient_sample"):
+        return 1.0
+    if sync_log.records_total:
+        done, total = sync_log.records_processed or 0, sync_log.records_total
+    elif details.get("customers_total"):
+        done, total = details.get("customers_processed", 0), details["customers_total"]
+    else:
+        return None
+    return min(done / total, 1.0)
+
+
+def _eta_seconds(fraction: Optional[float], started_at: Optional[datetime]) -> Optional[float]:
+    if fraction is None or not started_at or not 0 < fraction < 1:
+        return None
+    elapsed = (datetime.utcnow() - started_at).total_seconds()
+    return round(elapsed * (1 - fraction) / fraction, 1)
+
+
+def _sync_progress(sync_log) -> Dict[str, Any]:
+    """Fração concluída e ETA de uma sincronização em andamento"""
+    fraction = _progress_fraction(sync_log)
+    return {
+        "progress": round(fraction, 4) if fraction is not None else None,
+        "eta_seconds": _eta_seconds(fraction, sync_log.started_at) if sync_log.status == "running" else None,
+    }
+
+
+def _encode_cursor(customer_code: str) -> str:
+    return base64.urlsafe_b64encode(customer_code.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,79 @@
+"""
+Estatísticas globais do score em uso (versão ativa de credit_model_statistics).
+
+O job model_statistics grava uma versão nova por noite; a API e os workers relêem a versão ativa a
+cada MODEL_STATISTICS_REFRESH_INTERVAL segundos, então ela entra no cálculo sem reiniciar nada.
+Sem versão gravada (ou com o banco fora do ar na primeira leitura), vale o padrão de GlobalStatistics.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from config import MODEL_STATISTICS_REFRESH_INTERVAL
+from src.database.connection import get_db_session
+from src.repository.sap_repository import ModelStatisticsRepository
+from src.schemas.credit import GlobalStatistics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VERSION = "default"
+
+
+class ActiveStatistics(NamedTuple):
+    version: str
+    statistics: GlobalStatistics
+    # Quantis por variável (p01, p25, median, p75, p99, iqr); vazio na versão padrão
+    quantiles: Dict[str, Dict[str, float]]
+    sample_size: Optional[int] = None
+    computed_at: Optional[datetime] = None
+
+    @property
+    def bounds(self) -> Dict[str, Tuple[float, float]]:
+        """Faixa [p01, p99] da carteira por variável, usada para limitar outliers antes do z-score"""
+        return {name: (values["p01"], values["p99"]) for name, values in self.quantiles.items()}
+
+
+_DEFAULT = ActiveStatistics(DEFAULT_VERSION, GlobalStatistics(), {})
+_active = _DEFAULT
+_loaded_at: Optional[float] = None
+
+
+def get_active_statistics() -> ActiveStatistics:
+    global _active, _loaded_at
+
+    now = time.monotonic()
+    if _loaded_at is not None and now - _loaded_at < MODEL_STATISTICS_REFRESH_INTERVAL:
+        return _active
+    _loaded_at = now
+
+    try:
+        with get_db_session() as db:
+            record = ModelStatisticsRepository(db).get_active()
+            loaded = (
+                ActiveStatistics(
+                    record.version,
+                    GlobalStatistics(**record.statistics),
+                    record.quantiles or {},
+                    record.sample_size,
+                    record.created_at,
+                )
+                if record
+                else _DEFAULT
+            )
+    except Exception as e:
+        # Mantém a versão anterior; tenta de novo no próximo intervalo
+        logger.warning("Could not load model statistics, keeping version %s: %s", _active.version, e)
+        return _active
+
+    if loaded.version != _active.version:
+        logger.info("Model statistics version %s loaded (was %s)", loaded.version, _active.version)
+    _active = loaded
+    return _active
+
+
+def reload_statistics():
+    """Força a releitura na próxima chamada (após ativar uma versão neste processo)"""
+    global _loaded_at
+    _loaded_at = None
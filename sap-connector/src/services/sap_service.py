@@ -1,3 +1,4 @@
+import logging
 from typing import Any, Dict
 
 from fastapi import HTTPException
@@ -19,6 +20,8 @@ from src.services.sap_converter import (
     vendor_update_to_sap,
 )
 
+logger = logging.getLogger(__name__)
+
 
 async def get_invoice_list(vendor: str, company_code: str, date: str):
     invoice_list_request = InvoiceListRequest(vendor=vendor, company_code=company_code, date=date)
@@ -70,12 +73,17 @@ async def update_bank_data_flow(
             raise HTTPException(status_code=400, detail="CNPJ ou código do fornecedor é obrigatório")
 
         codigo_fornecedor = codigo_fornecedor.zfill(10)
-        print(codigo_fornecedor)
+        logger.debug("Fornecedor %s encontrado para o CNPJ", codigo_fornecedor, extra={"fornecedor": codigo_fornecedor})
 
         should_create_bank = True
         if bupa_data and dados_bancarios:
             existing_banks = bupa_data.get("dados_bancarios", [])
-            print(existing_banks)
+            logger.debug(
+                "Fornecedor %s possui %d contas bancárias",
+                codigo_fornecedor,
+                len(existing_banks),
+                extra={"fornecedor": codigo_fornecedor, "dados_bancarios": existing_banks},
+            )
             should_create_bank = not check_bank_exists(existing_banks, dados_bancarios)
 
         cadastro_result = {"success": False, "skipped": False}
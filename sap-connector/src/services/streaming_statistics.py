@@ -0,0 +1,121 @@
+"""
+Estimadores de uma passada para as estatísticas globais do score.
+
+RunningMoments acumula média e variância pelo método de Welford (numericamente estável, sem guardar
+os valores). P2Quantile estima um quantil pelo algoritmo P² (Jain & Chlamtac): cinco marcadores
+ajustados a cada valor, memória constante. MetricSketch junta os dois para uma variável.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+# Quantis guardados por variável: extremos para winsorizar e quartis para escala robusta (mediana/IQR)
+QUANTILES = {"p01": 0.01, "p25": 0.25, "median": 0.5, "p75": 0.75, "p99": 0.99}
+
+
+class RunningMoments:
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """Variância amostral (n - 1)"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    __slots__ = ("p", "_initial", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, p: float):
+        self.p = p
+        self._initial: List[float] = []
+        self._heights: Optional[List[float]] = None
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def push(self, value: float):
+        if self._heights is None:
+            self._initial.append(value)
+            if len(self._initial) == 5:
+                self._heights = sorted(self._initial)
+            return
+
+        heights, positions = self._heights, self._positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Ajusta os marcadores do meio que se afastaram da posição desejada
+        for i in (1, 2, 3):
+            offset = self._desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        heights, positions = self._heights, self._positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step)
+            * (heights[i] - heights[i - 1])
+            / (positions[i] - positions[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        if self._heights is not None:
+            return self._heights[2]
+        if not self._initial:
+            return 0.0
+        # Menos de cinco valores: quantil exato da amostra
+        ordered = sorted(self._initial)
+        return ordered[round(self.p * (len(ordered) - 1))]
+
+
+class MetricSketch:
+    """Média, desvio e quantis de uma variável, numa passada só"""
+
+    def __init__(self):
+        self.moments = RunningMoments()
+        self.quantiles = {name: P2Quantile(p) for name, p in QUANTILES.items()}
+
+    def push(self, value: float):
+        self.moments.push(value)
+        for estimator in self.quantiles.values():
+            estimator.push(value)
+
+    def summary(self) -> Dict[str, float]:
+        values = {name: estimator.value for name, estimator in self.quantiles.items()}
+        values["iqr"] = values["p75"] - values["p25"]
+        return values
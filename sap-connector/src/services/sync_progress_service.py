@@ -0,0 +1,127 @@
+"""
+Progresso ao vivo dos syncs, lido das métricas Prometheus dos processos de workers.
+
+O SyncLog só muda a cada commit do loop; as métricas mostram a vazão, as latências e as filas do
+momento e o horário do último lote gravado, para apontar syncs parados ou mais lentos antes de o
+dashboard ficar desatualizado. Com sharding, cada partição é um processo (um endpoint) diferente.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+from config import SYNC_STALL_AFTER, WORKER_METRICS_TIMEOUT, WORKER_METRICS_URLS
+from prometheus_client.parser import text_string_to_metric_families
+
+_PREFIX = "sap_connector_sync_"
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(value).isoformat() if value else None
+
+
+def _average(total: Optional[float], count: Optional[float]) -> Optional[float]:
+    return round(total / count, 3) if total is not None and count else None
+
+
+def _parse(text: str, now: float) -> Dict[str, Dict[str, Any]]:
+    """Métricas sap_connector_sync_* de um processo, agrupadas por sync_type"""
+    samples: Dict[str, Dict[str, float]] = defaultdict(dict)
+    queues: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            sync_type = sample.labels.get("sync_type")
+            if not sample.name.startswith(_PREFIX) or sync_type is None:
+                continue
+            name = sample.name[len(_PREFIX) :]
+            if name == "queue_depth":
+                queues[sync_type][sample.labels["queue"]] = int(sample.value)
+            elif "le" not in sample.labels:
+                samples[sync_type][name] = sample.value
+
+    syncs = {}
+    for sync_type in sorted(set(samples) | set(queues)):
+        values = samples[sync_type]
+        running = values.get("running", 0) > 0
+        last_progress = values.get("last_progress_timestamp_seconds")
+        last_success = values.get("last_success_timestamp_seconds")
+        since_progress = round(now - last_progress, 1) if last_progress else None
+        syncs[sync_type] = {
+            "running": running,
+            "records_processed": int(values.get("records_processed_total", 0)),
+            # Syncs por cliente contam clientes em records_processed e as linhas do SAP aqui
+            "items_fetched": int(values.get("items_fetched_total", 0)),
+            "records_per_second": round(values.get("records_per_second", 0.0), 2),
+            "sap_fetch_avg_seconds": _average(
+                values.get("sap_fetch_duration_seconds_sum"), values.get("sap_fetch_duration_seconds_count")
+            ),
+            "db_write_avg_seconds": _average(
+                values.get("db_write_duration_seconds_sum"), values.get("db_write_duration_seconds_count")
+            ),
+            "queues": queues[sync_type],
+            "last_progress_at": _timestamp(last_progress),
+            "seconds_since_progress": since_progress if running else None,
+            "last_success_at": _timestamp(last_success),
+            "seconds_since_success": round(now - last_success, 1) if last_success else None,
+            "stalled": running and since_progress is not None and since_progress > SYNC_STALL_AFTER,
+        }
+    return syncs
+
+
+async def _scrape(client: httpx.AsyncClient, url: str, now: float) -> Dict[str, Any]:
+    try:
+        response = await client.get(url)
+        response.raise_for_status()
+        return {"target": url, "up": True, "syncs": _parse(response.text, now)}
+    except Exception as e:
+        return {"target": url, "up": False, "error": str(e) or type(e).__name__, "syncs": {}}
+
+
+def _merge(workers: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Resumo por tipo somando as partições; o último sucesso do tipo é o da partição mais atrasada"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for worker in workers:
+        for sync_type, sync in worker["syncs"].items():
+            summary = merged.setdefault(
+                sync_type,
+                {
+                    "running": 0,
+                    "records_per_second": 0.0,
+                    "queues": defaultdict(int),
+                    "stalled": False,
+                    "seconds_since_success": None,
+                    "shards_without_success": 0,
+                },
+            )
+            summary["running"] += int(sync["running"])
+            summary["records_per_second"] = round(summary["records_per_second"] + sync["records_per_second"], 2)
+            for queue, depth in sync["queues"].items():
+                summary["queues"][queue] += depth
+            summary["stalled"] = summary["stalled"] or sync["stalled"]
+            # Partição que nunca concluiu é a mais atrasada: o tipo fica sem último sucesso
+            if sync["seconds_since_success"] is None:
+                summary["shards_without_success"] += 1
+                summary["seconds_since_success"] = None
+            elif not summary["shards_without_success"]:
+                current = summary["seconds_since_success"]
+                summary["seconds_since_success"] = max(current or 0.0, sync["seconds_since_success"])
+
+    for summary in merged.values():
+        summary["queues"] = dict(summary["queues"])
+    return merged
+
+
+async def collect_sync_progress() -> Dict[str, Any]:
+    now = time.time()
+    async with httpx.AsyncClient(timeout=WORKER_METRICS_TIMEOUT) as client:
+        workers = await asyncio.gather(*(_scrape(client, url, now) for url in WORKER_METRICS_URLS))
+
+    return {
+        "generated_at": _timestamp(now),
+        "stall_after_seconds": SYNC_STALL_AFTER,
+        "sync_types": _merge(workers),
+        "workers": workers,
+    }
@@ -1,36 +1,113 @@
 import asyncio
+import hashlib
+import json
 import logging
 import signal
 import sys
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
 
-from config import LOG_LEVEL
+from config import (
+    WORKER_CODES_PAGE_SIZE,
+    WORKER_RESUME_MAX_AGE,
+    WORKER_RESUME_STALE_AFTER,
+    WORKER_STORE_BATCH_SIZE,
+)
+from logging_config import setup_logging
+from metrics import (
+    observe_sync_db_write,
+    observe_sync_items,
+    observe_sync_progress,
+    set_sync_queue_depth,
+    sync_finished,
+    sync_started,
+)
+from sap_limiter import WORKER, sap_priority
+from sqlalchemy import insert, tuple_, update
 from sqlalchemy.orm import Session
-from src.database.models import SyncLog
+from src.database.models import SAPCustomer, SyncLog
+from src.repository.sap_repository import SyncLogRepository
+from src.workers.sharding import Shard
 
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
+def content_hash(row: Dict[str, Any]) -> str:
+    """sha256 da linha processada em JSON canônico (chaves ordenadas, sem espaços)"""
+    canonical = json.dumps(row, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class SyncProgress:
+    """Métricas ao vivo de uma execução (vazão, último avanço e fila), atualizadas a cada commit do loop"""
+
+    def __init__(self, sync_type: str, full: bool):
+        self.sync_type = sync_type
+        self.full = full
+        self._reported = 0
+        self._reported_at = time.monotonic()
+        self._items_reported = 0
+        self._queue: Optional[str] = None
+        sync_started(sync_type)
+
+    def report(
+        self,
+        records_processed: int,
+        pending: Optional[int] = None,
+        queue: str = "pending_customers",
+        items: Optional[int] = None,
+    ):
+        """
+        records_processed e pending na mesma unidade (clientes, nos syncs por cliente), para a
+        vazão e o ETA baterem; items é o total de linhas do SAP, contado à parte.
+        """
+        now = time.monotonic()
+        records, elapsed = records_processed - self._reported, now - self._reported_at
+        observe_sync_progress(self.sync_type, records, records / elapsed if elapsed > 0 else 0.0)
+        self._reported, self._reported_at = records_processed, now
+        if pending is not None:
+            self._queue = queue
+            set_sync_queue_depth(self.sync_type, queue, pending)
+        if items is not None:
+            observe_sync_items(self.sync_type, items - self._items_reported)
+            self._items_reported = items
+
+    def finish(self, sync_log: SyncLog, records_processed: Optional[int] = None, items: Optional[int] = None):
+        processed = sync_log.records_processed if records_processed is None else records_processed
+        self.report(processed, 0 if self._queue else None, self._queue, items)
+        sync_finished(self.sync_type, sync_log.status, self.full)
+
+
 class BaseWorker(ABC):
+    # Se a execução pode ser dividida entre processos por partição de clientes (ver sharding)
+    shardable = False
+    # Modelo SAP gravado pelo worker e campos que identificam uma linha
+    model = None
+    key_fields: Tuple[str, ...] = ()
+
     def __init__(self, name: str, interval_seconds: int = 3600):
         self.name = name
         self.interval_seconds = interval_seconds
         self.is_running = False
-        self._setup_signal_handlers()
+        # Parada pedida: run_sync termina e commita o lote atual, grava o checkpoint e sai
+        self.draining = False
+        self._stopped = asyncio.Event()
 
     def _setup_signal_handlers(self):
-        signal.signal(signal.SIGTERM, self._handle_signal)
-        signal.signal(signal.SIGINT, self._handle_signal)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._handle_signal, signum)
 
-    def _handle_signal(self, signum, frame):
-        logger.info(f"{self.name} worker received signal {signum}, shutting down gracefully...")
+    def _handle_signal(self, signum):
+        if self.draining:
+            logger.warning(f"{self.name} worker received signal {signum} again, exiting now")
+            sys.exit(1)
+        logger.info(f"{self.name} worker received signal {signum}, finishing the current batch...")
         self.stop()
-        sys.exit(0)
 
     @abstractmethod
     async def fetch_data(self) -> List[Dict[str, Any]]:
@@ -40,16 +117,178 @@ class BaseWorker(ABC):
     def process_item(self, raw_item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         pass
 
-    @abstractmethod
-    def store_data(self, db: Session, processed_data: Dict[str, Any], sync_log: SyncLog) -> bool:
-        pass
+    def store_batch(self, db: Session, rows: List[Dict[str, Any]], sync_log: SyncLog):
+        """
+        Grava linhas processadas comparando o content_hash com o do banco: só linhas novas ou
+        alteradas são escritas (em lote); as idênticas contam em records_unchanged.
+        """
+        for start in range(0, len(rows), WORKER_STORE_BATCH_SIZE):
+            self._store_chunk(db, rows[start : start + WORKER_STORE_BATCH_SIZE], sync_log)
+
+    def _store_chunk(self, db: Session, rows: List[Dict[str, Any]], sync_log: SyncLog):
+        # Chave repetida no lote (ex.: vários itens da mesma ordem): vale a última, como antes
+        by_key = {
+            tuple(row[field] for field in self.key_fields): {**row, "content_hash": content_hash(row)} for row in rows
+        }
+        superseded = len(rows) - len(by_key)
+
+        key_columns = [getattr(self.model, field) for field in self.key_fields]
+        if len(key_columns) == 1:
+            key_filter = key_columns[0].in_([key[0] for key in by_key])
+        else:
+            key_filter = tuple_(*key_columns).in_(list(by_key))
+
+        start_time = time.perf_counter()
+        try:
+            # Savepoint: uma falha descarta só este lote, não o que já foi gravado na execução
+            with db.begin_nested():
+                existing = {
+                    tuple(found[: len(key_columns)]): found[len(key_columns) :]
+                    for found in db.query(*key_columns, self.model.id, self.model.content_hash).filter(key_filter)
+                }
+
+                inserts, updates = [], []
+                now = datetime.utcnow()
+                for key, row in by_key.items():
+                    current = existing.get(key)
+                    if current is None:
+                        inserts.append(row)
+                    elif current[1] != row["content_hash"]:
+                        updates.append({**row, "id": current[0], "updated_at": now})
+
+                if inserts:
+                    db.execute(insert(self.model), inserts)
+                if updates:
+                    db.execute(update(self.model), updates)
+        except Exception as e:
+            logger.error(f"Error storing {len(rows)} {self.name} records: {str(e)}")
+            sync_log.records_failed += len(rows)
+            return
+
+        observe_sync_db_write(self.name, time.perf_counter() - start_time)
+        sync_log.records_created += len(inserts)
+        sync_log.records_updated += len(updates)
+        sync_log.records_unchanged += len(by_key) - len(inserts) - len(updates) + superseded
 
     @abstractmethod
-    async def run_sync(self):
+    async def run_sync(
+        self,
+        customer_codes: Optional[List[str]] = None,
+        job_id: Optional[UUID] = None,
+        shard: Optional[Shard] = None,
+        run_id: Optional[str] = None,
+    ):
+        """
+        Sincroniza todos os clientes ou só customer_codes. job_id liga o SyncLog ao job da fila;
+        shard limita a execução à partição do processo e run_id agrupa os SyncLog das partições.
+        """
         pass
 
+    def _new_sync_log(
+        self,
+        customer_codes: Optional[List[str]] = None,
+        job_id: Optional[UUID] = None,
+        shard: Optional[Shard] = None,
+        run_id: Optional[str] = None,
+    ) -> SyncLog:
+        details: Dict[str, Any] = {}
+        if customer_codes:
+            details["customer_codes"] = customer_codes
+        if shard:
+            details["shard"] = shard.index
+            details["shard_count"] = shard.count
+
+        return SyncLog(
+            sync_type=self.name,
+            status="running",
+            started_at=datetime.utcnow(),
+            job_id=job_id,
+            run_id=run_id,
+            details=details,
+        )
+
+    def _resume_checkpoint(
+        self, db: Session, sync_log: SyncLog, customer_codes: Optional[List[str]] = None, shard: Optional[Shard] = None
+    ) -> Optional[str]:
+        """
+        Checkpoint da execução anterior da mesma partição, se ela parou no meio (drain ou processo
+        morto) há menos de WORKER_RESUME_MAX_AGE segundos; a execução atual continua dali.
+        """
+        if customer_codes:
+            return None
+
+        previous = SyncLogRepository(db).get_previous_full_run(self.name, shard.index if shard else None, sync_log.id)
+        if previous is None or not previous.checkpoint:
+            return None
+
+        now = datetime.utcnow()
+        if previous.started_at < now - timedelta(seconds=WORKER_RESUME_MAX_AGE):
+            return None
+        if previous.status == "running":
+            # Sem commit recente, o processo morreu sem drain (SIGKILL, OOM); senão ainda está rodando
+            if previous.updated_at > now - timedelta(seconds=WORKER_RESUME_STALE_AFTER):
+                return None
+            previous.status = "interrupted"
+            previous.completed_at = previous.updated_at
+        elif previous.status != "interrupted":
+            return None
+
+        sync_log.checkpoint = previous.checkpoint
+        sync_log.details = {**(sync_log.details or {}), "resumed_from": str(previous.id)}
+        db.commit()
+        logger.info(f"Resuming {self.name} sync after customer {previous.checkpoint} (run {previous.id})")
+        return previous.checkpoint
+
+    def _customer_codes_query(
+        self, db: Session, customer_codes: Optional[List[str]] = None, after: Optional[str] = None
+    ):
+        query = db.query(SAPCustomer.customer_code).filter(SAPCustomer.is_active == True)
+        if customer_codes:
+            query = query.filter(SAPCustomer.customer_code.in_(customer_codes))
+        if after:
+            query = query.filter(SAPCustomer.customer_code > after)
+        return query
+
+    def _iter_customer_codes(
+        self,
+        db: Session,
+        customer_codes: Optional[List[str]] = None,
+        shard: Optional[Shard] = None,
+        after: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Códigos dos clientes ativos a sincronizar, restritos a customer_codes, à partição e ao checkpoint.
+        Lidos em páginas por keyset (customer_code > último lido): a memória não cresce com a carteira
+        e cada página é uma consulta curta, que sobrevive aos commits do loop do sync.
+        """
+        while True:
+            query = self._customer_codes_query(db, customer_codes, after)
+            page = [code for (code,) in query.order_by(SAPCustomer.customer_code).limit(WORKER_CODES_PAGE_SIZE)]
+            for code in page:
+                if shard is None or shard.owns(code):
+                    yield code
+            if len(page) < WORKER_CODES_PAGE_SIZE:
+                return
+            after = page[-1]
+
+    def _count_customer_codes(
+        self,
+        db: Session,
+        customer_codes: Optional[List[str]] = None,
+        shard: Optional[Shard] = None,
+        after: Optional[str] = None,
+    ) -> int:
+        """Quantidade de códigos que _iter_customer_codes vai devolver, sem carregá-los todos"""
+        if shard is None:
+            return self._customer_codes_query(db, customer_codes, after).count()
+        # O crc32 da partição só existe no Python: conta percorrendo as páginas
+        return sum(1 for _ in self._iter_customer_codes(db, customer_codes, shard, after))
+
     async def start(self):
+        self._setup_signal_handlers()
         self.is_running = True
+        # Chamadas ao SAP dos workers ficam atrás das rotas interativas no limitador
+        sap_priority.set(WORKER)
         logger.info(f"Starting {self.name} worker with interval {self.interval_seconds} seconds")
 
         while self.is_running:
@@ -63,16 +302,23 @@ class BaseWorker(ABC):
 
             if self.is_running:
                 logger.info(f"{self.name} worker sleeping for {self.interval_seconds} seconds")
-                await asyncio.sleep(self.interval_seconds)
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=self.interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
 
         logger.info(f"{self.name} worker stopped")
 
     def stop(self):
         logger.info(f"Stopping {self.name} worker")
         self.is_running = False
+        self.draining = True
+        self._stopped.set()
 
     async def run_once(self):
         logger.info(f"Running {self.name} worker once")
+        self._setup_signal_handlers()
+        sap_priority.set(WORKER)
         try:
             await self.run_sync()
             logger.info(f"{self.name} worker single run completed")
@@ -1,20 +1,26 @@
 import asyncio
 import logging
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional
+from uuid import UUID
 
-from config import LOG_LEVEL, WORKER_CREDIT_INTERVAL
+from config import WORKER_CREDIT_INTERVAL
+from metrics import observe_sync_sap_fetch
 from sap_client import call_sap
-from sqlalchemy.orm import Session
 from src.database.connection import get_db_session
-from src.database.models import SAPCreditLimit, SAPCustomer, SyncLog
-from src.workers.base_worker import BaseWorker
+from src.database.models import SAPCreditLimit
+from src.workers.base_worker import BaseWorker, SyncProgress
+from src.workers.sharding import Shard
 
-logging.basicConfig(level=getattr(logging, LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
 
 class CreditWorker(BaseWorker):
+    shardable = True
+    model = SAPCreditLimit
+    key_fields = ("customer_code", "segment")
+
     def __init__(self):
         super().__init__("credit_limits", interval_seconds=WORKER_CREDIT_INTERVAL)
 
@@ -43,68 +49,65 @@ class CreditWorker(BaseWorker):
             "sap_data": raw_data,
         }
 
-    def store_data(self, db: Session, processed_data: Dict[str, Any], sync_log: SyncLog) -> bool:
-        try:
-            if not processed_data:
-                return False
-
-            customer_code = processed_data.get("customer_code")
-            segment = processed_data.get("segment")
-
-            existing = db.query(SAPCreditLimit).filter_by(customer_code=customer_code, segment=segment).first()
-
-            if existing:
-                existing.sap_data = processed_data["sap_data"]
-                existing.updated_at = datetime.utcnow()
-                sync_log.records_updated += 1
-            else:
-                credit_limit = SAPCreditLimit(**processed_data)
-                db.add(credit_limit)
-                sync_log.records_created += 1
-
-            return True
-
-        except Exception as e:
-            logger.error(f"Error storing credit limit for customer {processed_data.get('customer_code')}: {str(e)}")
-            return False
-
-    async def run_sync(self):
-        logger.info("Starting credit limits sync")
+    async def run_sync(
+        self,
+        customer_codes: Optional[List[str]] = None,
+        job_id: Optional[UUID] = None,
+        shard: Optional[Shard] = None,
+        run_id: Optional[str] = None,
+    ):
+        logger.info("Starting credit limits sync" + (f" (shard {shard})" if shard else ""))
 
         with get_db_session() as db:
-            sync_log = SyncLog(
-                sync_type="credit_limits",
-                status="running",
-                started_at=datetime.utcnow(),
-            )
+            sync_log = self._new_sync_log(customer_codes, job_id, shard, run_id)
             db.add(sync_log)
             db.commit()
+            progress = SyncProgress(self.name, full=not customer_codes)
 
             try:
-                customers = db.query(SAPCustomer).filter_by(is_active=True).all()
-                logger.info(f"Found {len(customers)} active customers to sync credit limits")
+                checkpoint = self._resume_checkpoint(db, sync_log, customer_codes, shard)
+                total = self._count_customer_codes(db, customer_codes, shard, after=checkpoint)
+                logger.info(f"Found {total} active customers to sync credit limits")
+                codes = self._iter_customer_codes(db, customer_codes, shard, after=checkpoint)
+                sync_log.records_total = total
+                db.commit()
+
+                # Uma linha por cliente: acumula para comparar os hashes e gravar de 50 em 50
+                batch = []
+                interrupted = False
+                processed_through = checkpoint
+                for customer_code in codes:
+                    if self.draining:
+                        interrupted = True
+                        break
 
-                for customer in customers:
                     try:
                         sync_log.records_processed += 1
 
-                        credit_data = await self.fetch_data_for_customer(customer.customer_code)
+                        start_time = time.perf_counter()
+                        credit_data = await self.fetch_data_for_customer(customer_code)
+                        observe_sync_sap_fetch(self.name, time.perf_counter() - start_time)
 
                         if credit_data:
-                            processed = self.process_item(credit_data, customer.customer_code)
-
-                            if not self.store_data(db, processed, sync_log):
-                                sync_log.records_failed += 1
-
-                            if sync_log.records_processed % 50 == 0:
-                                db.commit()
-                                logger.info(f"Processed {sync_log.records_processed} credit limits")
+                            batch.append(self.process_item(credit_data, customer_code))
 
                     except Exception as e:
-                        logger.error(f"Error syncing credit for customer {customer.customer_code}: {str(e)}")
+                        logger.error(f"Error syncing credit for customer {customer_code}: {str(e)}")
                         sync_log.records_failed += 1
 
-                sync_log.status = "completed"
+                    processed_through = customer_code
+                    if sync_log.records_processed % 50 == 0:
+                        self.store_batch(db, batch, sync_log)
+                        batch = []
+                        sync_log.checkpoint = processed_through
+                        db.commit()
+                        progress.report(sync_log.records_processed, total - sync_log.records_processed)
+                        logger.info(f"Processed {sync_log.records_processed} credit limits")
+
+                # Último lote (ou o lote em andamento, no drain) gravado junto com o checkpoint
+                self.store_batch(db, batch, sync_log)
+                sync_log.checkpoint = processed_through
+                sync_log.status = "interrupted" if interrupted else "completed"
                 sync_log.completed_at = datetime.utcnow()
 
             except Exception as e:
@@ -115,10 +118,11 @@ class CreditWorker(BaseWorker):
 
             finally:
                 db.commit()
+                progress.finish(sync_log)
                 logger.info(
                     f"Credit limits sync completed: {sync_log.records_processed} processed, "
                     f"{sync_log.records_created} created, {sync_log.records_updated} updated, "
-                    f"{sync_log.records_failed} failed"
+                    f"{sync_log.records_unchanged} unchanged, {sync_log.records_failed} failed"
                 )
 
 
@@ -1,99 +1,188 @@
 import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-from config import LOG_LEVEL, WORKER_CUSTOMER_INTERVAL
-from sap_client import call_sap
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Union
+from uuid import UUID
+
+from config import (
+    WORKER_CUSTOMER_INTERVAL,
+    WORKER_CUSTOMER_PAGE_SIZE,
+    WORKER_STORE_BATCH_SIZE,
+)
+from sap_client import iter_sap_items
 from sqlalchemy.orm import Session
 from src.database.connection import get_db_session
 from src.database.models import SAPCustomer, SyncLog
-from src.workers.base_worker import BaseWorker
+from src.workers.base_worker import BaseWorker, SyncProgress
+from src.workers.sharding import Shard
 
-logging.basicConfig(level=getattr(logging, LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
+# Faixa de códigos (KUNNR numérico, 10 dígitos) percorrida pela sincronização completa
+CUSTOMER_ID_MIN = 1
+CUSTOMER_ID_MAX = 9999999999
 
-class CustomerWorker(BaseWorker):
-    def __init__(self):
-        super().__init__("customers", interval_seconds=WORKER_CUSTOMER_INTERVAL)
+_END_OF_DATA = object()
 
-    async def fetch_data(self) -> List[Dict[str, Any]]:
-        payload = {
-            "MAXROWS": 9999999,
-            "IDRANGE": {"item": {"SIGN": "I", "OPTION": "BT", "LOW": "1", "HIGH": "9999999999"}},
-        }
 
-        response = await call_sap("BAPI_CUSTOMER_GETLIST", payload)
+class PageEnd(NamedTuple):
+    """Marca, no fluxo de fetch_data, que todos os clientes até `high` já foram entregues"""
 
-        if isinstance(response, dict):
-            response_data = response.get("BAPI_CUSTOMER_GETLIST.Response", {})
-            address_data = response_data.get("ADDRESSDATA", {})
-            items = address_data.get("item", [])
+    high: int
 
-            if isinstance(items, dict):
-                items = [items]
 
-            return items
+def _customer_id(code: str) -> int:
+    try:
+        return int(code)
+    except ValueError:
+        return CUSTOMER_ID_MAX + 1
 
-        return []
 
-    def process_item(self, raw_item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        customer_code = str(raw_item.get("CUSTOMER", "")).strip()
+class CustomerWorker(BaseWorker):
+    model = SAPCustomer
+    key_fields = ("customer_code",)
 
-        if not customer_code:
-            return None
+    def __init__(self):
+        super().__init__("customers", interval_seconds=WORKER_CUSTOMER_INTERVAL)
 
-        return {"customer_code": customer_code, "sap_data": raw_item}
+    async def fetch_data(
+        self, customer_codes: Optional[List[str]] = None, after: Optional[str] = None
+    ) -> AsyncIterator[Union[Dict[str, Any], PageEnd]]:
+        """
+        Clientes do BAPI_CUSTOMER_GETLIST, entregues à medida que chegam. Sem customer_codes, a
+        faixa de códigos (a partir de `after`) é lida em páginas de até WORKER_CUSTOMER_PAGE_SIZE
+        linhas, com um PageEnd depois de cada página.
+        """
+        if customer_codes:
+            id_range = {"item": [{"SIGN": "I", "OPTION": "EQ", "LOW": code, "HIGH": ""} for code in customer_codes]}
+            payload = {"MAXROWS": len(customer_codes), "IDRANGE": id_range}
+            async for item in iter_sap_items("BAPI_CUSTOMER_GETLIST", payload, "ADDRESSDATA"):
+                yield item
+            return
+
+        low, width = (int(after) + 1 if after else CUSTOMER_ID_MIN), WORKER_CUSTOMER_PAGE_SIZE
+        # Códigos já entregues por uma página cortada pelo MAXROWS, para não repetir no refazer
+        delivered: Set[str] = set()
+        while low <= CUSTOMER_ID_MAX:
+            high = min(low + width - 1, CUSTOMER_ID_MAX)
+            payload = {
+                "MAXROWS": WORKER_CUSTOMER_PAGE_SIZE,
+                "IDRANGE": {"item": {"SIGN": "I", "OPTION": "BT", "LOW": f"{low:010d}", "HIGH": f"{high:010d}"}},
+            }
+
+            count = 0
+            async for item in iter_sap_items("BAPI_CUSTOMER_GETLIST", payload, "ADDRESSDATA"):
+                count += 1
+                code = str(item.get("CUSTOMER", "")).strip()
+                if code in delivered:
+                    continue
+                delivered.add(code)
+                yield item
+
+            if count >= WORKER_CUSTOMER_PAGE_SIZE and high > low:
+                # A faixa tem mais clientes que cabem na página: refaz o mesmo início com metade da largura
+                width = (high - low + 1) // 2
+                continue
+
+            logger.info(f"Fetched {count} customers in range {low:010d}-{high:010d}")
+            yield PageEnd(high)
+            delivered = {code for code in delivered if _customer_id(code) > high}
+            # Próxima faixa dimensionada pela densidade da atual para encher ~metade da página
+            if count:
+                width = min(max(1, (high - low + 1) * WORKER_CUSTOMER_PAGE_SIZE // (2 * count)), width * 4)
+            else:
+                width *= 4
+            low = high + 1
 
-    def store_data(self, db: Session, processed_data: Dict[str, Any], sync_log: SyncLog) -> bool:
+    async def _produce(self, queue: asyncio.Queue, customer_codes: Optional[List[str]], after: Optional[str]):
+        # O fim (ou o erro) da leitura é sinalizado com _END_OF_DATA; cancelado, não há quem leia a fila
         try:
-            if not processed_data:
-                return False
+            async for item in self.fetch_data(customer_codes, after):
+                await queue.put(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await queue.put(_END_OF_DATA)
+            raise
+        await queue.put(_END_OF_DATA)
+
+    def _flush(self, db: Session, batch: List[Dict[str, Any]], sync_log: SyncLog, completed_through: Optional[int]):
+        self.store_batch(db, batch, sync_log)
+        # As páginas marcadas antes deste lote estão inteiras no banco
+        if completed_through is not None:
+            sync_log.checkpoint = f"{completed_through:010d}"
+        db.commit()
 
-            customer_code = processed_data.get("customer_code")
-
-            existing = db.query(SAPCustomer).filter_by(customer_code=customer_code).first()
-
-            if existing:
-                existing.sap_data = processed_data["sap_data"]
-                existing.updated_at = datetime.utcnow()
-                sync_log.records_updated += 1
-            else:
-                customer = SAPCustomer(**processed_data)
-                db.add(customer)
-                sync_log.records_created += 1
+    def process_item(self, raw_item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        customer_code = str(raw_item.get("CUSTOMER", "")).strip()
 
-            return True
+        if not customer_code:
+            return None
 
-        except Exception as e:
-            logger.error(f"Error storing customer {processed_data.get('customer_code')}: {str(e)}")
-            return False
+        return {"customer_code": customer_code, "sap_data": raw_item}
 
-    async def run_sync(self):
+    async def run_sync(
+        self,
+        customer_codes: Optional[List[str]] = None,
+        job_id: Optional[UUID] = None,
+        shard: Optional[Shard] = None,
+        run_id: Optional[str] = None,
+    ):
+        # O BAPI_CUSTOMER_GETLIST é paginado por faixa de código, não por partição: não há sharding
         logger.info("Starting customer sync")
 
         with get_db_session() as db:
-            sync_log = SyncLog(sync_type="customers", status="running", started_at=datetime.utcnow())
+            sync_log = self._new_sync_log(customer_codes, job_id, run_id=run_id)
             db.add(sync_log)
             db.commit()
 
+            checkpoint = self._resume_checkpoint(db, sync_log, customer_codes)
+
+            # A leitura do SAP segue enquanto o lote anterior é gravado (numa thread); a fila
+            # limitada segura a leitura quando a gravação fica para trás
+            queue: asyncio.Queue = asyncio.Queue(maxsize=WORKER_STORE_BATCH_SIZE * 2)
+            producer = asyncio.create_task(self._produce(queue, customer_codes, checkpoint))
+            progress = SyncProgress(self.name, full=not customer_codes)
+
             try:
-                raw_data = await self.fetch_data()
-                logger.info(f"Fetched {len(raw_data)} customers from SAP")
+                if customer_codes:
+                    sync_log.records_total = len(customer_codes)
+                    db.commit()
+
+                batch = []
+                completed_through = None
+                interrupted = False
+                while (item := await queue.get()) is not _END_OF_DATA:
+                    if isinstance(item, PageEnd):
+                        completed_through = item.high
+                        continue
 
-                for item in raw_data:
                     sync_log.records_processed += 1
                     processed = self.process_item(item)
 
-                    if not self.store_data(db, processed, sync_log):
+                    if processed:
+                        batch.append(processed)
+                    else:
                         sync_log.records_failed += 1
 
-                    if sync_log.records_processed % 100 == 0:
-                        db.commit()
+                    if len(batch) >= WORKER_STORE_BATCH_SIZE:
+                        await asyncio.to_thread(self._flush, db, batch, sync_log, completed_through)
+                        batch = []
+                        progress.report(sync_log.records_processed, queue.qsize(), "write_buffer")
                         logger.info(f"Processed {sync_log.records_processed} customers")
 
-                sync_log.status = "completed"
+                    if self.draining:
+                        interrupted = True
+                        break
+
+                if not interrupted:
+                    # Propaga um erro da leitura do SAP
+                    await producer
+                    logger.info(f"Fetched {sync_log.records_processed} customers from SAP")
+                    sync_log.records_total = sync_log.records_processed
+                await asyncio.to_thread(self._flush, db, batch, sync_log, completed_through)
+
+                sync_log.status = "interrupted" if interrupted else "completed"
                 sync_log.completed_at = datetime.utcnow()
 
             except Exception as e:
@@ -103,11 +192,13 @@ class CustomerWorker(BaseWorker):
                 sync_log.completed_at = datetime.utcnow()
 
             finally:
+                producer.cancel()
                 db.commit()
+                progress.finish(sync_log)
                 logger.info(
                     f"Customer sync completed: {sync_log.records_processed} processed, "
                     f"{sync_log.records_created} created, {sync_log.records_updated} updated, "
-                    f"{sync_log.records_failed} failed"
+                    f"{sync_log.records_unchanged} unchanged, {sync_log.records_failed} failed"
                 )
 
 
@@ -0,0 +1,168 @@
+"""
+Consumidor da fila de sincronizações sob demanda (tabela sync_jobs).
+
+Os jobs entram pelo POST /sync/trigger/{sync_type} e são reservados com SELECT ... FOR UPDATE
+SKIP LOCKED, então vários consumidores (réplicas do scheduler ou deste módulo) podem rodar ao
+mesmo tempo sem pegar o mesmo job. Enquanto roda, o job recebe heartbeats; se o processo morrer,
+outro consumidor o retoma depois de SYNC_JOB_STALE_AFTER segundos.
+
+Jobs sem escopo (todos os clientes) usam o mesmo lease das execuções agendadas: se uma delas já
+está rodando, o job volta para a fila e é tentado de novo depois de SYNC_JOB_RETRY_DELAY segundos.
+Um job interrompido por SIGTERM também volta para a fila, e o próximo consumidor o retoma do checkpoint.
+
+Uso:
+    python -m src.workers.job_worker
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Dict, List, Optional
+
+from config import (
+    SYNC_JOB_HEARTBEAT_INTERVAL,
+    SYNC_JOB_MAX_ATTEMPTS,
+    SYNC_JOB_POLL_INTERVAL,
+    SYNC_JOB_RETRY_DELAY,
+    SYNC_JOB_STALE_AFTER,
+)
+from metrics import set_sync_queue_depth
+from sap_limiter import WORKER, sap_priority
+from src.database.connection import get_db_session
+from src.database.models import SyncJob
+from src.repository.sap_repository import SyncJobRepository, SyncLogRepository
+from src.workers.base_worker import BaseWorker
+from src.workers.credit_worker import CreditWorker
+from src.workers.customer_worker import CustomerWorker
+from src.workers.lease import advisory_lease
+from src.workers.sales_worker import SalesWorker
+from src.workers.score_worker import ScoreSnapshotWorker
+
+logger = logging.getLogger(__name__)
+
+
+class SyncJobConsumer:
+    def __init__(self, workers: List[BaseWorker]):
+        self.workers: Dict[str, BaseWorker] = {worker.name: worker for worker in workers}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = asyncio.Event()
+
+    def stop(self):
+        logger.info("Sync job consumer stopping: no new jobs will be claimed")
+        self.stop_event.set()
+        for worker in self.workers.values():
+            worker.stop()
+
+    def _claim(self) -> Optional[SyncJob]:
+        with get_db_session() as db:
+            repository = SyncJobRepository(db)
+            job = repository.claim_next(self.worker_id, SYNC_JOB_STALE_AFTER, SYNC_JOB_MAX_ATTEMPTS)
+            # Profundidade da fila a cada consulta, para o GET /sync/progress e os alertas
+            queued = repository.count_queued()
+            for sync_type in self.workers:
+                set_sync_queue_depth(sync_type, "sync_jobs", queued.get(sync_type, 0))
+            if job:
+                # Carrega os atributos expirados pelo commit antes de soltar o objeto da sessão
+                db.refresh(job)
+                db.expunge(job)
+            return job
+
+    async def _heartbeat(self, job: SyncJob):
+        while True:
+            await asyncio.sleep(SYNC_JOB_HEARTBEAT_INTERVAL)
+            try:
+                with get_db_session() as db:
+                    SyncJobRepository(db).heartbeat(job.id)
+            except Exception as e:
+                logger.warning("Heartbeat failed for sync job %s: %s", job.id, e)
+
+    async def _run(self, job: SyncJob) -> str:
+        worker = self.workers[job.sync_type]
+
+        if job.customer_codes:
+            await worker.run_sync(customer_codes=job.customer_codes, job_id=job.id)
+        else:
+            # Lock exclusivo no tipo: com uma execução agendada em andamento (inteira ou em
+            # partições) o job volta para a fila
+            with advisory_lease(job.sync_type) as acquired:
+                if not acquired:
+                    return "requeued"
+                await worker.run_sync(job_id=job.id)
+
+        with get_db_session() as db:
+            sync_log = SyncLogRepository(db).get_by_job(job.id)
+            return sync_log.status if sync_log else "failed"
+
+    async def process(self, job: SyncJob):
+        logger.info(
+            "Running sync job %s (%s, attempt %d)",
+            job.id,
+            job.sync_type,
+            job.attempts,
+            extra={"job_id": str(job.id), "sync_type": job.sync_type, "customer_codes": job.customer_codes},
+        )
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        error_message = None
+        try:
+            status = await self._run(job)
+        except Exception as e:
+            logger.error("Sync job %s failed: %s", job.id, e, exc_info=True)
+            status, error_message = "failed", str(e)[:500]
+        finally:
+            heartbeat.cancel()
+
+        with get_db_session() as db:
+            repository = SyncJobRepository(db)
+            if status == "requeued":
+                logger.info("Sync job %s requeued: a %s sync is already running", job.id, job.sync_type)
+                repository.requeue(job.id, SYNC_JOB_RETRY_DELAY)
+            elif status == "interrupted":
+                # Processo parando (SIGTERM): outro consumidor retoma do checkpoint
+                logger.info("Sync job %s interrupted, returning it to the queue", job.id)
+                repository.requeue(job.id, 0)
+            else:
+                repository.finish(job.id, status, error_message)
+                logger.info("Sync job %s finished: %s", job.id, status)
+
+    async def run(self):
+        sap_priority.set(WORKER)
+        logger.info("Sync job consumer %s started", self.worker_id)
+
+        while not self.stop_event.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error("Could not claim sync job: %s", e)
+                job = None
+
+            if job is not None:
+                if job.sync_type in self.workers:
+                    await self.process(job)
+                else:
+                    with get_db_session() as db:
+                        SyncJobRepository(db).finish(job.id, "failed", f"Unknown sync type {job.sync_type}")
+                # Pode haver mais jobs na fila: procura de novo sem esperar
+                continue
+
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), timeout=SYNC_JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+        logger.info("Sync job consumer stopped")
+
+
+async def main():
+    consumer = SyncJobConsumer([CustomerWorker(), SalesWorker(), CreditWorker(), ScoreSnapshotWorker()])
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, consumer.stop)
+
+    await consumer.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""
+Lease de execução dos jobs de sincronização entre réplicas, via advisory lock do Postgres.
+"""
+
+import hashlib
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import text
+from src.database.connection import engine
+
+
+def _lock_key(job: str) -> int:
+    # Chave bigint estável por job para pg_try_advisory_lock
+    return int.from_bytes(hashlib.sha1(f"sap_connector:{job}".encode()).digest()[:8], "big", signed=True)
+
+
+@contextmanager
+def advisory_lease(job: str, parent: Optional[str] = None) -> Iterator[bool]:
+    """
+    Lease do job entre réplicas via advisory lock de sessão. A conexão fica aberta durante a
+    execução; se o processo morrer o Postgres libera o lock junto com a sessão.
+
+    Com `parent`, pega antes um lock compartilhado em `parent`: as partições de um tipo
+    ("sales_orders:0/4", ...) rodam juntas, mas excluem um sync completo do tipo, que pega o
+    lock exclusivo em "sales_orders" (e vice-versa).
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+
+    locks = [("pg_try_advisory_lock_shared", "pg_advisory_unlock_shared", _lock_key(parent))] if parent else []
+    locks.append(("pg_try_advisory_lock", "pg_advisory_unlock", _lock_key(job)))
+    with engine.connect() as connection:
+        held = []
+        try:
+            for lock, unlock, key in locks:
+                if not connection.execute(text(f"SELECT {lock}(:key)"), {"key": key}).scalar():
+                    break
+                held.append((unlock, key))
+            connection.commit()
+            yield len(held) == len(locks)
+        finally:
+            for unlock, key in reversed(held):
+                connection.execute(text(f"SELECT {unlock}(:key)"), {"key": key})
+            connection.commit()
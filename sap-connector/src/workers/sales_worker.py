@@ -1,20 +1,26 @@
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
+from uuid import UUID
 
-from config import LOG_LEVEL, WORKER_SALES_INTERVAL
+from config import WORKER_SALES_INTERVAL
+from metrics import observe_sync_sap_fetch
 from sap_client import call_sap
-from sqlalchemy.orm import Session
 from src.database.connection import get_db_session
-from src.database.models import SAPCustomer, SAPSalesOrder, SyncLog
-from src.workers.base_worker import BaseWorker
+from src.database.models import SAPSalesOrder
+from src.workers.base_worker import BaseWorker, SyncProgress
+from src.workers.sharding import Shard
 
-logging.basicConfig(level=getattr(logging, LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
 
 class SalesWorker(BaseWorker):
+    shardable = True
+    model = SAPSalesOrder
+    key_fields = ("order_number",)
+
     def __init__(self):
         super().__init__("sales_orders", interval_seconds=WORKER_SALES_INTERVAL)
 
@@ -67,64 +73,65 @@ class SalesWorker(BaseWorker):
             "sap_data": raw_item,
         }
 
-    def store_data(self, db: Session, processed_data: Dict[str, Any], sync_log: SyncLog) -> bool:
-        try:
-            if not processed_data:
-                return False
-
-            order_number = processed_data.get("order_number")
-
-            existing = db.query(SAPSalesOrder).filter_by(order_number=order_number).first()
-
-            if existing:
-                existing.sap_data = processed_data["sap_data"]
-                existing.customer_code = processed_data["customer_code"]
-                existing.document_date = processed_data["document_date"]
-                existing.updated_at = datetime.utcnow()
-                sync_log.records_updated += 1
-            else:
-                sales_order = SAPSalesOrder(**processed_data)
-                db.add(sales_order)
-                sync_log.records_created += 1
-
-            return True
-
-        except Exception as e:
-            logger.error(f"Error storing sales order {processed_data.get('order_number')}: {str(e)}")
-            return False
-
-    async def run_sync(self):
-        logger.info("Starting sales orders sync")
+    async def run_sync(
+        self,
+        customer_codes: Optional[List[str]] = None,
+        job_id: Optional[UUID] = None,
+        shard: Optional[Shard] = None,
+        run_id: Optional[str] = None,
+    ):
+        logger.info("Starting sales orders sync" + (f" (shard {shard})" if shard else ""))
 
         with get_db_session() as db:
-            sync_log = SyncLog(sync_type="sales_orders", status="running", started_at=datetime.utcnow())
+            sync_log = self._new_sync_log(customer_codes, job_id, shard, run_id)
             db.add(sync_log)
             db.commit()
+            progress = SyncProgress(self.name, full=not customer_codes)
+            index = 0
 
             try:
-                customers = db.query(SAPCustomer).filter_by(is_active=True).all()
-                logger.info(f"Found {len(customers)} active customers to sync sales orders")
+                checkpoint = self._resume_checkpoint(db, sync_log, customer_codes, shard)
+                total = self._count_customer_codes(db, customer_codes, shard, after=checkpoint)
+                logger.info(f"Found {total} active customers to sync sales orders")
+                codes = self._iter_customer_codes(db, customer_codes, shard, after=checkpoint)
+
+                # O total de ordens só é conhecido no fim; o progresso é medido em clientes
+                base_details = dict(sync_log.details or {})
+                interrupted = False
+                for index, customer_code in enumerate(codes, start=1):
+                    if self.draining:
+                        interrupted = True
+                        break
 
-                for customer in customers:
                     try:
-                        sales_data = await self.fetch_data_for_customer(customer.customer_code)
+                        start_time = time.perf_counter()
+                        sales_data = await self.fetch_data_for_customer(customer_code)
+                        observe_sync_sap_fetch(self.name, time.perf_counter() - start_time)
 
+                        batch = []
                         for item in sales_data:
                             sync_log.records_processed += 1
-                            processed = self.process_item(item, customer.customer_code)
+                            processed = self.process_item(item, customer_code)
 
-                            if not self.store_data(db, processed, sync_log):
+                            if processed:
+                                batch.append(processed)
+                            else:
                                 sync_log.records_failed += 1
 
-                            if sync_log.records_processed % 100 == 0:
-                                db.commit()
-                                logger.info(f"Processed {sync_log.records_processed} sales orders")
+                        self.store_batch(db, batch, sync_log)
 
                     except Exception as e:
-                        logger.error(f"Error syncing sales for customer {customer.customer_code}: {str(e)}")
+                        logger.error(f"Error syncing sales for customer {customer_code}: {str(e)}")
                         sync_log.records_failed += 1
 
-                sync_log.status = "completed"
+                    sync_log.checkpoint = customer_code
+                    sync_log.details = {**base_details, "customers_total": total, "customers_processed": index}
+                    if index % 50 == 0:
+                        db.commit()
+                        progress.report(index, total - index, items=sync_log.records_processed)
+                        logger.info(f"Processed {sync_log.records_processed} sales orders")
+
+                sync_log.status = "interrupted" if interrupted else "completed"
                 sync_log.completed_at = datetime.utcnow()
 
             except Exception as e:
@@ -135,10 +142,12 @@ class SalesWorker(BaseWorker):
 
             finally:
                 db.commit()
+                # Progresso em clientes; as ordens vão no contador de itens
+                progress.finish(sync_log, index, items=sync_log.records_processed)
                 logger.info(
                     f"Sales orders sync completed: {sync_log.records_processed} processed, "
                     f"{sync_log.records_created} created, {sync_log.records_updated} updated, "
-                    f"{sync_log.records_failed} failed"
+                    f"{sync_log.records_unchanged} unchanged, {sync_log.records_failed} failed"
                 )
 
 
@@ -0,0 +1,307 @@
+"""
+Scheduler único dos workers de sincronização com o SAP.
+
+Roda customers, sales_orders, credit_limits, score_snapshots e model_statistics num só processo, cada um com uma agenda no formato
+cron (minuto hora dia mês dia-da-semana) mais um jitter aleatório, para as réplicas não baterem
+no CPI no mesmo segundo. Cada execução pega um lease por job via advisory lock do Postgres: se
+outra réplica já está rodando o job, a execução é pulada; se a execução anterior deste processo
+ainda não terminou, também.
+
+Com WORKER_SHARD_COUNT > 1, sales_orders, credit_limits e score_snapshots rodam em paralelo em N processos, cada
+um na sua partição de clientes (ver src.workers.sharding), com um lease por partição e um run_id
+comum que agrupa os SyncLog de todas elas.
+
+O processo também consome a fila de sincronizações sob demanda (ver src.workers.job_worker).
+
+Uso:
+    python -m src.workers.scheduler
+"""
+
+import asyncio
+import logging
+import random
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from config import (
+    WORKER_CREDIT_SCHEDULE,
+    WORKER_CUSTOMER_SCHEDULE,
+    WORKER_METRICS_PORT,
+    WORKER_SALES_SCHEDULE,
+    WORKER_SCHEDULE_JITTER,
+    WORKER_SCORE_SCHEDULE,
+    WORKER_STATISTICS_SCHEDULE,
+)
+from metrics import (
+    increment_worker_run,
+    observe_worker_run,
+    seed_sync_last_success,
+    set_worker_next_run,
+    start_metrics_server,
+)
+from sap_limiter import WORKER, sap_priority
+from src.database.connection import get_db_session
+from src.repository.sap_repository import SyncLogRepository
+from src.workers.base_worker import BaseWorker
+from src.workers.credit_worker import CreditWorker
+from src.workers.customer_worker import CustomerWorker
+from src.workers.job_worker import SyncJobConsumer
+from src.workers.lease import advisory_lease
+from src.workers.sales_worker import SalesWorker
+from src.workers.score_worker import ScoreSnapshotWorker
+from src.workers.sharding import Shard, current_shard
+from src.workers.statistics_worker import StatisticsWorker
+
+logger = logging.getLogger(__name__)
+
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_field(field: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in field.split(","):
+        expression, _, step = part.partition("/")
+        if expression == "*":
+            start, end = low, high
+        elif "-" in expression:
+            start, end = (int(value) for value in expression.split("-"))
+        else:
+            start = end = int(expression)
+            if step:
+                end = high
+        values.update(range(start, end + 1, int(step) if step else 1))
+
+    if not values or min(values) < low or max(values) > high:
+        raise ValueError(f"Invalid cron field '{field}'")
+    return values
+
+
+class CronSchedule:
+    """Agenda cron de 5 campos (*, listas, intervalos a-b e passos */n); domingo é 0 ou 7"""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: '{expression}'")
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(field, low, high) for field, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        # Como no cron: com dia do mês e dia da semana restritos, basta um dos dois
+        if not self.any_day and not self.any_weekday:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+class ScheduledJob:
+    def __init__(self, worker: BaseWorker, schedule: CronSchedule, jitter: float, shard: Optional[Shard] = None):
+        self.worker = worker
+        self.schedule = schedule
+        self.jitter = jitter
+        self.shard = shard
+        self.task: Optional[asyncio.Task] = None
+        self.next_run = 0.0
+        self.scheduled_at = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.worker.name
+
+    @property
+    def lease_name(self) -> str:
+        # Com partições, cada uma tem seu próprio lease; sem, uma única réplica roda o job
+        return f"{self.name}:{self.shard.index}/{self.shard.count}" if self.shard else self.name
+
+    @property
+    def lease_parent(self) -> Optional[str]:
+        # Partições seguram o nome do tipo em modo compartilhado: um sync completo da fila
+        # (lock exclusivo no mesmo nome) não roda junto com elas
+        return self.name if self.shard else None
+
+    @property
+    def run_id(self) -> str:
+        # Igual em todas as partições: vem do horário agendado, antes do jitter
+        return f"{self.name}:{datetime.utcfromtimestamp(self.scheduled_at):%Y%m%dT%H%M}"
+
+    def plan_next(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.scheduled_at = self.schedule.next_after(datetime.fromtimestamp(now)).timestamp()
+        self.next_run = self.scheduled_at + random.uniform(0, self.jitter)
+        set_worker_next_run(self.name, self.next_run)
+
+
+class Scheduler:
+    def __init__(self, jobs: List[ScheduledJob]):
+        self.jobs = jobs
+        self.stop_event = asyncio.Event()
+
+    def stop(self):
+        logger.info("Scheduler stopping: no new runs will be started")
+        self.stop_event.set()
+        # Execuções em andamento terminam o lote atual e gravam o checkpoint (status "interrupted")
+        for job in self.jobs:
+            job.worker.stop()
+
+    async def _run_job(self, job: ScheduledJob, run_id: str):
+        try:
+            with advisory_lease(job.lease_name, job.lease_parent) as acquired:
+                if not acquired:
+                    logger.info("Skipping %s: lease held by another replica", job.name, extra={"job": job.name})
+                    increment_worker_run(job.name, "skipped_locked")
+                    return
+                await self._execute(job, run_id)
+        except Exception as e:
+            # Banco fora do ar: sem lease não há como garantir execução única, então não roda
+            logger.error("Could not take lease for %s: %s", job.name, e, extra={"job": job.name})
+            increment_worker_run(job.name, "lease_error")
+
+    async def _execute(self, job: ScheduledJob, run_id: str):
+        start_time = time.perf_counter()
+        status = "success"
+        try:
+            await job.worker.run_sync(shard=job.shard, run_id=run_id)
+        except Exception as e:
+            status = "failed"
+            logger.error("Error in %s worker: %s", job.name, e, exc_info=True, extra={"job": job.name})
+        finally:
+            duration = time.perf_counter() - start_time
+            observe_worker_run(job.name, status, duration)
+            logger.info(
+                "%s run finished in %.1fs (%s)",
+                job.name,
+                duration,
+                status,
+                extra={"job": job.name, "duration": duration, "status": status},
+            )
+
+    def _start_due(self, now: float):
+        for job in self.jobs:
+            if job.next_run > now:
+                continue
+
+            if job.task is not None and not job.task.done():
+                logger.warning("Skipping %s: previous run still in progress", job.name, extra={"job": job.name})
+                increment_worker_run(job.name, "skipped_running")
+            else:
+                job.task = asyncio.create_task(self._run_job(job, job.run_id), name=f"worker-{job.name}")
+            job.plan_next(now)
+
+    async def run(self):
+        # Chamadas ao SAP das execuções ficam atrás das rotas interativas no limitador
+        sap_priority.set(WORKER)
+        for job in self.jobs:
+            job.plan_next()
+            logger.info(
+                "Scheduled %s%s with '%s', next run at %s",
+                job.name,
+                f" (shard {job.shard})" if job.shard else "",
+                job.schedule.expression,
+                datetime.fromtimestamp(job.next_run).isoformat(timespec="seconds"),
+            )
+
+        while not self.stop_event.is_set():
+            self._start_due(time.time())
+            delay = max(0.0, min(job.next_run for job in self.jobs) - time.time())
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+        running = [job.task for job in self.jobs if job.task is not None and not job.task.done()]
+        if running:
+            logger.info("Waiting for %d running job(s) to finish", len(running))
+            await asyncio.gather(*running, return_exceptions=True)
+        logger.info("Scheduler stopped")
+
+
+def build_jobs(workers: List[BaseWorker]) -> List[ScheduledJob]:
+    shard = current_shard()
+    schedules: Dict[str, str] = {
+        "customers": WORKER_CUSTOMER_SCHEDULE,
+        "sales_orders": WORKER_SALES_SCHEDULE,
+        "credit_limits": WORKER_CREDIT_SCHEDULE,
+        "score_snapshots": WORKER_SCORE_SCHEDULE,
+        "model_statistics": WORKER_STATISTICS_SCHEDULE,
+    }
+    return [
+        ScheduledJob(
+            worker,
+            CronSchedule(schedules[worker.name]),
+            WORKER_SCHEDULE_JITTER,
+            shard if worker.shardable else None,
+        )
+        for worker in workers
+        if schedules[worker.name]
+    ]
+
+
+def seed_last_success(workers: List[BaseWorker]):
+    """
+    Carrega no gauge de último sucesso a última execução completa de cada tipo no SyncLog, para
+    o tempo desde o último sync não sumir a cada restart. Com sharding, só os tipos particionados
+    (cada processo responde pela sua partição): os demais rodam na réplica que pegar o lease.
+    """
+    shard = current_shard()
+    try:
+        with get_db_session() as db:
+            repository = SyncLogRepository(db)
+            for worker in workers:
+                if shard is not None and not worker.shardable:
+                    continue
+                sync_log = repository.get_last_full_success(worker.name, shard.index if shard else None)
+                if sync_log is not None:
+                    completed_at = sync_log.completed_at.replace(tzinfo=timezone.utc)
+                    seed_sync_last_success(worker.name, completed_at.timestamp())
+    except Exception as e:
+        logger.warning("Could not seed last sync success from SyncLog: %s", e)
+
+
+def _stop(*services):
+    for service in services:
+        service.stop()
+
+
+async def main():
+    workers = [CustomerWorker(), SalesWorker(), CreditWorker(), ScoreSnapshotWorker(), StatisticsWorker()]
+    scheduler = Scheduler(build_jobs(workers))
+    # O mesmo processo consome a fila de sincronizações sob demanda (POST /sync/trigger)
+    consumer = SyncJobConsumer(workers)
+
+    # Parada ordenada: sem novas execuções nem jobs; as em andamento param no próximo lote
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, _stop, scheduler, consumer)
+
+    seed_last_success(workers)
+    start_metrics_server(WORKER_METRICS_PORT)
+    await asyncio.gather(scheduler.run(), consumer.run())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""
+Snapshots mensais de score (tabela credit_score_snapshots).
+
+Para cada cliente ativo e empresa de SCORE_SNAPSHOT_COMPANY_CODES, calcula o score no fechamento de
+cada um dos últimos SCORE_SNAPSHOT_MONTHS meses que ainda não têm snapshot na versão atual do modelo,
+consultando os itens em aberto com a KEYDATE do último dia do mês. Mês fechado não muda: depois do
+backfill, cada execução só calcula o mês recém-fechado, clientes novos e versões novas do modelo.
+Numa versão nova, os meses que já têm snapshot de outra versão são recalculados com as métricas
+gravadas, sem consultar o SAP de novo, e os snapshots da versão anterior do cliente são apagados no
+mesmo commit (até lá, o dashboard continua mostrando a versão anterior).
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from config import (
+    SCORE_SNAPSHOT_COMPANY_CODES,
+    SCORE_SNAPSHOT_MONTHS,
+    WORKER_SCORE_INTERVAL,
+)
+from metrics import observe_sync_sap_fetch
+from src.database.connection import get_db_session
+from src.database.models import CreditScoreSnapshot
+from src.repository.sap_repository import ScoreSnapshotRepository
+from src.schemas.credit import CreditMetrics, ModelWeights
+from src.services.credit_service import (
+    calculate_score_as_of,
+    month_end_key_dates,
+    score_model_version,
+    score_snapshot,
+)
+from src.services.model_statistics import get_active_statistics
+from src.workers.base_worker import BaseWorker, SyncProgress
+from src.workers.sharding import Shard
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreSnapshotWorker(BaseWorker):
+    shardable = True
+    model = CreditScoreSnapshot
+    key_fields = ("customer_code", "company_code", "model_version", "month")
+
+    def __init__(self):
+        super().__init__("score_snapshots", interval_seconds=WORKER_SCORE_INTERVAL)
+
+    async def fetch_data(self) -> List[Dict[str, Any]]:
+        return []
+
+    def process_item(
+        self, raw_item: Dict[str, Any], customer_code: str = None, company_code: str = None, model_version: str = None
+    ) -> Optional[Dict[str, Any]]:
+        return {
+            "customer_code": customer_code,
+            "company_code": company_code,
+            "month": raw_item["month"],
+            "key_date": raw_item["key_date"],
+            "model_version": model_version,
+            "score": raw_item["score"],
+            "probability_default": raw_item["probability_default"],
+            "metrics": raw_item["metrics"],
+        }
+
+    def _flush(self, db, repository: ScoreSnapshotRepository, batch, completed, model_version, sync_log):
+        """Grava o lote e, se nada falhou ao gravar, apaga as versões antigas dos clientes já recalculados"""
+        failed = sync_log.records_failed
+        self.store_batch(db, batch, sync_log)
+        if sync_log.records_failed == failed:
+            repository.delete_other_versions(completed, model_version)
+
+    async def run_sync(
+        self,
+        customer_codes: Optional[List[str]] = None,
+        job_id: Optional[UUID] = None,
+        shard: Optional[Shard] = None,
+        run_id: Optional[str] = None,
+    ):
+        logger.info("Starting score snapshots" + (f" (shard {shard})" if shard else ""))
+
+        model, weights = get_active_statistics(), ModelWeights()
+        model_version = score_model_version(model, weights)
+        key_dates = month_end_key_dates(SCORE_SNAPSHOT_MONTHS)
+
+        with get_db_session() as db:
+            sync_log = self._new_sync_log(customer_codes, job_id, shard, run_id)
+            sync_log.details = {**sync_log.details, "model_version": model_version, "statistics_version": model.version}
+            db.add(sync_log)
+            db.commit()
+            progress = SyncProgress(self.name, full=not customer_codes)
+
+            try:
+                checkpoint = self._resume_checkpoint(db, sync_log, customer_codes, shard)
+                total = self._count_customer_codes(db, customer_codes, shard, after=checkpoint)
+                logger.info(f"Found {total} active customers for score snapshots (model {model_version})")
+                sync_log.records_total = total
+                db.commit()
+                codes = self._iter_customer_codes(db, customer_codes, shard, after=checkpoint)
+
+                repository = ScoreSnapshotRepository(db)
+                batch = []
+                completed = []
+                interrupted = False
+                processed_through = checkpoint
+                for customer_code in codes:
+                    if self.draining:
+                        interrupted = True
+                        break
+
+                    sync_log.records_processed += 1
+                    try:
+                        for company_code in SCORE_SNAPSHOT_COMPANY_CODES:
+                            existing = repository.get_month_metrics(customer_code, company_code)
+                            for key_date in key_dates:
+                                versions, metrics = existing.get(key_date.strftime("%Y-%m"), (set(), None))
+                                if model_version in versions:
+                                    continue
+
+                                if metrics is not None:
+                                    result = score_snapshot(key_date, CreditMetrics(**metrics), model, weights)
+                                else:
+                                    start_time = time.perf_counter()
+                                    result = await calculate_score_as_of(
+                                        customer_code, company_code, key_date, model, weights
+                                    )
+                                    observe_sync_sap_fetch(self.name, time.perf_counter() - start_time)
+                                batch.append(self.process_item(result, customer_code, company_code, model_version))
+                        completed.append(customer_code)
+
+                    except Exception as e:
+                        logger.error(f"Error computing score snapshots for customer {customer_code}: {str(e)}")
+                        sync_log.records_failed += 1
+
+                    processed_through = customer_code
+                    if sync_log.records_processed % 50 == 0:
+                        self._flush(db, repository, batch, completed, model_version, sync_log)
+                        batch, completed = [], []
+                        sync_log.checkpoint = processed_through
+                        db.commit()
+                        progress.report(sync_log.records_processed, total - sync_log.records_processed)
+                        logger.info(f"Processed score snapshots for {sync_log.records_processed} customers")
+
+                self._flush(db, repository, batch, completed, model_version, sync_log)
+                sync_log.checkpoint = processed_through
+                sync_log.status = "interrupted" if interrupted else "completed"
+                sync_log.completed_at = datetime.utcnow()
+
+            except Exception as e:
+                logger.error(f"Score snapshots failed: {str(e)}")
+                sync_log.status = "failed"
+                sync_log.error_message = str(e)[:500]
+                sync_log.completed_at = datetime.utcnow()
+
+            finally:
+                db.commit()
+                progress.finish(sync_log)
+                logger.info(
+                    f"Score snapshots completed: {sync_log.records_processed} customers, "
+                    f"{sync_log.records_created} snapshots created, {sync_log.records_updated} updated, "
+                    f"{sync_log.records_failed} failed"
+                )
+
+
+if __name__ == "__main__":
+    worker = ScoreSnapshotWorker()
+    asyncio.run(worker.start())
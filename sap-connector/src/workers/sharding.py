@@ -0,0 +1,51 @@
+"""
+Particionamento dos clientes entre processos de sync (sales_orders, credit_limits e score_snapshots).
+
+Com WORKER_SHARD_COUNT=N, cada processo sincroniza só os clientes com crc32(customer_code) % N
+igual ao seu índice. O índice vem de WORKER_SHARD_INDEX ou, se vazio, do ordinal no fim do
+hostname (pods de StatefulSet: sap-worker-0, sap-worker-1, ...). O crc32 é estável entre
+processos, ao contrário do hash() do Python.
+"""
+
+import re
+import socket
+import zlib
+from typing import Iterable, List, NamedTuple, Optional
+
+from config import WORKER_SHARD_COUNT, WORKER_SHARD_INDEX
+
+
+class Shard(NamedTuple):
+    index: int
+    count: int
+
+    def owns(self, customer_code: str) -> bool:
+        return shard_of(customer_code, self.count) == self.index
+
+    def select(self, customer_codes: Iterable[str]) -> List[str]:
+        return [code for code in customer_codes if self.owns(code)]
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def shard_of(customer_code: str, count: int) -> int:
+    return zlib.crc32(customer_code.strip().encode()) % count
+
+
+def current_shard() -> Optional[Shard]:
+    """Shard deste processo, ou None quando não há particionamento"""
+    if WORKER_SHARD_COUNT <= 1:
+        return None
+
+    if WORKER_SHARD_INDEX:
+        index = int(WORKER_SHARD_INDEX)
+    else:
+        match = re.search(r"(\d+)$", socket.gethostname())
+        if not match:
+            raise ValueError("WORKER_SHARD_INDEX is required when the hostname has no ordinal suffix")
+        index = int(match.group(1))
+
+    if not 0 <= index < WORKER_SHARD_COUNT:
+        raise ValueError(f"Shard index {index} out of range for WORKER_SHARD_COUNT={WORKER_SHARD_COUNT}")
+    return Shard(index, WORKER_SHARD_COUNT)
@@ -0,0 +1,160 @@
+"""
+Recalcula as estatísticas globais do score (GlobalStatistics) com a carteira real.
+
+Lê as métricas do último mês fechado de cada cliente (gravadas pelos snapshots de score) com
+estimadores online, sem carregar a carteira em memória. A primeira passada estima os quantis por
+P²; a segunda calcula média e desvio por Welford sobre os valores limitados à faixa p01–p99, a
+mesma escala winsorizada que o score usa antes do z-score. O resultado vira uma versão nova em
+credit_model_statistics, ativada para a API e os workers na próxima releitura
+(MODEL_STATISTICS_REFRESH_INTERVAL).
+
+Não é particionado: as estatísticas precisam da carteira inteira, então roda em uma réplica só.
+Também não tem checkpoint: uma execução interrompida (SIGTERM) é refeita do início. As passadas só
+leem e, com o cursor no servidor, não há ponto seguro para retomar os estimadores no meio.
+
+Amostra abaixo de MODEL_STATISTICS_MIN_SAMPLES mantém a versão ativa e termina com status
+"insufficient_sample", que não conta como sucesso do sync (alerta pela idade do último sucesso e
+por sap_connector_model_statistics_sample_size).
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID
+
+from config import MODEL_STATISTICS_MIN_SAMPLES, WORKER_STATISTICS_INTERVAL
+from metrics import set_model_statistics_sample_size
+from src.database.connection import get_db_session
+from src.database.models import CreditModelStatistics
+from src.repository.sap_repository import (
+    ModelStatisticsRepository,
+    ScoreSnapshotRepository,
+)
+from src.services.credit_service import clip_variable, month_end_key_dates
+from src.services.model_statistics import reload_statistics
+from src.services.streaming_statistics import MetricSketch, RunningMoments
+from src.workers.base_worker import BaseWorker, SyncProgress
+from src.workers.sharding import Shard
+
+logger = logging.getLogger(__name__)
+
+# Variáveis do score, com os nomes usados em GlobalStatistics (mean_<nome>, std_<nome>)
+VARIABLES = ("hc", "vc", "pp", "in", "va", "se_count", "se_value")
+
+
+class StatisticsWorker(BaseWorker):
+    model = CreditModelStatistics
+
+    def __init__(self):
+        super().__init__("model_statistics", interval_seconds=WORKER_STATISTICS_INTERVAL)
+
+    async def fetch_data(self) -> List[Dict[str, Any]]:
+        return []
+
+    def process_item(self, raw_item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return raw_item
+
+    async def _scan(self, repository: ScoreSnapshotRepository, source_month: str) -> AsyncIterator[Dict[str, float]]:
+        """Uma passada pelas métricas do mês, por variável; para no meio se o processo pedir parada"""
+        for index, (_, _, metrics) in enumerate(repository.iter_month_metrics(source_month), 1):
+            if self.draining:
+                return
+            yield {name: float(metrics.get(name) or 0) for name in VARIABLES}
+            if index % 10000 == 0:
+                # Deixa o loop de eventos respirar (heartbeat dos jobs, sinais)
+                await asyncio.sleep(0)
+
+    async def run_sync(
+        self,
+        customer_codes: Optional[List[str]] = None,
+        job_id: Optional[UUID] = None,
+        shard: Optional[Shard] = None,
+        run_id: Optional[str] = None,
+    ):
+        source_month = month_end_key_dates(1)[0].strftime("%Y-%m")
+        logger.info(f"Starting model statistics from score snapshots of {source_month}")
+
+        with get_db_session() as db:
+            sync_log = self._new_sync_log(job_id=job_id, run_id=run_id)
+            sync_log.details = {"source_month": source_month}
+            db.add(sync_log)
+            db.commit()
+            progress = SyncProgress(self.name, full=True)
+
+            try:
+                repository = ScoreSnapshotRepository(db)
+                sketches = {name: MetricSketch() for name in VARIABLES}
+                async for values in self._scan(repository, source_month):
+                    for name, sketch in sketches.items():
+                        sketch.push(values[name])
+                    sync_log.records_processed += 1
+                    if sync_log.records_processed % 10000 == 0:
+                        # Sem commit: o cursor no servidor precisa da transação aberta
+                        progress.report(sync_log.records_processed)
+
+                sample_size = sync_log.records_processed
+                if not self.draining and sample_size >= MODEL_STATISTICS_MIN_SAMPLES:
+                    # Segunda passada: com os valores crus, os outliers que o score corta inflariam o
+                    # desvio de variáveis de cauda longa (vc, va) e comprimiriam os z-scores
+                    bounds = {
+                        name: (sketch.quantiles["p01"].value, sketch.quantiles["p99"].value)
+                        for name, sketch in sketches.items()
+                    }
+                    moments = {name: RunningMoments() for name in VARIABLES}
+                    async for values in self._scan(repository, source_month):
+                        for name, estimator in moments.items():
+                            estimator.push(clip_variable(values[name], name, bounds))
+
+                if self.draining:
+                    # Intencional: estimadores parciais são descartados; o job volta para a fila e a
+                    # próxima execução relê a carteira do início
+                    sync_log.status = "interrupted"
+                elif sample_size < MODEL_STATISTICS_MIN_SAMPLES:
+                    logger.warning(
+                        f"Only {sample_size} customers with snapshots in {source_month} "
+                        f"(minimum {MODEL_STATISTICS_MIN_SAMPLES}), keeping the current statistics"
+                    )
+                    set_model_statistics_sample_size(sample_size)
+                    sync_log.details = {**sync_log.details, "activated": False}
+                    sync_log.status = "insufficient_sample"
+                else:
+                    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+                    statistics = {}
+                    for name, estimator in moments.items():
+                        statistics[f"mean_{name}"] = estimator.mean
+                        statistics[f"std_{name}"] = estimator.std
+
+                    ModelStatisticsRepository(db).activate(
+                        CreditModelStatistics(
+                            version=version,
+                            statistics=statistics,
+                            quantiles={name: sketch.summary() for name, sketch in sketches.items()},
+                            sample_size=sample_size,
+                            source_month=source_month,
+                        )
+                    )
+                    reload_statistics()
+                    set_model_statistics_sample_size(sample_size)
+                    logger.info(f"Model statistics version {version} activated ({sample_size} customers)")
+                    sync_log.records_created = 1
+                    sync_log.details = {**sync_log.details, "activated": True, "version": version}
+                    sync_log.status = "completed"
+
+                sync_log.completed_at = datetime.utcnow()
+
+            except Exception as e:
+                logger.error(f"Model statistics failed: {str(e)}")
+                db.rollback()
+                sync_log.status = "failed"
+                sync_log.error_message = str(e)[:500]
+                sync_log.completed_at = datetime.utcnow()
+
+            finally:
+                db.commit()
+                progress.finish(sync_log)
+
+
+if __name__ == "__main__":
+    worker = StatisticsWorker()
+    asyncio.run(worker.start())
@@ -0,0 +1,135 @@
+"""Testes do deadline por requisição (deadline.DeadlineMiddleware e budget)"""
+
+import asyncio
+import time
+
+import pytest
+from deadline import (
+    DeadlineExceeded,
+    DeadlineMiddleware,
+    budget,
+    parse_route_timeouts,
+    remaining,
+    request_deadline,
+)
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+
+def _app(default_timeout=0.2, max_timeout=1.0, route_timeouts=None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        DeadlineMiddleware,
+        default_timeout=default_timeout,
+        max_timeout=max_timeout,
+        route_timeouts=route_timeouts or {},
+    )
+
+    @app.get("/sleep/{seconds}")
+    async def sleep(seconds: float):
+        await asyncio.sleep(seconds)
+        return {"slept": seconds}
+
+    @app.get("/remaining")
+    async def get_remaining():
+        return {"remaining": remaining()}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            yield b"first;"
+            await asyncio.sleep(0.3)
+            yield b"after the deadline"
+
+        return StreamingResponse(body())
+
+    return app
+
+
+def test_request_within_deadline():
+    response = TestClient(_app()).get("/sleep/0.01")
+    assert response.status_code == 200
+    assert response.json() == {"slept": 0.01}
+
+
+def test_deadline_exceeded_returns_504():
+    response = TestClient(_app(default_timeout=0.05)).get("/sleep/5")
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
+
+
+def test_route_timeouts_longest_prefix_wins():
+    app = _app(default_timeout=0.05, route_timeouts={"/sleep": 0.5, "/sleep/0.3": 0.01, "/remaining": 30})
+    client = TestClient(app)
+    assert client.get("/sleep/0.2").status_code == 200
+    assert client.get("/sleep/0.3").status_code == 504
+    assert 29 < client.get("/remaining").json()["remaining"] <= 30
+
+
+def test_header_overrides_and_is_capped():
+    client = TestClient(_app(default_timeout=0.05, max_timeout=2, route_timeouts={"/remaining": 30}))
+    assert client.get("/sleep/0.2", headers={"X-Request-Timeout": "1"}).status_code == 200
+    assert client.get("/remaining", headers={"X-Request-Timeout": "60"}).json()["remaining"] <= 2
+    # Valor inválido: vale a regra da rota
+    assert client.get("/remaining", headers={"X-Request-Timeout": "abc"}).json()["remaining"] > 2
+
+
+def test_started_response_is_not_cut_by_the_deadline():
+    response = TestClient(_app(default_timeout=0.1)).get("/stream")
+    assert response.status_code == 200
+    assert response.content == b"first;after the deadline"
+
+
+def test_client_disconnect_cancels_the_app():
+    cancelled = asyncio.Event()
+    sent = []
+
+    async def app(scope, receive, send):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        async def receive():
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = DeadlineMiddleware(app, default_timeout=5, max_timeout=5, route_timeouts={})
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        await asyncio.wait_for(middleware(scope, receive, send), timeout=1)
+
+    asyncio.run(scenario())
+    assert cancelled.is_set()
+    assert sent == []
+
+
+def test_budget_outside_a_request_uses_the_call_timeout():
+    # Workers não têm deadline
+    assert budget(30) == 30
+
+
+def test_budget_is_capped_and_raises_when_expired():
+    token = request_deadline.set(time.monotonic() + 1)
+    try:
+        assert budget(30) <= 1
+        assert budget(0.5) == 0.5
+    finally:
+        request_deadline.reset(token)
+
+    token = request_deadline.set(time.monotonic() - 1)
+    try:
+        with pytest.raises(DeadlineExceeded) as error:
+            budget(30)
+        assert error.value.status_code == 504
+    finally:
+        request_deadline.reset(token)
+
+
+def test_parse_route_timeouts():
+    assert parse_route_timeouts("/credit/batch:600, /sap/:120,") == {"/credit/batch": 600.0, "/sap/": 120.0}
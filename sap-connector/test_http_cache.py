@@ -0,0 +1,109 @@
+"""Testes do middleware de compressão e ETag (http_cache.CompressionETagMiddleware)"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+from http_cache import CompressionETagMiddleware, brotli
+
+LARGE_BODY = "cliente;" * 500
+SMALL_BODY = "ok"
+# brotli é opcional: sem ele o middleware cai para gzip
+PREFERRED = "br" if brotli is not None else "gzip"
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionETagMiddleware, paths=["/customers"], minimum_size=1024)
+
+    @app.get("/customers/large")
+    async def large():
+        return PlainTextResponse(LARGE_BODY)
+
+    @app.get("/customers/small")
+    async def small():
+        return PlainTextResponse(SMALL_BODY)
+
+    @app.get("/customers/missing")
+    async def missing():
+        return PlainTextResponse("not found", status_code=404)
+
+    @app.get("/customers/precompressed")
+    async def precompressed():
+        return Response(b"raw", headers={"Content-Encoding": "identity"})
+
+    @app.get("/customers/error")
+    async def error():
+        raise RuntimeError("falha antes do http.response.start")
+
+    @app.get("/other")
+    async def other():
+        return PlainTextResponse(LARGE_BODY)
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br", PREFERRED),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_encoding_negotiation(accept_encoding, expected):
+    response = _client().get("/customers/large", headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == expected
+    assert response.text == LARGE_BODY
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_small_bodies_are_not_compressed():
+    response = _client().get("/customers/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"].count("-") == 0
+
+
+def test_if_none_match_returns_304_without_body():
+    client = _client()
+    first = client.get("/customers/large", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["etag"]
+    assert etag.endswith('-gzip"')
+
+    # O mesmo conteúdo em outra codificação (ou com W/) continua valendo
+    for if_none_match in (etag, f"W/{etag}", '"outro", ' + etag.replace("-gzip", "-br")):
+        response = client.get("/customers/large", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"].startswith(etag.split("-")[0])
+        assert "content-encoding" not in response.headers
+
+
+def test_stale_etag_returns_full_body():
+    response = _client().get("/customers/large", headers={"If-None-Match": '"0123456789abcdef"'})
+    assert response.status_code == 200
+    assert response.text == LARGE_BODY
+
+
+def test_non_200_and_encoded_responses_pass_through():
+    client = _client()
+    missing = client.get("/customers/missing", headers={"Accept-Encoding": "gzip"})
+    assert missing.status_code == 404 and "etag" not in missing.headers
+
+    encoded = client.get("/customers/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "identity" and "etag" not in encoded.headers
+
+
+def test_other_paths_are_untouched():
+    response = _client().get("/other", headers={"Accept-Encoding": "gzip"})
+    assert "etag" not in response.headers and "content-encoding" not in response.headers
+
+
+def test_app_error_without_start_message_still_returns_500():
+    response = _client().get("/customers/error", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 500
+    assert "etag" not in response.headers
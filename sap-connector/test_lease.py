@@ -0,0 +1,103 @@
+"""Testes do lease entre réplicas (advisory locks) do scheduler e da fila de sync"""
+
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from src.workers import lease
+from src.workers.lease import advisory_lease
+from src.workers.scheduler import ScheduledJob
+from src.workers.sharding import Shard
+
+
+class FakeAdvisoryLocks:
+    """Advisory locks de sessão do Postgres em memória (exclusivo x compartilhado)"""
+
+    def __init__(self):
+        self.exclusive = {}
+        self.shared = Counter()
+        self.dialect = SimpleNamespace(name="postgresql")
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, locks: FakeAdvisoryLocks):
+        self.locks = locks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def commit(self):
+        pass
+
+    def execute(self, statement, params):
+        function = str(statement).split()[1].split("(")[0]
+        key = params["key"]
+        locks = self.locks
+        if function == "pg_try_advisory_lock":
+            acquired = locks.exclusive.get(key, self) is self and not locks.shared[key]
+            if acquired:
+                locks.exclusive[key] = self
+        elif function == "pg_try_advisory_lock_shared":
+            acquired = key not in locks.exclusive
+            if acquired:
+                locks.shared[key] += 1
+        elif function == "pg_advisory_unlock":
+            acquired = locks.exclusive.pop(key, None) is self
+        else:
+            locks.shared[key] -= 1
+            acquired = True
+        return SimpleNamespace(scalar=lambda: acquired)
+
+
+@pytest.fixture(autouse=True)
+def locks(monkeypatch):
+    fake = FakeAdvisoryLocks()
+    monkeypatch.setattr(lease, "engine", fake)
+    return fake
+
+
+def _job(shard=None) -> ScheduledJob:
+    return ScheduledJob(SimpleNamespace(name="sales_orders"), schedule=None, jitter=0, shard=shard)
+
+
+def _lease(job: ScheduledJob):
+    return advisory_lease(job.lease_name, job.lease_parent)
+
+
+def test_shards_run_together():
+    with _lease(_job(Shard(0, 2))) as first, _lease(_job(Shard(1, 2))) as second:
+        assert first and second
+
+
+def test_same_shard_runs_once():
+    with _lease(_job(Shard(0, 2))) as first, _lease(_job(Shard(0, 2))) as second:
+        assert first and not second
+
+
+def test_full_sync_refused_while_shards_run(locks):
+    with _lease(_job(Shard(0, 2))):
+        with advisory_lease("sales_orders") as full:
+            assert not full
+    with advisory_lease("sales_orders") as full:
+        assert full
+    assert not locks.exclusive and not +locks.shared
+
+
+def test_shards_skip_while_full_sync_runs(locks):
+    with advisory_lease("sales_orders") as full, _lease(_job(Shard(1, 2))) as shard:
+        assert full and not shard
+    # Partição recusada não deixa o lock compartilhado preso
+    assert not locks.exclusive and not +locks.shared
+
+
+def test_unsharded_job_uses_the_type_name():
+    job = _job()
+    assert (job.lease_name, job.lease_parent) == ("sales_orders", None)
+    with _lease(job) as scheduled, advisory_lease("sales_orders") as full:
+        assert scheduled and not full
@@ -0,0 +1,36 @@
+"""Testes do formatador JSON dos logs (logging_config.JSONFormatter)"""
+
+import json
+import logging
+from decimal import Decimal
+
+import pytest
+from logging_config import JSONFormatter
+
+
+def _format(**extra) -> dict:
+    record = logging.LogRecord("sap_client", logging.WARNING, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    return json.loads(JSONFormatter().format(record))
+
+
+def test_message_and_extra_fields():
+    entry = _format(sap_endpoint="BAPI_CUSTOMER_GETLIST", amount=Decimal("10.50"))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "WARNING"
+    assert entry["sap_endpoint"] == "BAPI_CUSTOMER_GETLIST"
+    assert entry["amount"] == 10.5
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (ValueError("boom"), "boom"),
+        (object, "<class 'object'>"),
+        (2**70, 2**70),
+    ],
+)
+def test_unknown_types_do_not_lose_the_record(value, expected):
+    entry = _format(err=value)
+    assert entry["message"] == "hello world"
+    assert entry["err"] == expected
@@ -0,0 +1,77 @@
+"""Testes do pass-through em streaming do SAP CPI (sap_client.stream_sap)"""
+
+import httpx
+import pytest
+import sap_client
+import sap_limiter
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sap_limiter import get_limiter
+
+ENDPOINT = "ZTEST_STREAM"
+CHUNKS = [b'{"ZTEST_STREAM.Response": {"item": [', b'{"A": 1}', b"]}}"]
+
+
+class UpstreamStream(httpx.AsyncByteStream):
+    def __init__(self, chunks, fail: bool):
+        self.chunks = chunks
+        self.fail = fail
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.fail:
+            raise httpx.ReadError("connection reset by CPI")
+
+
+def _handler(fail: bool):
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(200, headers={"x-csrf-token": "csrf"})
+        chunks = CHUNKS[:2] if fail else CHUNKS
+        return httpx.Response(200, headers={"content-type": "application/json"}, stream=UpstreamStream(chunks, fail))
+
+    return handle
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def token():
+        return "token"
+
+    monkeypatch.setattr(sap_client, "get_token", token)
+    monkeypatch.setattr(sap_client, "BASE_URL", "http://cpi.test")
+    monkeypatch.setitem(sap_limiter._limiters, ENDPOINT, sap_limiter.AdaptiveLimiter(ENDPOINT))
+
+    def use_upstream(fail: bool):
+        transport = httpx.MockTransport(_handler(fail))
+        async_client = httpx.AsyncClient
+        monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: async_client(transport=transport, **kwargs))
+
+    app = FastAPI()
+
+    @app.post("/cpi/stream")
+    async def stream():
+        return await sap_client.stream_sap(ENDPOINT, b"{}")
+
+    return TestClient(app), use_upstream
+
+
+def test_stream_forwards_body_and_releases_slot(client):
+    test_client, use_upstream = client
+    use_upstream(fail=False)
+
+    response = test_client.post("/cpi/stream")
+    assert response.status_code == 200
+    assert response.content == b"".join(CHUNKS)
+    assert get_limiter(ENDPOINT).in_flight == 0
+
+
+def test_upstream_error_mid_stream_releases_slot(client):
+    test_client, use_upstream = client
+    use_upstream(fail=True)
+
+    for _ in range(3):
+        with pytest.raises(httpx.ReadError):
+            test_client.post("/cpi/stream")
+    assert get_limiter(ENDPOINT).in_flight == 0
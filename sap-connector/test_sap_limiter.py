@@ -0,0 +1,176 @@
+"""Testes do limite adaptativo de concorrência por RFC (sap_limiter)"""
+
+import asyncio
+import time
+
+import pytest
+import sap_limiter
+from config import SAP_LIMIT_BACKOFF, SAP_LIMIT_INITIAL, SAP_LIMIT_MIN
+from sap_limiter import BATCH, INTERACTIVE, WORKER, AdaptiveLimiter, LoadShedError, Slot
+
+
+def test_limit_grows_while_in_use():
+    limiter = AdaptiveLimiter("TEST_RFC")
+    limiter.in_flight = SAP_LIMIT_INITIAL
+    for _ in range(20):
+        limiter.observe(0.1)
+    assert limiter.limit > SAP_LIMIT_INITIAL
+
+
+def test_limit_does_not_grow_when_idle():
+    limiter = AdaptiveLimiter("TEST_RFC")
+    for _ in range(20):
+        limiter.observe(0.1)
+    assert limiter.limit == SAP_LIMIT_INITIAL
+
+
+def test_failure_backs_off_multiplicatively():
+    limiter = AdaptiveLimiter("TEST_RFC")
+    limiter.observe(0.1, congested=True)
+    assert limiter.limit == pytest.approx(SAP_LIMIT_INITIAL * SAP_LIMIT_BACKOFF)
+
+
+def test_latency_above_tolerance_backs_off():
+    limiter = AdaptiveLimiter("TEST_RFC")
+    for _ in range(5):
+        limiter.observe(0.1)
+    limiter.observe(10.0)
+    assert limiter.limit == pytest.approx(SAP_LIMIT_INITIAL * SAP_LIMIT_BACKOFF)
+
+
+def test_limit_never_drops_below_minimum():
+    limiter = AdaptiveLimiter("TEST_RFC")
+    for _ in range(200):
+        limiter.observe(0.1, congested=True)
+    assert limiter.limit == SAP_LIMIT_MIN
+
+
+def _full_limiter(limit: int = 1) -> AdaptiveLimiter:
+    limiter = AdaptiveLimiter("TEST_RFC")
+    limiter.limit = float(limit)
+    return limiter
+
+
+def test_queued_callers_wake_by_priority():
+    async def scenario():
+        limiter = _full_limiter()
+        await limiter.acquire(INTERACTIVE)
+        order = []
+
+        async def call(lane, name):
+            await limiter.acquire(lane)
+            order.append(name)
+            limiter.release()
+
+        batch = asyncio.create_task(call(BATCH, "batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call(INTERACTIVE, "interactive"))
+        await asyncio.sleep(0)
+        assert limiter.queued == 2
+
+        limiter.release()
+        await asyncio.gather(batch, interactive)
+        return order, limiter
+
+    order, limiter = asyncio.run(scenario())
+    assert order == ["interactive", "batch"]
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_full_queue_sheds_same_priority(monkeypatch):
+    monkeypatch.setattr(sap_limiter, "SAP_LIMIT_MAX_QUEUE", 1)
+
+    async def scenario():
+        limiter = _full_limiter()
+        await limiter.acquire(BATCH)
+        waiting = asyncio.create_task(limiter.acquire(BATCH))
+        await asyncio.sleep(0)
+
+        with pytest.raises(LoadShedError) as error:
+            await limiter.acquire(BATCH)
+        waiting.cancel()
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert "Retry-After" in error.headers
+
+
+def test_full_queue_evicts_lower_priority(monkeypatch):
+    monkeypatch.setattr(sap_limiter, "SAP_LIMIT_MAX_QUEUE", 1)
+
+    async def scenario():
+        limiter = _full_limiter()
+        await limiter.acquire(BATCH)
+        evicted = asyncio.create_task(limiter.acquire(BATCH))
+        await asyncio.sleep(0)
+
+        interactive = asyncio.create_task(limiter.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(LoadShedError):
+            await evicted
+
+        limiter.release()
+        await interactive
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 1 and limiter.queued == 0
+
+
+def test_queue_timeout_sheds(monkeypatch):
+    monkeypatch.setitem(sap_limiter.QUEUE_TIMEOUTS, INTERACTIVE, 0.01)
+
+    async def scenario():
+        limiter = _full_limiter()
+        await limiter.acquire(INTERACTIVE)
+        with pytest.raises(LoadShedError):
+            await limiter.acquire(INTERACTIVE)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 1 and limiter.queued == 0
+
+
+def test_stream_slot_samples_latency_once():
+    limiter = AdaptiveLimiter("TEST_RFC")
+    limiter.in_flight = 1
+    slot = Slot(limiter)
+    slot.start_time = time.perf_counter() - 0.05
+
+    # Primeiro byte do CPI; o corpo demora a ser lido pelo cliente
+    slot.observe()
+    slot.start_time -= 5
+    slot.release()
+    slot.release()
+
+    assert len(limiter.latencies) == 1
+    assert limiter.latencies[0] < 1
+    assert limiter.in_flight == 0
+
+
+def test_background_lanes_are_capped(monkeypatch):
+    monkeypatch.setattr(sap_limiter, "SAP_LIMIT_BACKGROUND_MAX", 2)
+
+    async def scenario():
+        limiter = _full_limiter(limit=5)
+        await limiter.acquire(WORKER)
+        await limiter.acquire(WORKER)
+        worker = asyncio.create_task(limiter.acquire(WORKER))
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 2 and limiter.queued == 1
+
+        # Interativas usam o resto do limite adaptativo, mesmo com workers na fila
+        await asyncio.wait_for(limiter.acquire(INTERACTIVE), timeout=1)
+        assert limiter.in_flight == 3 and not worker.done()
+
+        limiter.release()
+        await asyncio.sleep(0)
+        assert not worker.done()
+
+        limiter.release()
+        await worker
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 2 and limiter.queued == 0
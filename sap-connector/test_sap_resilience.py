@@ -0,0 +1,111 @@
+"""Testes do circuit breaker por RFC (sap_resilience)"""
+
+import asyncio
+
+import httpx
+import pytest
+import sap_resilience
+from fastapi import HTTPException
+from sap_resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    acquire,
+    record_result,
+)
+
+
+def _breaker(threshold=3, reset_timeout=30.0, half_open_max_calls=1) -> CircuitBreaker:
+    return CircuitBreaker("TEST_RFC", threshold, reset_timeout, half_open_max_calls)
+
+
+def _expire_open_state(breaker: CircuitBreaker):
+    breaker.opened_at -= breaker.reset_timeout + 1
+
+
+def test_opens_after_consecutive_failures():
+    breaker = _breaker(threshold=3)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retry_after() <= breaker.reset_timeout
+
+
+def test_success_resets_failure_count():
+    breaker = _breaker(threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = _breaker(threshold=1, half_open_max_calls=1)
+    breaker.record_failure()
+    _expire_open_state(breaker)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Só uma sondagem por vez
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_probe_reopens_on_failure():
+    breaker = _breaker(threshold=1)
+    breaker.record_failure()
+    _expire_open_state(breaker)
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_cancelled_probe_returns_its_slot():
+    breaker = _breaker(threshold=1)
+    breaker.record_failure()
+    _expire_open_state(breaker)
+
+    assert breaker.allow()
+    record_result(breaker, asyncio.CancelledError())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize(
+    "error, opens",
+    [
+        (HTTPException(status_code=502, detail="bad gateway"), True),
+        (httpx.ConnectError("refused"), True),
+        (HTTPException(status_code=404, detail="not found"), False),
+        (HTTPException(status_code=403, detail="forbidden"), False),
+    ],
+)
+def test_record_result_counts_only_cpi_failures(error, opens):
+    breaker = _breaker(threshold=1)
+    record_result(breaker, error)
+    assert breaker.state == (OPEN if opens else CLOSED)
+
+
+def test_acquire_rejects_with_retry_after(monkeypatch):
+    breaker = _breaker(threshold=1)
+    breaker.record_failure()
+    monkeypatch.setitem(sap_resilience._breakers, "TEST_RFC", breaker)
+
+    with pytest.raises(CircuitOpenError) as error:
+        acquire("TEST_RFC")
+    assert error.value.status_code == 503
+    assert int(error.value.headers["Retry-After"]) >= 1
@@ -0,0 +1,131 @@
+"""Testes do single-flight das leituras ao SAP (sap_singleflight.coalesce)"""
+
+import asyncio
+import time
+
+import pytest
+import sap_singleflight
+from deadline import DeadlineExceeded, remaining, request_deadline
+from sap_limiter import BATCH, INTERACTIVE, priority_lane
+from sap_singleflight import coalesce
+
+READ_RFC = "ZFI_F4_ZTERM"
+WRITE_RFC = "ZVENDOR_UPDATE"
+
+
+class FakeSap:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+        self.deadlines = []
+
+    async def __call__(self):
+        self.calls += 1
+        self.deadlines.append(remaining())
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"calls": self.calls}
+
+
+async def _with_deadline(seconds, awaitable_factory):
+    request_deadline.set(time.monotonic() + seconds)
+    return await awaitable_factory()
+
+
+def test_identical_reads_share_one_call():
+    sap = FakeSap()
+
+    async def scenario():
+        return await asyncio.gather(*(coalesce(READ_RFC, {"A": 1}, sap) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert sap.calls == 1
+    assert all(result is results[0] for result in results)
+    assert sap_singleflight._in_flight == {}
+
+
+def test_different_payloads_and_writes_are_not_shared():
+    sap = FakeSap()
+
+    async def scenario():
+        await asyncio.gather(coalesce(READ_RFC, {"A": 1}, sap), coalesce(READ_RFC, {"A": 2}, sap))
+        await asyncio.gather(coalesce(WRITE_RFC, {"A": 1}, sap), coalesce(WRITE_RFC, {"A": 1}, sap))
+
+    asyncio.run(scenario())
+    assert sap.calls == 4
+
+
+def test_priority_lanes_are_not_shared():
+    sap = FakeSap()
+
+    async def in_lane(lane):
+        with priority_lane(lane):
+            return await coalesce(READ_RFC, {"A": 1}, sap)
+
+    async def scenario():
+        await asyncio.gather(in_lane(INTERACTIVE), in_lane(BATCH))
+
+    asyncio.run(scenario())
+    assert sap.calls == 2
+
+
+def test_call_survives_until_last_waiter_leaves():
+    sap = FakeSap(delay=1)
+
+    async def scenario():
+        first = asyncio.create_task(coalesce(READ_RFC, {"A": 1}, sap))
+        second = asyncio.create_task(coalesce(READ_RFC, {"A": 1}, sap))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert sap.cancelled == 0
+
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert sap.cancelled == 1
+        assert sap_singleflight._in_flight == {}
+
+    asyncio.run(scenario())
+
+
+def test_shared_call_runs_without_the_leader_deadline():
+    sap = FakeSap(delay=0.2)
+
+    async def scenario():
+        return await asyncio.gather(
+            _with_deadline(0.05, lambda: coalesce(READ_RFC, {"A": 1}, sap)),
+            _with_deadline(5, lambda: coalesce(READ_RFC, {"A": 1}, sap)),
+            return_exceptions=True,
+        )
+
+    leader, follower = asyncio.run(scenario())
+    assert isinstance(leader, DeadlineExceeded)
+    assert leader.status_code == 504
+    assert follower == {"calls": 1}
+    assert sap.calls == 1
+    assert sap.deadlines == [None]
+
+
+def test_errors_reach_every_waiter():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("CPI down")
+
+    async def scenario():
+        return await asyncio.gather(
+            coalesce(READ_RFC, {"A": 1}, failing), coalesce(READ_RFC, {"A": 1}, failing), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.fixture(autouse=True)
+def _clean_in_flight():
+    yield
+    sap_singleflight._in_flight.clear()
@@ -0,0 +1,93 @@
+"""Testes do parser incremental de respostas do SAP (sap_stream.JsonItemParser)"""
+
+import json
+
+import pytest
+from sap_stream import JsonItemParser
+
+PATH = ("BAPI_CUSTOMER_GETLIST.Response", "ADDRESSDATA", "item")
+
+ITEMS = [
+    {"CUSTOMER": "0000100001", "NAME": 'Comercial "Aspas" Ltda', "CITY": "São Paulo"},
+    {"CUSTOMER": "0000100002", "NAME": "Barra \\ invertida", "STREET": "Rua {1}, [bloco] 2"},
+    {"CUSTOMER": "0000100003", "NAME": "Unicode é中😀", "TAGS": ["a", {"b": None}], "LIMIT": 1.5e3},
+    {"CUSTOMER": "0000100004", "NAME": "Quebra\nde linha\tcom tab", "ACTIVE": True},
+]
+
+
+def _response(items) -> bytes:
+    body = {
+        "BAPI_CUSTOMER_GETLIST.Response": {
+            # Tabela fora do caminho, com a mesma chave "item": não pode ser devolvida
+            "RETURN": {"item": {"TYPE": "", "MESSAGE": "ok"}},
+            "ADDRESSDATA": {"item": items},
+            "OTHER": [1, 2, {"item": [{"CUSTOMER": "x"}]}],
+        }
+    }
+    return json.dumps(body).encode()
+
+
+def _parse_in_chunks(data: bytes, size: int):
+    parser = JsonItemParser(PATH)
+    items = []
+    for start in range(0, len(data), size):
+        end = start + size
+        items.extend(parser.feed(data[start:end]))
+    parser.close()
+    return items, parser
+
+
+def test_whole_body():
+    items, parser = _parse_in_chunks(_response(ITEMS), 1 << 20)
+    assert items == ITEMS
+    assert parser.items_found == len(ITEMS)
+
+
+def test_split_at_every_byte():
+    data = _response(ITEMS)
+    for split in range(1, len(data)):
+        parser = JsonItemParser(PATH)
+        items = parser.feed(data[:split]) + parser.feed(data[split:])
+        parser.close()
+        assert items == ITEMS, f"split at byte {split}"
+
+
+def test_one_byte_chunks():
+    items, _ = _parse_in_chunks(_response(ITEMS), 1)
+    assert items == ITEMS
+
+
+def test_escapes_without_ensure_ascii():
+    # Bytes UTF-8 crus e escapes \" e \\ cortados no meio
+    data = json.dumps({PATH[0]: {PATH[1]: {PATH[2]: ITEMS}}}, ensure_ascii=False).encode()
+    for size in (1, 2, 3, 7):
+        items, _ = _parse_in_chunks(data, size)
+        assert items == ITEMS
+
+
+def test_single_row_table_as_object():
+    items, _ = _parse_in_chunks(_response(ITEMS[0]), 5)
+    assert items == [ITEMS[0]]
+
+
+def test_empty_table():
+    items, _ = _parse_in_chunks(_response([]), 3)
+    assert items == []
+
+
+def test_truncated_body_fails_on_close():
+    data = _response(ITEMS)
+    parser = JsonItemParser(PATH)
+    items = parser.feed(data[: len(data) // 2])
+    assert len(items) < len(ITEMS)
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_truncated_inside_item_returns_only_complete_items():
+    data = _response(ITEMS)
+    cut = data.index(b"0000100003")
+    parser = JsonItemParser(PATH)
+    assert parser.feed(data[:cut]) == ITEMS[:2]
+    with pytest.raises(ValueError):
+        parser.close()
@@ -0,0 +1,51 @@
+"""Testes da agenda cron do scheduler dos workers (CronSchedule)"""
+
+from datetime import datetime
+
+import pytest
+from src.workers.scheduler import CronSchedule
+
+
+@pytest.mark.parametrize(
+    "expression, moment, expected",
+    [
+        # Diário às 02:30: ainda hoje e, depois do horário, amanhã
+        ("30 2 * * *", datetime(2026, 10, 19, 1, 0), datetime(2026, 10, 19, 2, 30)),
+        ("30 2 * * *", datetime(2026, 10, 19, 2, 30, 15), datetime(2026, 10, 20, 2, 30)),
+        # Passos e listas
+        ("*/15 * * * *", datetime(2026, 10, 19, 10, 7), datetime(2026, 10, 19, 10, 15)),
+        ("0 8,20 * * *", datetime(2026, 10, 19, 9, 0), datetime(2026, 10, 19, 20, 0)),
+        # Só dia da semana: domingo como 0 ou 7
+        ("0 3 * * 0", datetime(2026, 10, 19, 0, 0), datetime(2026, 10, 25, 3, 0)),
+        ("0 3 * * 7", datetime(2026, 10, 19, 0, 0), datetime(2026, 10, 25, 3, 0)),
+        # Dia 31 pula os meses sem ele; virada de ano
+        ("0 0 31 * *", datetime(2026, 11, 1, 0, 0), datetime(2026, 12, 31, 0, 0)),
+        ("0 0 1 1 *", datetime(2026, 10, 19, 0, 0), datetime(2027, 1, 1, 0, 0)),
+    ],
+)
+def test_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+@pytest.mark.parametrize(
+    "moment, expected",
+    [
+        # Sexta-feira vem antes do dia 13
+        (datetime(2026, 10, 19, 10, 0), datetime(2026, 10, 23, 0, 0)),
+        # Dia 13 (sexta) vem antes da sexta seguinte
+        (datetime(2026, 11, 11, 10, 0), datetime(2026, 11, 13, 0, 0)),
+        # Dia 13 num domingo: a sexta anterior e o próprio dia 13 valem
+        (datetime(2026, 12, 8, 0, 0), datetime(2026, 12, 11, 0, 0)),
+        (datetime(2026, 12, 11, 0, 0), datetime(2026, 12, 13, 0, 0)),
+    ],
+)
+def test_day_of_month_or_day_of_week(moment, expected):
+    # Como no cron: com os dois campos restritos, basta um deles
+    assert CronSchedule("0 0 13 * 5").next_after(moment) == expected
+
+
+def test_invalid_expressions():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 * *")
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 30 2 *").next_after(datetime(2026, 1, 1))
@@ -0,0 +1,95 @@
+"""Testes dos estimadores de uma passada das estatísticas do score (streaming_statistics)"""
+
+import random
+import statistics
+
+import pytest
+from src.services.streaming_statistics import (
+    QUANTILES,
+    MetricSketch,
+    P2Quantile,
+    RunningMoments,
+)
+
+
+def _exact_quantile(values, p):
+    ordered = sorted(values)
+    return ordered[round(p * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize(
+    "sample",
+    [
+        lambda rng: rng.gauss(100, 15),
+        lambda rng: rng.lognormvariate(8, 1),  # valores de título: cauda longa à direita
+        lambda rng: rng.expovariate(1 / 30),  # prazos de pagamento
+    ],
+)
+def test_running_moments_match_exact(sample):
+    rng = random.Random(42)
+    values = [sample(rng) for _ in range(20000)]
+    moments = RunningMoments()
+    for value in values:
+        moments.push(value)
+
+    assert moments.count == len(values)
+    assert moments.mean == pytest.approx(statistics.fmean(values), rel=1e-9)
+    assert moments.variance == pytest.approx(statistics.variance(values), rel=1e-9)
+
+
+def test_running_moments_small_samples():
+    moments = RunningMoments()
+    assert (moments.mean, moments.variance) == (0.0, 0.0)
+    moments.push(5.0)
+    assert (moments.mean, moments.variance) == (5.0, 0.0)
+
+
+def test_running_moments_stable_with_large_offset():
+    moments = RunningMoments()
+    for value in (1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16):
+        moments.push(value)
+    assert moments.variance == pytest.approx(30.0)
+
+
+@pytest.mark.parametrize("name, p", list(QUANTILES.items()))
+@pytest.mark.parametrize(
+    "sample",
+    [
+        lambda rng: rng.gauss(100, 15),
+        lambda rng: rng.lognormvariate(8, 1),
+        lambda rng: rng.uniform(0, 1),
+    ],
+)
+def test_p2_quantiles_against_exact(name, p, sample):
+    rng = random.Random(7)
+    values = [sample(rng) for _ in range(50000)]
+    estimator = P2Quantile(p)
+    for value in values:
+        estimator.push(value)
+
+    # Erro medido em posição (rank): o estimado fica a menos de 1 ponto percentual do quantil exato
+    rank = sum(value <= estimator.value for value in values) / len(values)
+    assert rank == pytest.approx(p, abs=0.01)
+    assert min(values) <= estimator.value <= max(values)
+
+
+def test_p2_exact_with_fewer_than_five_values():
+    estimator = P2Quantile(0.5)
+    assert estimator.value == 0.0
+    for value in (3.0, 1.0, 2.0):
+        estimator.push(value)
+    assert estimator.value == _exact_quantile([3.0, 1.0, 2.0], 0.5)
+
+
+def test_metric_sketch_summary():
+    rng = random.Random(1)
+    values = [rng.gauss(0, 1) for _ in range(20000)]
+    sketch = MetricSketch()
+    for value in values:
+        sketch.push(value)
+
+    summary = sketch.summary()
+    assert set(summary) == set(QUANTILES) | {"iqr"}
+    assert summary["p01"] < summary["p25"] < summary["median"] < summary["p75"] < summary["p99"]
+    assert summary["iqr"] == pytest.approx(summary["p75"] - summary["p25"])
+    assert summary["iqr"] == pytest.approx(_exact_quantile(values, 0.75) - _exact_quantile(values, 0.25), rel=0.05)
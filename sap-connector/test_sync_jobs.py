@@ -0,0 +1,156 @@
+"""Testes da fila de sync sob demanda (SyncJobRepository) sobre SQLite em memória"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from src.database.models import SyncJob
+from src.repository.sap_repository import SyncJobRepository
+
+STALE_AFTER = 60
+MAX_ATTEMPTS = 3
+
+
+@compiles(UUID, "sqlite")
+def _uuid_as_char(type_, compiler, **kwargs):
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # O índice único parcial (um job "queued" por dedup_key) também vale no SQLite
+    for index in SyncJob.__table__.indexes:
+        where = index.dialect_options["postgresql"].get("where")
+        if where is not None:
+            monkeypatch.setitem(index.dialect_options["sqlite"], "where", where)
+
+    engine = create_engine("sqlite://")
+    SyncJob.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _age(db, job, **fields):
+    db.query(SyncJob).filter_by(id=job.id).update(fields)
+    db.commit()
+    db.refresh(job)
+
+
+def test_enqueue_reuses_queued_job_with_same_scope(db):
+    repository = SyncJobRepository(db)
+    first, created = repository.enqueue("sales_orders", "sales_orders:all")
+    again, created_again = repository.enqueue("sales_orders", "sales_orders:all")
+    other, created_other = repository.enqueue("sales_orders", "sales_orders:abc", customer_codes=["1"])
+
+    assert created and not created_again and created_other
+    assert again.id == first.id
+    assert other.id != first.id
+    assert repository.count_queued() == {"sales_orders": 2}
+
+
+def test_enqueue_race_returns_the_winner(db, monkeypatch):
+    repository = SyncJobRepository(db)
+    winner, _ = repository.enqueue("customers", "customers:all")
+
+    # O outro pedido não viu o job na consulta e bate no índice único no insert
+    lookups = iter([None, winner])
+    monkeypatch.setattr(repository, "get_queued", lambda dedup_key: next(lookups))
+    job, created = repository.enqueue("customers", "customers:all")
+    assert job.id == winner.id and not created
+
+
+def test_running_job_does_not_block_a_new_request(db):
+    repository = SyncJobRepository(db)
+    first, _ = repository.enqueue("customers", "customers:all")
+    assert repository.claim_next("w1", STALE_AFTER, MAX_ATTEMPTS).id == first.id
+
+    second, created = repository.enqueue("customers", "customers:all")
+    assert created and second.id != first.id
+
+
+def test_claim_next_takes_oldest_due_job_once(db):
+    repository = SyncJobRepository(db)
+    later, _ = repository.enqueue("customers", "customers:all")
+    sooner, _ = repository.enqueue("sales_orders", "sales_orders:all")
+    future, _ = repository.enqueue("credit_limits", "credit_limits:all")
+    now = datetime.utcnow()
+    _age(db, later, run_after=now - timedelta(seconds=10))
+    _age(db, sooner, run_after=now - timedelta(seconds=20))
+    _age(db, future, run_after=now + timedelta(hours=1))
+
+    claimed = repository.claim_next("w1", STALE_AFTER, MAX_ATTEMPTS)
+    assert claimed.id == sooner.id
+    assert (claimed.status, claimed.attempts, claimed.worker_id) == ("running", 1, "w1")
+    assert claimed.started_at and claimed.heartbeat_at
+
+    assert repository.claim_next("w2", STALE_AFTER, MAX_ATTEMPTS).id == later.id
+    # O job agendado para depois ainda não vence
+    assert repository.claim_next("w3", STALE_AFTER, MAX_ATTEMPTS) is None
+
+
+def test_stale_running_job_is_reclaimed(db):
+    repository = SyncJobRepository(db)
+    job, _ = repository.enqueue("customers", "customers:all")
+    repository.claim_next("dead-worker", STALE_AFTER, MAX_ATTEMPTS)
+    assert repository.claim_next("w2", STALE_AFTER, MAX_ATTEMPTS) is None
+
+    _age(db, job, heartbeat_at=datetime.utcnow() - timedelta(seconds=STALE_AFTER + 1))
+    reclaimed = repository.claim_next("w2", STALE_AFTER, MAX_ATTEMPTS)
+    assert reclaimed.id == job.id
+    assert (reclaimed.worker_id, reclaimed.attempts) == ("w2", 2)
+
+
+def test_stale_job_out_of_attempts_fails(db):
+    repository = SyncJobRepository(db)
+    job, _ = repository.enqueue("customers", "customers:all")
+    repository.claim_next("dead-worker", STALE_AFTER, MAX_ATTEMPTS)
+    _age(db, job, attempts=MAX_ATTEMPTS, heartbeat_at=datetime.utcnow() - timedelta(seconds=STALE_AFTER + 1))
+
+    assert repository.claim_next("w2", STALE_AFTER, MAX_ATTEMPTS) is None
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.error_message == "Worker stopped responding"
+
+
+def test_requeue_returns_job_without_counting_the_attempt(db):
+    repository = SyncJobRepository(db)
+    job, _ = repository.enqueue("customers", "customers:all")
+    repository.claim_next("w1", STALE_AFTER, MAX_ATTEMPTS)
+
+    repository.requeue(job.id, delay=300)
+    db.refresh(job)
+    assert (job.status, job.attempts, job.worker_id) == ("queued", 0, None)
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=290)
+    assert repository.claim_next("w2", STALE_AFTER, MAX_ATTEMPTS) is None
+
+    # Pedido repetido enquanto espera: reaproveita o job devolvido
+    again, created = repository.enqueue("customers", "customers:all")
+    assert again.id == job.id and not created
+
+
+def test_requeue_is_deduplicated_against_a_newer_request(db):
+    repository = SyncJobRepository(db)
+    job, _ = repository.enqueue("customers", "customers:all")
+    repository.claim_next("w1", STALE_AFTER, MAX_ATTEMPTS)
+    newer, _ = repository.enqueue("customers", "customers:all")
+
+    repository.requeue(job.id, delay=0)
+    db.refresh(job)
+    db.refresh(newer)
+    assert job.status == "deduplicated" and job.completed_at
+    assert newer.status == "queued"
+
+
+def test_finish(db):
+    repository = SyncJobRepository(db)
+    job, _ = repository.enqueue("customers", "customers:all")
+    repository.claim_next("w1", STALE_AFTER, MAX_ATTEMPTS)
+    repository.finish(job.id, "failed", "CPI down")
+    db.refresh(job)
+    assert (job.status, job.error_message) == ("failed", "CPI down")
+    assert repository.count_queued() == {}
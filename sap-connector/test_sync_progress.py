@@ -0,0 +1,72 @@
+"""Testes do último sucesso por tipo: resumo das partições e carga do SyncLog na subida"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from src.database.models import SyncLog
+from src.repository.sap_repository import SyncLogRepository
+from src.services.sync_progress_service import _merge
+
+
+@compiles(UUID, "sqlite")
+def _uuid_as_char(type_, compiler, **kwargs):
+    return "CHAR(32)"
+
+
+def _worker(seconds_since_success):
+    sync = {"running": False, "records_per_second": 0.0, "queues": {}, "stalled": False}
+    return {"syncs": {"sales_orders": {**sync, "seconds_since_success": seconds_since_success}}}
+
+
+def test_merge_reports_the_most_stale_shard():
+    merged = _merge([_worker(60.0), _worker(600.0)])["sales_orders"]
+    assert merged["seconds_since_success"] == 600.0
+    assert merged["shards_without_success"] == 0
+
+
+@pytest.mark.parametrize("order", [[None, 60.0, 600.0], [60.0, None, 600.0], [60.0, 600.0, None]])
+def test_merge_shard_without_success_makes_the_type_stale(order):
+    merged = _merge([_worker(value) for value in order])["sales_orders"]
+    assert merged["seconds_since_success"] is None
+    assert merged["shards_without_success"] == 1
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    SyncLog.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _log(db, hours_ago, status="completed", **details):
+    completed_at = datetime.utcnow() - timedelta(hours=hours_ago)
+    sync_log = SyncLog(
+        sync_type="sales_orders", status=status, started_at=completed_at, completed_at=completed_at, details=details
+    )
+    db.add(sync_log)
+    db.commit()
+    return sync_log
+
+
+def test_last_full_success_of_the_shard(db):
+    own = _log(db, 5, shard=0, shard_count=2)
+    _log(db, 4, shard=1, shard_count=2)
+    _log(db, 3, shard=0, shard_count=2, customer_codes=["1"])
+    _log(db, 2, status="failed", shard=0, shard_count=2)
+
+    repository = SyncLogRepository(db)
+    assert repository.get_last_full_success("sales_orders", 0).id == own.id
+    # Sem sharding, execuções de uma só partição não cobrem todos os clientes
+    assert repository.get_last_full_success("sales_orders", None) is None
+
+    # Uma execução sem sharding cobre todas as partições
+    unsharded = _log(db, 1)
+    assert repository.get_last_full_success("sales_orders", 0).id == unsharded.id
+    assert repository.get_last_full_success("sales_orders", None).id == unsharded.id